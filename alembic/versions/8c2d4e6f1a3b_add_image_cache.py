@@ -0,0 +1,60 @@
+"""add_image_cache
+
+Revision ID: 8c2d4e6f1a3b
+Revises: 0fe1cffd882f
+Create Date: 2026-10-17 10:12:31.418206
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c2d4e6f1a3b'
+down_revision: Union[str, None] = '0fe1cffd882f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Columns of the image cache, the "images" table itself (id, name) may already
+# exist: the application used to create it at startup with create_all
+_CACHE_COLUMNS = (
+    ('cache_key', sa.String(length=64)),
+    ('source_hash', sa.String(length=64)),
+    ('blob_key', sa.String(length=64)),
+    ('media_type', sa.String(length=31)),
+    ('size', sa.Integer()),
+)
+_TIMESTAMP_COLUMNS = ('created_at', 'last_accessed')
+
+
+def upgrade() -> None:
+    if not sa.inspect(op.get_bind()).has_table('images'):
+        op.create_table('images',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=63), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_images_id'), 'images', ['id'], unique=False)
+        op.create_index(op.f('ix_images_name'), 'images', ['name'], unique=True)
+
+    for name, type_ in _CACHE_COLUMNS:
+        op.add_column('images', sa.Column(name, type_, nullable=True))
+    for name in _TIMESTAMP_COLUMNS:
+        op.add_column('images', sa.Column(name, sa.DateTime(), server_default=sa.text('now()'), nullable=True))
+    op.create_index(op.f('ix_images_cache_key'), 'images', ['cache_key'], unique=True)
+    op.create_index(op.f('ix_images_last_accessed'), 'images', ['last_accessed'], unique=False)
+    op.create_index(op.f('ix_images_source_hash'), 'images', ['source_hash'], unique=False)
+
+
+def downgrade() -> None:
+    # Back to the table of the previous revision, which only had id and name
+    op.drop_index(op.f('ix_images_source_hash'), table_name='images')
+    op.drop_index(op.f('ix_images_last_accessed'), table_name='images')
+    op.drop_index(op.f('ix_images_cache_key'), table_name='images')
+    for name in reversed(_TIMESTAMP_COLUMNS):
+        op.drop_column('images', name)
+    for name, _ in reversed(_CACHE_COLUMNS):
+        op.drop_column('images', name)
@@ -1,4 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
 
 from app.serializers.category_serializer import (
     CategoryCreate,
@@ -9,15 +11,18 @@ from app.serializers.category_serializer import (
 )
 from app.services.category_service import CategoryService
 from app.utils.dependencies.services import get_category_service
+from config import PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX
 
 router = APIRouter()
 
 
 @router.get("/all_categories/", response_model=CategoryList)
 async def get_all_categories(
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    after: Optional[str] = None,
     service: CategoryService = Depends(get_category_service),
 ):
-    return await service.get_all_categories()
+    return await service.get_all_categories(limit, after)
 
 
 @router.post("/create-category/", response_model=CategoryResponse)
@@ -1,35 +1,437 @@
-import io
+import os
+import zipfile
+import zlib
+from collections import Counter
+from typing import BinaryIO, Literal, Optional
 
-from PIL import Image
-from fastapi import APIRouter, File, UploadFile, HTTPException, Form
-from fastapi.responses import StreamingResponse
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    UploadFile,
+    HTTPException,
+    Form,
+    Query,
+)
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
+from PIL import Image, UnidentifiedImageError
+from starlette.background import BackgroundTask
 
-from tasks import send_email_message
+from app.core.database import async_session
+from app.repositories.image_repository import ImageRepository
+from app.serializers.image_serializers import (
+    ImageJobResponse,
+    ImageVariantList,
+    ImageVariantResponse,
+)
+from app.services.image_service import ImageService
+from app.utils.dependencies.services import get_image_service
+from app.utils.image_processing import TargetNotMetError, available_formats
+from app.utils.uploads import ingest_upload
+from app.utils.zip_stream import ZipStreamWriter
+from config import IMAGE_VARIANT_WIDTHS, UPLOAD_MAX_BYTES
+from tasks import (
+    send_email_message,
+    send_batch_summary_email,
+    email_spool,
+    process_image_job,
+)
 
 router = APIRouter()
 
 
+def parse_formats(output_format: str) -> list[str]:
+    """
+    Resolves the requested output format(s).
+
+    Args:
+        output_format (str): A comma-separated list of formats,
+            or "auto" for every format supported by the server.
+
+    Returns:
+        list[str]: Pillow format names.
+
+    Raises:
+        HTTPException: If a requested format is not supported.
+    """
+    supported = available_formats()
+    if output_format.lower() == "auto":
+        return supported
+
+    formats = [name.strip().upper() for name in output_format.split(",")]
+    unsupported = [name for name in formats if name not in supported]
+    if unsupported:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported output format: {', '.join(unsupported)}",
+        )
+    return formats
+
+
 @router.post("/optimize-image/")
 async def optimize_image(
     file: UploadFile = File(...),
     quality: int = 50,
     email: str = Form(...),
+    output_format: str = "JPEG",
+    max_bytes: Optional[int] = None,
+    min_psnr: Optional[float] = None,
+    max_width: Optional[int] = Query(None, gt=0),
+    max_height: Optional[int] = Query(None, gt=0),
+    fit: Literal["contain", "cover"] = "contain",
+    service: ImageService = Depends(get_image_service),
 ):
+    formats = parse_formats(output_format)
+    upload = await ingest_upload(file)
     try:
-        image = Image.open(io.BytesIO(await file.read()))
-        optimized_image = image.copy()
-
-        # Store the optimized image in bytes
-        output = io.BytesIO()
-        optimized_image.save(output, format="JPEG", quality=quality)
-        output.seek(0)
+        # Decoding and encoding run in the image process pool,
+        # large uploads are passed as a file and memory-mapped there
+        result = await service.optimize_image(
+            upload.source,
+            quality,
+            max_bytes=max_bytes,
+            min_psnr=min_psnr,
+            formats=formats,
+            max_width=max_width,
+            max_height=max_height,
+            fit=fit,
+            source_hash=upload.sha256,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        upload.close()
 
-        # Calling selery to send an email with an optimized image
-        send_email_message.delay(output.read(), email)
+    try:
+        # Calling selery to send an email with an optimized image,
+        # the worker reads the image from the spool by its key
+        image_key = await run_in_threadpool(email_spool.put, result.data)
+        send_email_message.delay(image_key, email, result.media_type)
 
         # Returning the optimized image to the client
-        return StreamingResponse(io.BytesIO(output.read()), media_type="image/jpeg")
+        headers = {
+            "X-Encode-Iterations": str(result.iterations),
+            "X-Encode-Time-Ms": f"{result.elapsed * 1000:.1f}",
+        }
+        if result.quality is not None:
+            headers["X-Encode-Quality"] = str(result.quality)
+        return Response(
+            content=result.data, media_type=result.media_type, headers=headers
+        )
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+
+def _detach(file: UploadFile) -> BinaryIO:
+    """
+    Returns an independent file object for the content of an upload.
+
+    FastAPI closes uploaded files before a streaming response is sent, so
+        the batch endpoint keeps a duplicated descriptor of each upload
+        instead of reading every image into memory up front.
+
+    Args:
+        file (UploadFile): The uploaded file.
+
+    Returns:
+        BinaryIO: A file object that outlives the request form.
+    """
+    # fileno() rolls a spooled upload over to its temporary file
+    return os.fdopen(os.dup(file.file.fileno()), "rb")
+
+
+class _SourceTooLargeError(ValueError):
+    pass
+
+
+def _file_reader(file: BinaryIO):
+    def read_and_close() -> bytes:
+        with file:
+            if file.seek(0, os.SEEK_END) > UPLOAD_MAX_BYTES:
+                raise _SourceTooLargeError()
+            file.seek(0)
+            return file.read()
+
+    async def read() -> bytes:
+        return await run_in_threadpool(read_and_close)
+
+    return read
+
+
+def _archive_reader(archive: zipfile.ZipFile, member: zipfile.ZipInfo):
+    async def read() -> bytes:
+        if member.file_size > UPLOAD_MAX_BYTES:
+            raise _SourceTooLargeError()
+        return await run_in_threadpool(archive.read, member)
+
+    return read
+
+
+def _batch_error(error: Exception) -> str:
+    """
+    Describes why an image of a batch failed, for the summary email.
+
+    Only known failures are described, anything else gets a generic
+        message so that no internal detail ends up in the email.
+
+    Args:
+        error (Exception): The error raised while optimizing the image.
+
+    Returns:
+        str: A message for the user.
+    """
+    if isinstance(error, _SourceTooLargeError):
+        return f"larger than the limit of {UPLOAD_MAX_BYTES} bytes"
+    if isinstance(error, Image.DecompressionBombError):
+        return "the image dimensions are too large"
+    if isinstance(error, UnidentifiedImageError):
+        return "not a supported image"
+    if isinstance(error, (zipfile.BadZipFile, zlib.error)):
+        return "cannot be read from the archive"
+    if isinstance(error, TargetNotMetError):
+        return "cannot be encoded within the target"
+    return "the image could not be optimized"
+
+
+@router.post("/optimize-batch/")
+async def optimize_batch(
+    files: list[UploadFile] = File(None),
+    archive: Optional[UploadFile] = File(None),
+    quality: int = 50,
+    email: str = Form(...),
+    output_format: str = "JPEG",
+    max_bytes: Optional[int] = None,
+    min_psnr: Optional[float] = None,
+    max_width: Optional[int] = Query(None, gt=0),
+    max_height: Optional[int] = Query(None, gt=0),
+    fit: Literal["contain", "cover"] = "contain",
+):
+    """
+    Optimizes many images at once, given as files and/or a ZIP archive.
+
+    Images are optimized in parallel and streamed back as a ZIP archive,
+        entry by entry in completion order. One summary email is sent
+        once the whole batch has been processed, or once the client
+        disconnected.
+    """
+    formats = parse_formats(output_format)
+
+    source_archive = archive_file = None
+    if archive is not None:
+        archive_file = _detach(archive)
+        try:
+            source_archive = zipfile.ZipFile(archive_file)
+        except zipfile.BadZipFile:
+            archive_file.close()
+            raise HTTPException(status_code=400, detail="Invalid ZIP archive")
+
+    uploads = [(file.filename, _detach(file)) for file in files or []]
+    sources = [(name, _file_reader(file)) for name, file in uploads]
+    if source_archive is not None:
+        sources += [
+            (member.filename, _archive_reader(source_archive, member))
+            for member in source_archive.infolist()
+            if not member.is_dir()
+        ]
+
+    def close_sources():
+        # Readers close their upload once read, the ones never read (the
+        # client went away) are closed here. Closing twice is a no-op.
+        for _, file in uploads:
+            file.close()
+        if source_archive is not None:
+            source_archive.close()
+            archive_file.close()
+
+    if not sources:
+        close_sources()
+        raise HTTPException(status_code=400, detail="No images were uploaded")
+
+    async def stream_archive():
+        writer = ZipStreamWriter()
+        summary = []
+
+        try:
+            # The request session is closed before the response is streamed
+            async with async_session() as session:
+                service = ImageService(image_repo=ImageRepository(session))
+                results = service.optimize_many(
+                    sources,
+                    quality=quality,
+                    max_bytes=max_bytes,
+                    min_psnr=min_psnr,
+                    formats=formats,
+                    max_width=max_width,
+                    max_height=max_height,
+                    fit=fit,
+                )
+                try:
+                    async for name, result in results:
+                        if isinstance(result, Exception):
+                            error = _batch_error(result)
+                            summary.append({"name": name, "error": error})
+                            continue
+
+                        stem = name.rsplit("/", 1)[-1].rsplit(".", 1)[0]
+                        extension = result.format.lower().replace(
+                            "jpeg", "jpg"
+                        )
+                        size = len(result.data)
+                        summary.append({"name": name, "size": size})
+                        yield writer.add(f"{stem}.{extension}", result.data)
+                finally:
+                    await results.aclose()
+            yield writer.close()
+        finally:
+            close_sources()
+
+            # One email for the whole batch, also sent when the client
+            # disconnected, listing the images that were not processed
+            missing = Counter(name for name, _ in sources)
+            missing.subtract(item["name"] for item in summary)
+            summary += [
+                {"name": name, "error": "not processed, download interrupted"}
+                for name, count in missing.items()
+                for _ in range(count)
+            ]
+            send_batch_summary_email.delay(email, summary)
+
+    return StreamingResponse(
+        stream_archive(),
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": 'attachment; filename="optimized.zip"'
+        },
+        # Runs even when the stream never started
+        background=BackgroundTask(close_sources),
+    )
+
+
+@router.post("/jobs", response_model=ImageJobResponse, status_code=202)
+async def create_image_job(
+    file: UploadFile = File(...),
+    quality: int = 50,
+    output_format: str = "JPEG",
+    max_bytes: Optional[int] = None,
+    min_psnr: Optional[float] = None,
+    max_width: Optional[int] = Query(None, gt=0),
+    max_height: Optional[int] = Query(None, gt=0),
+    fit: Literal["contain", "cover"] = "contain",
+    service: ImageService = Depends(get_image_service),
+):
+    """
+    Queues an image optimization and returns the job right away.
+
+    The optimization runs in a Celery worker, poll GET /images/jobs/{id}
+        for its progress and download the result from
+        GET /images/jobs/{id}/result.
+    """
+    formats = parse_formats(output_format)
+    upload = await ingest_upload(file)
+    try:
+        job = await service.create_job(
+            upload,
+            quality=quality,
+            max_bytes=max_bytes,
+            min_psnr=min_psnr,
+            formats=formats,
+            max_width=max_width,
+            max_height=max_height,
+            fit=fit,
+        )
+    finally:
+        upload.close()
+    process_image_job.delay(job.id)
+    return job
+
+
+@router.get("/jobs/{job_id}", response_model=ImageJobResponse)
+async def read_image_job(
+    job_id: int, service: ImageService = Depends(get_image_service)
+):
+    job = await service.get_job(job_id)
+    if job:
+        return job
+    raise HTTPException(status_code=404, detail="Job not found")
+
+
+@router.get("/jobs/{job_id}/result")
+async def read_image_job_result(
+    job_id: int, service: ImageService = Depends(get_image_service)
+):
+    job = await service.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status != "done":
+        raise HTTPException(
+            status_code=409, detail=f"Job is {job.status}, not done"
+        )
+    try:
+        data = await service.read_image(job)
+    except FileNotFoundError:
+        # The result was evicted from the image cache
+        raise HTTPException(status_code=410, detail="Job result has expired")
+    return Response(content=data, media_type=job.media_type)
+
+
+@router.post("/variants/", response_model=ImageVariantList)
+async def create_image_variants(
+    file: UploadFile = File(...),
+    widths: str = ",".join(map(str, IMAGE_VARIANT_WIDTHS)),
+    quality: int = 50,
+    output_format: str = "JPEG",
+    service: ImageService = Depends(get_image_service),
+):
+    """
+    Generates a responsive set (srcset) of an image, one variant per width
+        and format, from a single decode.
+
+    Variants are stored in the image cache and served by
+        GET /images/variants/{id}.
+    """
+    try:
+        requested_widths = [int(width) for width in widths.split(",")]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid widths")
+    if not requested_widths or min(requested_widths) <= 0:
+        raise HTTPException(status_code=400, detail="Invalid widths")
+
+    formats = parse_formats(output_format)
+    upload = await ingest_upload(file)
+    try:
+        variants = await service.generate_variants(
+            upload.source,
+            requested_widths,
+            formats=formats,
+            quality=quality,
+            source_hash=upload.sha256,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        upload.close()
+
+    return ImageVariantList(
+        variants=[
+            ImageVariantResponse.model_validate(variant)
+            for variant in variants
+        ]
+    )
+
+
+@router.get("/variants/{image_id}")
+async def read_image_variant(
+    image_id: int, service: ImageService = Depends(get_image_service)
+):
+    variant = await service.get_variant(image_id)
+    if not variant:
+        raise HTTPException(status_code=404, detail="Variant not found")
+    try:
+        data = await service.read_image(variant)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Variant not found")
+    return Response(content=data, media_type=variant.media_type)
@@ -1,6 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
 
-from app.auth.security import get_current_active_profile
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from app.auth.security import get_cached_active_profile
 from app.models import User
 from app.serializers.task_serializer import (
     TaskResponse,
@@ -11,6 +13,7 @@ from app.serializers.task_serializer import (
 )
 from app.services.task_service import TaskService
 from app.utils.dependencies.services import get_task_service
+from config import PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX
 
 router = APIRouter()
 
@@ -18,7 +21,7 @@ router = APIRouter()
 @router.post("/create_task/", response_model=TaskResponse)
 async def create_task(
     item: TaskCreate,
-    current_user: User = Depends(get_current_active_profile),
+    current_user: User = Depends(get_cached_active_profile),
     service: TaskService = Depends(get_task_service),
 ):
     return await service.create_task(**item.dict(), user_id=current_user.id)
@@ -26,10 +29,11 @@ async def create_task(
 
 @router.get("/all_tasks/", response_model=TaskList)
 async def get_all_tasks(
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    after: Optional[str] = None,
     service: TaskService = Depends(get_task_service),
 ):
-    tasks = await service.get_all_tasks()
-    return TaskList(tasks=tasks)
+    return await service.get_all_tasks(limit, after)
 
 
 @router.get("/tasks/{tasks_id}", response_model=TaskResponse)
@@ -1,7 +1,11 @@
 from fastapi import APIRouter, Depends
 from fastapi.security import OAuth2PasswordRequestForm
 
-from app.auth.security import get_current_active_profile
+from app.auth.security import (
+    get_cached_active_profile,
+    get_current_active_profile,
+    get_token_claims,
+)
 from app.auth.token_serializer import Token
 from app.models import User
 from app.serializers.user_serializer import (
@@ -10,12 +14,20 @@ from app.serializers.user_serializer import (
     UserActivityResponse,
 )
 from app.services.user_service import UserService
+from app.utils.dependencies.rate_limit import (
+    limit_login,
+    limit_registration,
+)
 from app.utils.dependencies.services import get_user_service
 
 router = APIRouter()
 
 
-@router.post("/create_user/", response_model=UserResponse)
+@router.post(
+    "/create_user/",
+    response_model=UserResponse,
+    dependencies=[Depends(limit_registration)],
+)
 async def create_profile(
     item: UserCreate,
     service: UserService = Depends(get_user_service),
@@ -23,7 +35,9 @@ async def create_profile(
     return await service.register_user(item)
 
 
-@router.post("/login/", response_model=Token)
+@router.post(
+    "/login/", response_model=Token, dependencies=[Depends(limit_login)]
+)
 async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
     service: UserService = Depends(get_user_service),
@@ -34,11 +48,39 @@ async def login_for_access_token(
     return {"access_token": access_token, "token_type": "bearer"}
 
 
+@router.post("/logout/", status_code=204)
+async def logout(
+    claims: dict = Depends(get_token_claims),
+    service: UserService = Depends(get_user_service),
+):
+    await service.logout_user(claims)
+
+
+@router.post("/{username}/disable/", status_code=204)
+async def disable_user(
+    username: str,
+    current_user: User = Depends(get_cached_active_profile),
+    service: UserService = Depends(get_user_service),
+):
+    await service.set_user_disabled(current_user, username, True)
+
+
+@router.post("/{username}/enable/", status_code=204)
+async def enable_user(
+    username: str,
+    current_user: User = Depends(get_cached_active_profile),
+    service: UserService = Depends(get_user_service),
+):
+    await service.set_user_disabled(current_user, username, False)
+
+
+# Not cached, the response includes the activity timestamps
 @router.get("/users/me/", response_model=UserResponse)
 async def read_users_me(
     current_user: User = Depends(get_current_active_profile),
+    service: UserService = Depends(get_user_service),
 ):
-    return current_user
+    return await service.get_profile(current_user)
 
 
 @router.get("/user/activity/", response_model=UserActivityResponse)
@@ -0,0 +1,127 @@
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.core.metrics import PRINCIPAL_CACHE_REQUESTS
+from app.models import User
+from config import AUTH_PRINCIPAL_CACHE_SIZE, AUTH_PRINCIPAL_CACHE_TTL_SECONDS
+
+# Written behind the cache's back by the activity flush, which does not
+# invalidate it, so they are left out of the snapshots
+_ACTIVITY_COLUMNS = {"last_login", "last_request"}
+
+
+class PrincipalCache:
+    """
+    Per-process TTL + LRU cache of authenticated users, keyed by the token
+        subject (the username).
+
+    Entries are column snapshots rather than ORM instances, every hit builds
+        a new transient User, so a cached principal is never shared between
+        sessions or requests. The activity timestamps are not cached, they
+        are None on a cached user.
+
+    Attributes:
+        maxsize (int): The maximum number of cached users.
+        ttl (float): Seconds an entry is served before the user is loaded
+            again, bounds how long another process's change goes unseen.
+        hits (int): Number of lookups answered from the cache.
+        misses (int): Number of lookups that had to load the user.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._columns = [
+            attr.key
+            for attr in inspect(User).column_attrs
+            if attr.key not in _ACTIVITY_COLUMNS
+        ]
+
+    def get(self, subject: str) -> Optional[User]:
+        """
+        Looks up a cached user.
+
+        Args:
+            subject (str): The token subject.
+
+        Returns:
+            Optional[User]: A transient copy of the user, or None on a miss.
+        """
+        entry = self._entries.get(subject)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[subject]
+            self.misses += 1
+            PRINCIPAL_CACHE_REQUESTS.labels("miss").inc()
+            return None
+
+        self._entries.move_to_end(subject)
+        self.hits += 1
+        PRINCIPAL_CACHE_REQUESTS.labels("hit").inc()
+        return User(**entry[1])
+
+    def put(self, subject: str, user: User) -> None:
+        """
+        Caches a loaded user.
+
+        Args:
+            subject (str): The token subject.
+            user (User): The user loaded from the database.
+        """
+        if self.maxsize <= 0:
+            return
+        values = {column: getattr(user, column) for column in self._columns}
+        self._entries[subject] = (time.monotonic() + self.ttl, values)
+        self._entries.move_to_end(subject)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, subject: Optional[str] = None) -> None:
+        """
+        Drops a cached user, or every cached user.
+
+        Args:
+            subject (str, optional): The token subject, None drops all.
+        """
+        if subject is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(subject, None)
+
+
+principal_cache = PrincipalCache(
+    AUTH_PRINCIPAL_CACHE_SIZE, AUTH_PRINCIPAL_CACHE_TTL_SECONDS
+)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_flushed_user(mapper, connection, target):
+    principal_cache.invalidate(target.username)
+    history = inspect(target).attrs.username.history
+    for username in history.deleted or ():
+        principal_cache.invalidate(username)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _invalidate_bulk_changes(orm_execute_state):
+    # update()/delete() statements do not say which users they match
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None or mapper.class_ is not User:
+        return
+    # Set by statements that cannot change who the principal is, such as
+    # the activity timestamp flush
+    if not orm_execute_state.execution_options.get(
+        "invalidate_principals", True
+    ):
+        return
+    principal_cache.invalidate()
@@ -0,0 +1,74 @@
+import asyncio
+import logging
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.auth.security import hash_password
+from app.core.database import async_session
+from app.core.metrics import PASSWORD_REHASHES
+from app.repositories.user_repository import UserRepository
+from config import pwd_context
+
+logger = logging.getLogger(__name__)
+
+_tasks: set[asyncio.Task] = set()
+_users_in_flight: set[int] = set()
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """
+    Checks whether a password hash was made with another cost than
+        BCRYPT_ROUNDS. Only parses the hash, costs no hashing.
+
+    Args:
+        hashed_password (str): The stored hash.
+
+    Returns:
+        bool: True if the hash should be replaced.
+    """
+    return pwd_context.needs_update(hashed_password)
+
+
+async def _rehash(user_id: int, old_hash: str, password: str) -> None:
+    try:
+        new_hash = await hash_password(password)
+        async with async_session() as session:
+            replaced = await UserRepository(session).replace_password_hash(
+                user_id, old_hash, new_hash
+            )
+        PASSWORD_REHASHES.labels("updated" if replaced else "skipped").inc()
+    except (SQLAlchemyError, OSError):
+        logger.exception("Could not rehash the password of user %s", user_id)
+        PASSWORD_REHASHES.labels("failed").inc()
+    finally:
+        _users_in_flight.discard(user_id)
+
+
+def schedule_rehash(user_id: int, old_hash: str, password: str) -> None:
+    """
+    Rehashes a password at BCRYPT_ROUNDS in the background, after the login
+        that verified it has been answered.
+
+    The hash is only replaced if it is still old_hash, so a password
+        changed meanwhile is never overwritten. A rehash lost on shutdown is
+        simply done again at the next login.
+
+    Args:
+        user_id (int): The ID of the user.
+        old_hash (str): The stored hash the password was verified against.
+        password (str): The verified plain password.
+    """
+    if user_id in _users_in_flight:
+        return
+    _users_in_flight.add(user_id)
+    task = asyncio.create_task(_rehash(user_id, old_hash, password))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+
+async def wait_for_rehashes() -> None:
+    """
+    Waits for the scheduled rehashes to finish.
+    """
+    if _tasks:
+        await asyncio.gather(*_tasks, return_exceptions=True)
@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+
+import redis.asyncio as redis
+
+from config import (
+    AUTH_REVOCATION_REDIS_URL,
+    AUTH_REVOCATION_REFRESH_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class RevocationList:
+    """
+    Revoked tokens and disabled users, checked in memory on every request.
+
+    Revocations are stored in a Redis sorted set shared by all API
+        processes, scored by the time they can be forgotten: a logged out
+        token is revoked until its "exp", a disabled user until enabled
+        again (score +inf). Every process keeps a copy of the live members
+        in a set, refreshed in the background every refresh_interval
+        seconds, so a revocation made by another process is seen within
+        that delay and checking a token costs no I/O.
+
+    If Redis is unreachable the last refreshed set is kept.
+
+    Attributes:
+        key (str): The sorted set in Redis.
+        refresh_interval (float): Seconds between two refreshes.
+    """
+
+    def __init__(self, url: str, key: str, refresh_interval: float):
+        self._client = redis.Redis.from_url(url)
+        self.key = key
+        self.refresh_interval = refresh_interval
+        self._members: frozenset[str] = frozenset()
+        self._task: Optional[asyncio.Task] = None
+
+    def is_revoked(self, claims: dict) -> bool:
+        """
+        Checks whether a token was logged out or its user disabled.
+
+        Args:
+            claims (dict): The verified claims of the token.
+
+        Returns:
+            bool: True if the token must be rejected.
+        """
+        jti = claims.get("jti")
+        return (jti is not None and f"jti:{jti}" in self._members) or (
+            f"user:{claims.get('sub')}" in self._members
+        )
+
+    def is_user_disabled(self, username: str) -> bool:
+        """
+        Checks whether a user is disabled.
+
+        Args:
+            username (str): The username.
+
+        Returns:
+            bool: True if the user is disabled.
+        """
+        return f"user:{username}" in self._members
+
+    async def _add(self, member: str, until: float) -> None:
+        await self._client.zadd(self.key, {member: until})
+        # Effective at once in this process, the others pick it up on refresh
+        self._members = self._members | {member}
+
+    async def revoke_token(self, claims: dict) -> None:
+        """
+        Revokes a single token (logout) until it expires.
+
+        Args:
+            claims (dict): The verified claims of the token, with "jti".
+        """
+        await self._add(f"jti:{claims['jti']}", claims["exp"])
+
+    async def disable_user(self, username: str) -> None:
+        """
+        Revokes every token of a user and refuses new logins until the user
+            is enabled again.
+
+        Args:
+            username (str): The username.
+        """
+        await self._add(f"user:{username}", float("inf"))
+
+    async def enable_user(self, username: str) -> None:
+        """
+        Enables a disabled user.
+
+        Args:
+            username (str): The username.
+        """
+        member = f"user:{username}"
+        await self._client.zrem(self.key, member)
+        self._members = self._members - {member}
+
+    async def refresh(self) -> None:
+        """
+        Reloads the live revocations from Redis and forgets expired ones.
+        """
+        now = time.time()
+        await self._client.zremrangebyscore(self.key, "-inf", now)
+        members = await self._client.zrangebyscore(self.key, now, "+inf")
+        self._members = frozenset(member.decode() for member in members)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except (redis.RedisError, OSError):
+                logger.warning("Could not refresh the revocation list")
+            await asyncio.sleep(self.refresh_interval)
+
+    def start(self) -> None:
+        """
+        Starts refreshing in the background of the running event loop.
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Stops the background refresh.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+revocation_list = RevocationList(
+    AUTH_REVOCATION_REDIS_URL, "auth:revoked", AUTH_REVOCATION_REFRESH_SECONDS
+)
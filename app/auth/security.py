@@ -1,3 +1,4 @@
+import uuid
 from typing import Annotated
 from sqlalchemy import select
 from fastapi import Depends, HTTPException, status
@@ -6,13 +7,19 @@ from datetime import datetime, timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
+from app.auth.principal_cache import principal_cache
+from app.auth.revocation import revocation_list
+from app.auth.token_cache import token_cache
 from app.auth.token_serializer import TokenData
+from app.core.activity import activity_buffer
+from app.core.executors import run_in_password_executor
 from app.models import User
 from app.utils.dependencies.get_session import get_session
 from config import (
     pwd_context,
     oauth2_scheme,
     ALGORITHM,
+    AUTH_STATELESS_TOKENS,
     SECRET_KEY,
 )
 
@@ -31,6 +38,27 @@ def get_password_hash(password):
     return pwd_context.hash(password)
 
 
+def decode_token(token: str) -> dict:
+    """
+    Verifies a JWT and returns its claims, served from the verified token
+        cache when the same token was verified before and has not expired.
+
+    Args:
+        token (str): The encoded JWT.
+
+    Returns:
+        dict: The claims of the token, do not modify them.
+
+    Raises:
+        JWTError: If the token is invalid or expired.
+    """
+    claims = token_cache.get(token)
+    if claims is None:
+        claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        token_cache.put(token, claims)
+    return claims
+
+
 async def get_user(session: AsyncSession, username: str):
     """
     Retrieves a user from the database by their username.
@@ -75,9 +103,9 @@ async def get_current_profile(
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_token(token)
         username: str = payload.get("sub")
-        if username is None:
+        if username is None or revocation_list.is_revoked(payload):
             raise credentials_exception
         token_data = TokenData(username=username)
     except JWTError:
@@ -85,6 +113,80 @@ async def get_current_profile(
     profile = await get_user(session, username=token_data.username)
     if profile is None:
         raise credentials_exception
+    activity_buffer.record_request(profile.id)
+    return profile
+
+
+async def get_token_claims(token: str = Depends(oauth2_scheme)) -> dict:
+    """
+    Verifies the JWT token of the request without any database access.
+
+    Args:
+        token (str, optional): The JWT token obtained from the request headers.
+
+    Returns:
+        dict: The claims of the token, do not modify them.
+
+    Raises:
+        HTTPException: If the token is invalid, has no subject, was logged
+            out or its user was disabled.
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    try:
+        payload = decode_token(token)
+    except JWTError:
+        raise credentials_exception
+    if payload.get("sub") is None or revocation_list.is_revoked(payload):
+        raise credentials_exception
+    return payload
+
+
+async def get_cached_current_profile(
+    claims: dict = Depends(get_token_claims),
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Same as get_current_profile, but the user is served from the
+        per-process principal cache when possible, saving the database
+        round trip. Stateless tokens (see AUTH_STATELESS_TOKENS) are trusted
+        as they are and never touch the database.
+
+    Args:
+        claims (dict, optional): The verified claims of the request's token.
+        session (AsyncSession, optional): The asynchronous database session,
+            only used on a cache miss.
+
+    Returns:
+        User: A transient copy of the current user's profile. For stateless
+            tokens only id, username and is_admin are set.
+
+    Raises:
+        HTTPException: If the token does not correspond to any user.
+    """
+    username = claims["sub"]
+    if AUTH_STATELESS_TOKENS and "uid" in claims:
+        activity_buffer.record_request(claims["uid"])
+        return User(
+            id=claims["uid"],
+            username=username,
+            is_admin=claims.get("is_admin", False),
+        )
+
+    profile = principal_cache.get(username)
+    if profile is None:
+        profile = await get_user(session, username=username)
+        if profile is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Could not validate credentials",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        principal_cache.put(username, profile)
+    activity_buffer.record_request(profile.id)
     return profile
 
 
@@ -104,9 +206,42 @@ async def get_current_active_profile(
     return current_user
 
 
+async def get_cached_active_profile(
+    current_user: Annotated[User, Depends(get_cached_current_profile)]
+):
+    """
+    Drop-in replacement of get_current_active_profile backed by the
+        principal cache, for endpoints that only need who the user is
+        (not fresh activity timestamps).
+
+    Args:
+        current_user (User): The user model instance obtained from
+            the current request.
+
+    Returns:
+        User: The active user model instance.
+    """
+    return current_user
+
+
+async def hash_password(password: str) -> str:
+    """
+    Hashes the input password in the password thread pool, without blocking
+        the event loop.
+
+    Args:
+        password (str): The password to be hashed.
+
+    Returns:
+        str: The hashed password.
+    """
+    return await run_in_password_executor(pwd_context.hash, password)
+
+
 async def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
-    Verifies the provided plain password against the stored hashed password.
+    Verifies the provided plain password against the stored hashed password,
+        in the password thread pool.
 
     Args:
         plain_password (str): The plain password to verify.
@@ -116,7 +251,9 @@ async def verify_password(plain_password: str, hashed_password: str) -> bool:
         bool: True if the plain password matches the hashed password,
             False otherwise.
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    return await run_in_password_executor(
+        pwd_context.verify, plain_password, hashed_password
+    )
 
 
 async def authenticate_user(username: str, password: str) -> str:
@@ -151,6 +288,9 @@ async def create_jwt_token(data: dict, expires_minutes: int = 30) -> str:
     """
     Creates a JWT token with the provided data and expiration time.
 
+    Every token gets a unique "jti" claim, so it can be revoked on its own
+        at logout.
+
     Args:
         data (dict): The payload data to be encoded into the token.
         expires_minutes (int, optional): The token expiration time in minutes.
@@ -161,6 +301,6 @@ async def create_jwt_token(data: dict, expires_minutes: int = 30) -> str:
     """
     expire = datetime.utcnow() + timedelta(minutes=expires_minutes)
     to_encode = data.copy()
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
@@ -0,0 +1,81 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from app.core.metrics import TOKEN_CACHE_REQUESTS
+from config import AUTH_TOKEN_CACHE_SIZE
+
+
+class TokenCache:
+    """
+    Bounded LRU cache from the digest of a verified JWT to its claims.
+
+    A client sends the same token for its whole lifetime, so after the
+        first successful jwt.decode() the signature check and the JSON
+        parsing can be skipped. Entries are only served until the "exp"
+        claim of the token, tokens without "exp" are never cached.
+
+    Tokens are keyed by their SHA-256 digest, the bearer tokens themselves
+        are not kept in memory.
+
+    Attributes:
+        maxsize (int): The maximum number of cached tokens.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[bytes, tuple[float, dict]] = OrderedDict()
+
+    @staticmethod
+    def _digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[dict]:
+        """
+        Looks up the claims of a verified token.
+
+        Args:
+            token (str): The encoded JWT.
+
+        Returns:
+            Optional[dict]: The claims, or None if the token was not
+                verified yet or has expired.
+        """
+        digest = self._digest(token)
+        entry = self._entries.get(digest)
+        if entry is None or entry[0] <= time.time():
+            if entry is not None:
+                del self._entries[digest]
+            TOKEN_CACHE_REQUESTS.labels("miss").inc()
+            return None
+
+        self._entries.move_to_end(digest)
+        TOKEN_CACHE_REQUESTS.labels("hit").inc()
+        return entry[1]
+
+    def put(self, token: str, claims: dict) -> None:
+        """
+        Caches the claims of a token verified by jwt.decode().
+
+        Args:
+            token (str): The encoded JWT.
+            claims (dict): Its decoded claims.
+        """
+        expires_at = claims.get("exp")
+        if self.maxsize <= 0 or not isinstance(expires_at, (int, float)):
+            return
+        digest = self._digest(token)
+        self._entries[digest] = (expires_at, claims)
+        self._entries.move_to_end(digest)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """
+        Drops every cached token.
+        """
+        self._entries.clear()
+
+
+token_cache = TokenCache(AUTH_TOKEN_CACHE_SIZE)
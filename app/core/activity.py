@@ -0,0 +1,192 @@
+import asyncio
+import datetime
+import logging
+import time
+from typing import Callable, Optional
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.database import async_session
+from app.core.metrics import (
+    ACTIVITY_COALESCED,
+    ACTIVITY_FLUSH_DURATION,
+    ACTIVITY_FLUSH_FAILURES,
+    ACTIVITY_FLUSH_ROWS,
+)
+from app.repositories.user_repository import UserRepository
+from config import ACTIVITY_BUFFER_MAX_USERS, ACTIVITY_FLUSH_INTERVAL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+def _latest(
+    first: Optional[datetime.datetime], second: Optional[datetime.datetime]
+) -> Optional[datetime.datetime]:
+    if first is None or second is None:
+        return first or second
+    return max(first, second)
+
+
+class ActivityBuffer:
+    """
+    Write-behind buffer of the last_login/last_request timestamps of users.
+
+    Recording activity only updates an in-memory dict holding the latest
+        timestamps of every user, repeated updates of the same user are
+        coalesced. The pending timestamps are written in one batched UPDATE
+        every flush_interval seconds, as soon as max_users users are
+        pending, and on shutdown. A failed flush puts its rows back to be
+        retried with the next one.
+
+    Attributes:
+        flush_interval (float): Maximum seconds between two flushes.
+        max_users (int): Pending users that trigger an early flush.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable,
+        flush_interval: float,
+        max_users: int,
+    ):
+        self._session_factory = session_factory
+        self.flush_interval = flush_interval
+        self.max_users = max_users
+        self._pending: dict[int, list] = {}
+        self._recorded = 0
+        self._full: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    def _merge(self, user_id: int, login, request) -> None:
+        entry = self._pending.setdefault(user_id, [None, None])
+        entry[0] = _latest(entry[0], login)
+        entry[1] = _latest(entry[1], request)
+
+    def _record(self, user_id: int, login, request) -> None:
+        self._merge(user_id, login, request)
+        self._recorded += 1
+        if self._full is not None and len(self._pending) >= self.max_users:
+            self._full.set()
+
+    def record_login(
+        self, user_id: int, at: Optional[datetime.datetime] = None
+    ) -> None:
+        """
+        Records a login, which is also the user's latest request.
+
+        Args:
+            user_id (int): The ID of the user.
+            at (datetime, optional): The time of the login, defaults to now
+                (UTC).
+        """
+        at = at or datetime.datetime.utcnow()
+        self._record(user_id, at, at)
+
+    def record_request(
+        self, user_id: int, at: Optional[datetime.datetime] = None
+    ) -> None:
+        """
+        Records an authenticated request.
+
+        Args:
+            user_id (int): The ID of the user.
+            at (datetime, optional): The time of the request, defaults to
+                now (UTC).
+        """
+        self._record(user_id, None, at or datetime.datetime.utcnow())
+
+    def pending(
+        self, user_id: int
+    ) -> tuple[Optional[datetime.datetime], Optional[datetime.datetime]]:
+        """
+        Returns the timestamps of a user not written to the database yet.
+
+        Args:
+            user_id (int): The ID of the user.
+
+        Returns:
+            tuple: The pending (last_login, last_request), None when there
+                is nothing pending.
+        """
+        entry = self._pending.get(user_id, (None, None))
+        return entry[0], entry[1]
+
+    async def flush(self) -> int:
+        """
+        Writes every pending timestamp in a single UPDATE.
+
+        Returns:
+            int: The number of users written.
+        """
+        async with self._lock:
+            pending, self._pending = self._pending, {}
+            recorded, self._recorded = self._recorded, 0
+            if self._full is not None:
+                self._full.clear()
+            if not pending:
+                return 0
+
+            started = time.perf_counter()
+            try:
+                async with self._session_factory() as session:
+                    await UserRepository(session).update_activity(
+                        (user_id, login, request)
+                        for user_id, (login, request) in pending.items()
+                    )
+            except (SQLAlchemyError, OSError):
+                logger.exception("Could not flush user activity")
+                ACTIVITY_FLUSH_FAILURES.inc()
+                self._restore(pending, recorded)
+                return 0
+            except asyncio.CancelledError:
+                # Stopped mid-flush, the final flush of stop() retries
+                self._restore(pending, recorded)
+                raise
+
+            ACTIVITY_FLUSH_DURATION.observe(time.perf_counter() - started)
+            ACTIVITY_FLUSH_ROWS.observe(len(pending))
+            ACTIVITY_COALESCED.inc(recorded - len(pending))
+            return len(pending)
+
+    def _restore(self, pending: dict[int, list], recorded: int) -> None:
+        for user_id, (login, request) in pending.items():
+            self._merge(user_id, login, request)
+        self._recorded += recorded
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._full.wait(), timeout=self.flush_interval
+                )
+            except asyncio.TimeoutError:
+                pass
+            await self.flush()
+
+    def start(self) -> None:
+        """
+        Starts flushing in the background of the running event loop.
+        """
+        if self._task is None:
+            self._full = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Stops the background flushes and writes what is still pending.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._full = None
+        await self.flush()
+
+
+activity_buffer = ActivityBuffer(
+    async_session, ACTIVITY_FLUSH_INTERVAL_SECONDS, ACTIVITY_BUFFER_MAX_USERS
+)
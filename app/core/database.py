@@ -3,6 +3,7 @@ from typing import Any
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 
 from config import SQLALCHEMY_DATABASE_URL
 
@@ -12,4 +13,15 @@ engine = create_async_engine(SQLALCHEMY_DATABASE_URL, echo=True, future=True)
 async_session = sessionmaker(
     engine, class_=AsyncSession, expire_on_commit=False
 )
+
+# Celery tasks run their coroutines in a fresh event loop (asyncio.run),
+# so asyncpg connections must not be pooled across tasks
+worker_engine = create_async_engine(
+    SQLALCHEMY_DATABASE_URL, poolclass=NullPool, future=True
+)
+
+# noinspection PyTypeChecker
+worker_session = sessionmaker(
+    worker_engine, class_=AsyncSession, expire_on_commit=False
+)
 Base: Any = declarative_base()
@@ -0,0 +1,137 @@
+import asyncio
+import time
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from functools import partial
+from typing import Any, Callable
+
+from app.core.metrics import PASSWORD_HASH_DURATION, PASSWORD_HASH_QUEUE_TIME
+from config import IMAGE_PROCESS_WORKERS, PASSWORD_HASH_WORKERS
+
+_image_executor: Executor | None = None
+_image_executor_disabled = False
+_password_executor: Executor | None = None
+
+
+def get_image_executor() -> Executor | None:
+    """
+    Returns the process pool used for CPU-bound image work, creating it on
+        first use.
+
+    Returns:
+        Executor | None: The shared process pool, or None when image work
+            runs inline (IMAGE_PROCESS_WORKERS is 0 or the pool is
+            disabled in this process).
+    """
+    global _image_executor
+    if _image_executor_disabled:
+        return None
+    if _image_executor is None and IMAGE_PROCESS_WORKERS > 0:
+        _image_executor = ProcessPoolExecutor(
+            max_workers=IMAGE_PROCESS_WORKERS
+        )
+    return _image_executor
+
+
+async def run_in_image_executor(func: Callable, *args, **kwargs) -> Any:
+    """
+    Runs a CPU-bound function in the image process pool and awaits its result
+        without blocking the event loop.
+
+    Args:
+        func (Callable): A picklable, module-level function.
+        *args: Positional arguments passed to the function.
+        **kwargs: Keyword arguments passed to the function.
+
+    Returns:
+        Any: The value returned by the function.
+    """
+    executor = get_image_executor()
+    if executor is None:
+        return func(*args, **kwargs)
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, partial(func, *args, **kwargs))
+
+
+def disable_image_executor() -> None:
+    """
+    Makes image work run inline in the current process.
+
+    Used by Celery pool processes, which are daemonic and cannot start
+        child processes, and already are the unit of parallelism.
+    """
+    global _image_executor_disabled
+    _image_executor_disabled = True
+
+
+def get_password_executor() -> Executor | None:
+    """
+    Returns the thread pool used for password hashing and verification,
+        creating it on first use.
+
+    bcrypt releases the GIL while hashing, so a few threads take the
+        hashing off the event loop without a process pool. The pool size
+        bounds how many hashes run at once, the rest wait in its queue.
+
+    Returns:
+        Executor | None: The shared thread pool, or None when hashing runs
+            inline (PASSWORD_HASH_WORKERS is 0).
+    """
+    global _password_executor
+    if _password_executor is None and PASSWORD_HASH_WORKERS > 0:
+        _password_executor = ThreadPoolExecutor(
+            max_workers=PASSWORD_HASH_WORKERS,
+            thread_name_prefix="password-hash",
+        )
+    return _password_executor
+
+
+async def run_in_password_executor(func: Callable, *args) -> Any:
+    """
+    Runs a password hashing function in the password thread pool, recording
+        how long it waited in the queue and how long it ran.
+
+    Args:
+        func (Callable): The function, e.g. CryptContext.hash or verify.
+        *args: Positional arguments passed to the function.
+
+    Returns:
+        Any: The value returned by the function.
+    """
+    operation = func.__name__
+    executor = get_password_executor()
+    if executor is None:
+        with PASSWORD_HASH_DURATION.labels(operation).time():
+            return func(*args)
+
+    submitted = time.monotonic()
+
+    def timed():
+        started = time.monotonic()
+        PASSWORD_HASH_QUEUE_TIME.labels(operation).observe(started - submitted)
+        try:
+            return func(*args)
+        finally:
+            PASSWORD_HASH_DURATION.labels(operation).observe(
+                time.monotonic() - started
+            )
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, timed)
+
+
+def shutdown_executors() -> None:
+    """
+    Shuts down the executors created by this module.
+    """
+    global _image_executor, _password_executor
+    if _image_executor is not None:
+        _image_executor.shutdown(wait=True, cancel_futures=True)
+        _image_executor = None
+    if _password_executor is not None:
+        _password_executor.shutdown(wait=True, cancel_futures=True)
+        _password_executor = None
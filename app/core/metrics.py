@@ -0,0 +1,212 @@
+import os
+import threading
+import time
+from typing import Iterable
+
+import redis
+from celery.signals import (
+    before_task_publish,
+    task_postrun,
+    task_prerun,
+)
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    start_http_server,
+)
+from prometheus_client import multiprocess
+
+# In multiprocess mode unlabeled metrics (the activity buffer ones, for
+# example) open their file in this directory as soon as they are created,
+# whichever process imports this module first. Emptying the directory is up
+# to the launcher (see run.sh), files of live processes may already be there.
+if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+    os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+TASK_QUEUE_LATENCY = Histogram(
+    "celery_task_queue_latency_seconds",
+    "Time between enqueueing a task and the start of its execution.",
+    ["task"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 900),
+)
+TASK_DURATION = Histogram(
+    "celery_task_duration_seconds",
+    "Run time of a task.",
+    ["task"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300),
+)
+TASKS = Counter(
+    "celery_tasks_total",
+    "Finished tasks by final state (success, failure, retry).",
+    ["task", "state"],
+)
+EMAIL_DUPLICATES = Counter(
+    "celery_email_duplicates_total",
+    "Image emails dropped because their idempotency key was taken.",
+)
+QUEUE_DEPTH = Gauge(
+    "celery_queue_depth",
+    "Messages waiting in a broker queue.",
+    ["queue"],
+    multiprocess_mode="livemax",
+)
+PASSWORD_HASH_QUEUE_TIME = Histogram(
+    "password_hash_queue_seconds",
+    "Time a password hash or verification waited for a hashing thread.",
+    ["operation"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+PASSWORD_HASH_DURATION = Histogram(
+    "password_hash_duration_seconds",
+    "Run time of a password hash or verification.",
+    ["operation"],
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 2),
+)
+PASSWORD_REHASHES = Counter(
+    "password_rehashes_total",
+    "Password hashes upgraded to BCRYPT_ROUNDS at login by result "
+    "(updated, skipped, failed).",
+    ["result"],
+)
+AUTH_RATE_LIMITED = Counter(
+    "auth_rate_limited_total",
+    "Login and registration requests rejected by the rate limiter by "
+    "bucket (ip, username).",
+    ["bucket"],
+)
+PRINCIPAL_CACHE_REQUESTS = Counter(
+    "auth_principal_cache_requests_total",
+    "Lookups of the authenticated user cache by result (hit, miss).",
+    ["result"],
+)
+TOKEN_CACHE_REQUESTS = Counter(
+    "auth_token_cache_requests_total",
+    "Lookups of the verified token cache by result (hit, miss).",
+    ["result"],
+)
+ACTIVITY_FLUSH_ROWS = Histogram(
+    "user_activity_flush_rows",
+    "Users written by one flush of the activity buffer.",
+    buckets=(1, 5, 10, 50, 100, 500, 1000, 5000, 10000),
+)
+ACTIVITY_COALESCED = Counter(
+    "user_activity_coalesced_total",
+    "Activity updates absorbed by a newer update of the same user before "
+    "being flushed.",
+)
+ACTIVITY_FLUSH_DURATION = Histogram(
+    "user_activity_flush_duration_seconds",
+    "Run time of a flush of the activity buffer.",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+ACTIVITY_FLUSH_FAILURES = Counter(
+    "user_activity_flush_failures_total",
+    "Flushes of the activity buffer that failed and were retried later.",
+)
+
+# Kombu stores the priorities of a Redis queue in separate lists
+_REDIS_PRIORITY_SEPARATOR = "\x06\x16"
+_REDIS_PRIORITY_STEPS = (3, 6, 9)
+
+_started: dict[str, float] = {}
+
+
+@before_task_publish.connect
+def _stamp_enqueue_time(headers=None, **kwargs):
+    if headers is not None:
+        headers["enqueued_at"] = time.time()
+
+
+@task_prerun.connect
+def _task_started(task_id=None, task=None, **kwargs):
+    _started[task_id] = time.monotonic()
+    enqueued_at = getattr(task.request, "enqueued_at", None)
+    if enqueued_at is not None:
+        TASK_QUEUE_LATENCY.labels(task.name).observe(
+            max(0.0, time.time() - enqueued_at)
+        )
+
+
+@task_postrun.connect
+def _task_finished(task_id=None, task=None, state=None, **kwargs):
+    started = _started.pop(task_id, None)
+    if started is not None:
+        TASK_DURATION.labels(task.name).observe(time.monotonic() - started)
+    TASKS.labels(task.name, (state or "unknown").lower()).inc()
+
+
+def redis_queue_depth(client: redis.Redis, queue: str) -> int:
+    """
+    Counts the messages waiting in a queue of the Redis broker.
+
+    Args:
+        client (redis.Redis): A client of the broker database.
+        queue (str): The queue name.
+
+    Returns:
+        int: The number of messages waiting, over all priorities.
+    """
+    pipe = client.pipeline(transaction=False)
+    pipe.llen(queue)
+    for priority in _REDIS_PRIORITY_STEPS:
+        pipe.llen(f"{queue}{_REDIS_PRIORITY_SEPARATOR}{priority}")
+    return sum(pipe.execute())
+
+
+def _poll_queue_depth(
+    broker_url: str, queues: list[str], interval: float
+) -> None:
+    client = redis.Redis.from_url(broker_url)
+    while True:
+        for queue in queues:
+            try:
+                QUEUE_DEPTH.labels(queue).set(redis_queue_depth(client, queue))
+            except redis.RedisError:
+                pass
+        time.sleep(interval)
+
+
+def mark_process_dead(pid: int) -> None:
+    """
+    Drops the live gauges of an exited pool process in multiprocess mode.
+
+    Args:
+        pid (int): The process ID.
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid)
+
+
+def start_worker_metrics(
+    port: int, broker_url: str, queues: Iterable[str], interval: float
+) -> None:
+    """
+    Serves the metrics of a Celery worker over HTTP and starts polling the
+        depth of its queues.
+
+    With PROMETHEUS_MULTIPROC_DIR set, the metrics of all pool processes are
+        aggregated, otherwise only those of the current process are served.
+
+    Args:
+        port (int): The port of the /metrics endpoint.
+        broker_url (str): The broker URL, queue depth is only polled from
+            a Redis broker.
+        queues (Iterable[str]): The queues consumed by the worker.
+        interval (float): Seconds between two queue depth polls.
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        start_http_server(port, registry=registry)
+    else:
+        start_http_server(port)
+
+    if broker_url.startswith(("redis://", "rediss://")):
+        threading.Thread(
+            target=_poll_queue_depth,
+            args=(broker_url, sorted(queues), interval),
+            name="queue-depth",
+            daemon=True,
+        ).start()
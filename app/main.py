@@ -1,14 +1,50 @@
 from fastapi import FastAPI
+from prometheus_client import make_asgi_app
 
 from app.api import api_router
+from app.auth.rehash import wait_for_rehashes
+from app.auth.revocation import revocation_list
+from app.core.activity import activity_buffer
 from app.core.database import engine, Base
+from app.core.executors import shutdown_executors
+from app.utils.uploads import UploadSizeLimitMiddleware
+from config import BATCH_UPLOAD_MAX_BYTES, UPLOAD_MAX_BYTES
 
 app = FastAPI()
 
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    limits={
+        "/images/optimize-image/": UPLOAD_MAX_BYTES,
+        "/images/jobs": UPLOAD_MAX_BYTES,
+        "/images/variants/": UPLOAD_MAX_BYTES,
+        "/images/optimize-batch/": BATCH_UPLOAD_MAX_BYTES,
+    },
+)
+
 app.include_router(api_router)
+app.mount("/metrics", make_asgi_app())
 
 
 @app.on_event("startup")
 async def init_models():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+
+
+@app.on_event("startup")
+async def start_revocation_refresh():
+    revocation_list.start()
+
+
+@app.on_event("startup")
+async def start_activity_flush():
+    activity_buffer.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_pools():
+    await revocation_list.stop()
+    await activity_buffer.stop()
+    await wait_for_rehashes()
+    shutdown_executors()
@@ -2,3 +2,4 @@ from app.core.database import Base
 from .task_model import Task
 from .user_model import User
 from .category_model import Category
+from .image_model import Images
@@ -1,6 +1,7 @@
 __all__ = ['Images']
 
-from sqlalchemy import Column, String, Integer
+from sqlalchemy import Column, String, Integer, DateTime, JSON
+from sqlalchemy.sql import func
 
 from app.core.database import Base
 
@@ -10,4 +11,21 @@ class Images(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(63), unique=True, index=True)
+    kind = Column(String(15), server_default="cache", index=True)
+    cache_key = Column(String(64), unique=True, index=True)
+    source_hash = Column(String(64), index=True)
+    blob_key = Column(String(64))
+    media_type = Column(String(31))
+    size = Column(Integer)
+    width = Column(Integer)
+    height = Column(Integer)
+    created_at = Column(DateTime, server_default=func.now())
+    last_accessed = Column(DateTime, server_default=func.now(), index=True)
 
+    # Asynchronous optimization jobs
+    status = Column(String(15))
+    source_key = Column(String(64))
+    progress = Column(Integer, server_default="0")
+    error = Column(String)
+    params = Column(JSON)
+    expires_at = Column(DateTime, index=True)
@@ -1,10 +1,24 @@
-from typing import Any, List
+from typing import Any, List, Optional
 
-from sqlalchemy import delete
+from sqlalchemy import UniqueConstraint, delete, insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.sql import Select
 
 
+class UniqueViolationError(Exception):
+    """
+    Raised when an insert conflicts with a unique index or constraint.
+
+    Attributes:
+        columns (tuple[str, ...]): The columns of the violated index.
+    """
+
+    def __init__(self, columns: tuple[str, ...]):
+        super().__init__(f"Duplicate value for {', '.join(columns)}")
+        self.columns = columns
+
+
 class BaseRepository:
     """
     BaseRepository provides common CRUD operations for SQLAlchemy models,
@@ -39,6 +53,39 @@ class BaseRepository:
         response = await self.session.execute(query)
         return response.scalars().all()
 
+    async def get_page(
+        self, limit: int, after: Optional[int] = None
+    ) -> tuple[List, Optional[int]]:
+        """
+        Fetch one page of rows ordered by primary key (keyset pagination).
+
+        The page starts right after the key of the previous one, so the
+            database walks the primary key index from that key instead of
+            skipping rows with OFFSET: every page costs the same however deep
+            it is, and rows inserted or deleted meanwhile do not shift pages.
+
+        Args:
+            limit (int): The maximum number of rows to return.
+            after (int, optional): The primary key of the last row of the
+                previous page, None for the first page.
+
+        Returns:
+            tuple[List, Optional[int]]: The rows of the page, and the key to
+                fetch the next page after, None if this is the last page.
+        """
+        query = (
+            self.model.__table__.select()
+            .order_by(self.model.id)
+            .limit(limit + 1)
+        )
+        if after is not None:
+            query = query.where(self.model.id > after)
+        response = await self.session.execute(query)
+        rows = response.all()
+        if len(rows) > limit:
+            return rows[:limit], rows[limit - 1].id
+        return rows, None
+
     async def create(self, **kwargs) -> Any:
         """
         Create a new instance of the model with the provided keyword arguments.
@@ -54,6 +101,67 @@ class BaseRepository:
         await self.session.commit()
         return instance
 
+    async def insert_returning(self, **kwargs) -> Any:
+        """
+        Inserts a new row in a single INSERT ... RETURNING round trip and
+            commits it, uniqueness is enforced by the database rather than
+            checked beforehand.
+
+        Args:
+            **kwargs: Keyword arguments representing the fields of the model.
+
+        Returns:
+            Any: The created instance of the model, with its generated
+                columns (id, server defaults) loaded.
+
+        Raises:
+            UniqueViolationError: If the row conflicts with a unique index
+                or constraint of the table.
+        """
+        query = insert(self.model).values(**kwargs).returning(self.model)
+        try:
+            response = await self.session.execute(query)
+            instance = response.scalar_one()
+            await self.session.commit()
+        except IntegrityError as error:
+            await self.session.rollback()
+            columns = self._violated_unique_columns(error)
+            if columns is None:
+                raise
+            raise UniqueViolationError(columns) from error
+        return instance
+
+    def _violated_unique_columns(
+        self, error: IntegrityError
+    ) -> Optional[tuple[str, ...]]:
+        table = self.model.__table__
+        uniques = [
+            (index.name, tuple(column.name for column in index.columns))
+            for index in table.indexes
+            if index.unique
+        ]
+        for constraint in table.constraints:
+            if isinstance(constraint, UniqueConstraint):
+                columns = tuple(column.name for column in constraint.columns)
+                # Postgres names unnamed constraints <table>_<columns>_key
+                name = constraint.name or (
+                    f"{table.name}_{'_'.join(columns)}_key"
+                )
+                uniques.append((name, columns))
+
+        # asyncpg reports the constraint name, other drivers only a message
+        constraint_name = getattr(
+            error.orig.__cause__, "constraint_name", None
+        )
+        message = str(error.orig)
+        for name, columns in uniques:
+            if name == constraint_name or f'"{name}"' in message:
+                return columns
+            qualified = ", ".join(f"{table.name}.{c}" for c in columns)
+            if message.endswith(f"UNIQUE constraint failed: {qualified}"):
+                return columns
+        return None
+
     async def exists(self, query: Select) -> bool:
         """
         Checks if instance exists in the database based on the provided query.
@@ -1,3 +1,5 @@
+from typing import List, Optional
+
 from sqlalchemy import update
 from sqlalchemy.sql import select
 
@@ -69,14 +71,23 @@ class CategoryRepository(BaseRepository):
         else:
             return None
 
-    async def get_all_categories(self):
+    async def get_all_categories(
+        self, limit: int, after: Optional[int] = None
+    ) -> tuple[List, Optional[int]]:
         """
-        Fetches all categories from the database.
+        Fetches one page of categories, ordered by ID.
+
+        Args:
+            limit (int): The maximum number of categories to return.
+            after (int, optional): The ID of the last category of the
+                previous page, None for the first page.
 
         Returns:
-            List[Category]: List of all category instances.
+            tuple[List, Optional[int]]: The category rows of the page, and
+                the ID to fetch the next page after, None if this is the
+                last page.
         """
-        return await self.get_all()
+        return await self.get_page(limit, after)
 
     async def update_category(
         self, category_id: int, category_update: CategoryUpdate
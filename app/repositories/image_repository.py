@@ -0,0 +1,159 @@
+import datetime
+from typing import List, Optional
+
+from sqlalchemy import delete, func, select, update
+
+from app.models import Images
+from app.repositories.base_repository import BaseRepository
+
+
+class ImageRepository(BaseRepository):
+    """
+    ImageRepository extends BaseRepository and provides specific methods,
+        for interacting with the 'Images' model.
+
+    Attributes:
+        model (Images): The SQLAlchemy model associated with the repository.
+    """
+
+    model = Images
+
+    async def get_by_cache_key(self, cache_key: str) -> Optional[Images]:
+        """
+        Retrieves a cached image entry by its cache key.
+
+        Args:
+            cache_key (str): The cache key of the entry.
+
+        Returns:
+            Optional[Images]: The entry if found, otherwise None.
+        """
+        query = select(self.model).where(self.model.cache_key == cache_key)
+        return await self.get_one(query)
+
+    async def touch(self, image_id: int) -> None:
+        """
+        Marks an entry as recently used.
+
+        Args:
+            image_id (int): ID of the entry.
+        """
+        query = (
+            update(self.model)
+            .where(self.model.id == image_id)
+            .values(last_accessed=datetime.datetime.utcnow())
+        )
+        await self.session.execute(query)
+        await self.session.commit()
+
+    async def total_size(self) -> int:
+        """
+        Sums the size of all cached entries.
+
+        Returns:
+            int: The total size in bytes.
+        """
+        query = select(func.coalesce(func.sum(self.model.size), 0)).where(
+            self.model.kind == "cache"
+        )
+        response = await self.session.execute(query)
+        return response.scalar()
+
+    async def evict_least_recently_used(self, max_bytes: int) -> List[str]:
+        """
+        Deletes the least recently used entries until the total size of the
+            cache fits into the given budget.
+
+        Args:
+            max_bytes (int): The cache size budget in bytes.
+
+        Returns:
+            List[str]: Blob keys of the deleted entries.
+        """
+        excess = await self.total_size() - max_bytes
+        if excess <= 0:
+            return []
+
+        query = (
+            select(self.model.id, self.model.blob_key, self.model.size)
+            .where(self.model.kind == "cache")
+            .order_by(self.model.last_accessed)
+        )
+        response = await self.session.stream(query)
+
+        evicted_ids, blob_keys = [], []
+        async for image_id, blob_key, size in response:
+            evicted_ids.append(image_id)
+            blob_keys.append(blob_key)
+            excess -= size or 0
+            if excess <= 0:
+                break
+        await response.close()
+
+        await self.session.execute(
+            delete(self.model).where(self.model.id.in_(evicted_ids))
+        )
+        await self.session.commit()
+        return blob_keys
+
+    async def get_image_by_id(self, image_id: int) -> Optional[Images]:
+        """
+        Retrieves an image entry by its ID.
+
+        Args:
+            image_id (int): ID of the entry.
+
+        Returns:
+            Optional[Images]: The entry if found, otherwise None.
+        """
+        query = select(self.model).where(self.model.id == image_id)
+        return await self.get_one(query)
+
+    async def update_image(self, image_id: int, **values) -> None:
+        """
+        Updates the given fields of an image entry.
+
+        Args:
+            image_id (int): ID of the entry.
+            **values: Fields to update.
+        """
+        query = (
+            update(self.model)
+            .where(self.model.id == image_id)
+            .values(**values)
+        )
+        await self.session.execute(query)
+        await self.session.commit()
+
+    async def delete_expired_jobs(self, now: datetime.datetime) -> List[str]:
+        """
+        Deletes job entries whose results have expired.
+
+        Args:
+            now (datetime.datetime): The current time.
+
+        Returns:
+            List[str]: Blob keys still referenced by the deleted entries,
+                results and the sources of jobs that never started or
+                failed without releasing them.
+        """
+        query = (
+            delete(self.model)
+            .where(self.model.kind == "job", self.model.expires_at < now)
+            .returning(
+                self.model.blob_key, self.model.source_key, self.model.status
+            )
+        )
+        response = await self.session.execute(query)
+        deleted = response.all()
+        await self.session.commit()
+
+        blob_keys = []
+        for blob_key, source_key, status in deleted:
+            if blob_key:
+                blob_keys.append(blob_key)
+            if source_key and status in ("pending", "failed"):
+                # Running jobs release their source themselves, failed ones
+                # clear source_key once they did
+                blob_keys.append(source_key)
+        return blob_keys
@@ -20,21 +20,28 @@ class TaskRepository(BaseRepository):
         model (Task): The SQLAlchemy model associated with the repository.
 
     Methods:
-        - async def get_all_tasks(self) -> List[TaskResponse]:
+        - async def get_all_tasks(self, limit, after) -> tuple[List, int]:
     """
 
     model = Task
 
-    async def get_all_tasks(self) -> List[TaskResponse]:
+    async def get_all_tasks(
+        self, limit: int, after: Optional[int] = None
+    ) -> tuple[List[TaskResponse], Optional[int]]:
         """
-        Fetches all tasks from the database and returns them as a list
-            of TaskResponse objects.
+        Fetches one page of tasks, ordered by ID, as TaskResponse objects.
+
+        Args:
+            limit (int): The maximum number of tasks to return.
+            after (int, optional): The ID of the last task of the previous
+                page, None for the first page.
 
         Returns:
-            List[TaskResponse]: List of TaskResponse objects representing,
-                the tasks.
+            tuple[List[TaskResponse], Optional[int]]: The tasks of the page,
+                and the ID to fetch the next page after, None if this is
+                the last page.
         """
-        tasks = await self.get_all()
+        tasks, next_after = await self.get_page(limit, after)
         return [
             TaskResponse(
                 id=task.id,
@@ -45,7 +52,7 @@ class TaskRepository(BaseRepository):
                 user_id=task.user_id,
             )
             for task in tasks
-        ]
+        ], next_after
 
     async def create_task(
         self,
@@ -1,6 +1,15 @@
 import datetime
-
-from sqlalchemy import update
+from typing import Iterable, Optional
+
+from sqlalchemy import (
+    DateTime,
+    Integer,
+    cast,
+    column,
+    func,
+    update,
+    values,
+)
 
 from app.models import User
 from app.repositories.base_repository import BaseRepository
@@ -45,6 +54,22 @@ class UserRepository(BaseRepository):
         )
         return await self.get_one(query)
 
+    async def create_user(self, **kwargs) -> User:
+        """
+        Creates a user in a single round trip.
+
+        Args:
+            **kwargs: The fields of the user.
+
+        Returns:
+            User: The created user, with its id and server defaults.
+
+        Raises:
+            UniqueViolationError: If the username or the email is taken,
+                its columns name the conflicting field.
+        """
+        return await self.insert_returning(**kwargs)
+
     async def exists_by_username(self, username: str) -> bool:
         """
         Checks if a user with the specified username exists in the database.
@@ -149,6 +174,79 @@ class UserRepository(BaseRepository):
         await self.session.execute(query)
         await self.session.commit()
 
+    async def update_activity(
+        self,
+        rows: Iterable[
+            tuple[
+                int, Optional[datetime.datetime], Optional[datetime.datetime]
+            ]
+        ],
+    ) -> None:
+        """
+        Writes the last login and last request timestamps of many users in
+            a single UPDATE ... FROM (VALUES ...) statement.
+
+        Args:
+            rows (Iterable[tuple]): (user_id, last_login, last_request)
+                tuples, a None timestamp leaves the column unchanged.
+        """
+        rows = list(rows)
+        if not rows:
+            return
+        activity = values(
+            column("id", Integer),
+            column("last_login", DateTime),
+            column("last_request", DateTime),
+            name="activity",
+        ).data(rows)
+        query = (
+            update(self.model)
+            .where(self.model.id == activity.c.id)
+            .values(
+                # A column of NULLs only would be typed as text by Postgres
+                last_login=func.coalesce(
+                    cast(activity.c.last_login, DateTime),
+                    self.model.last_login,
+                ),
+                last_request=func.coalesce(
+                    cast(activity.c.last_request, DateTime),
+                    self.model.last_request,
+                ),
+            )
+            # The timestamps are not part of the cached principal
+            .execution_options(
+                synchronize_session=False, invalidate_principals=False
+            )
+        )
+        await self.session.execute(query)
+        await self.session.commit()
+
+    async def replace_password_hash(
+        self, user_id: int, old_hash: str, new_hash: str
+    ) -> bool:
+        """
+        Replaces the password hash of a user, unless it was changed since
+            old_hash was read.
+
+        Args:
+            user_id (int): ID of the user.
+            old_hash (str): The hash the new one was computed from.
+            new_hash (str): The new hash of the same password.
+
+        Returns:
+            bool: True if the hash was replaced.
+        """
+        query = (
+            update(self.model)
+            .where(self.model.id == user_id)
+            .where(self.model.hashed_password == old_hash)
+            .values(hashed_password=new_hash)
+            .execution_options(synchronize_session=False)
+        )
+        response = await self.session.execute(query)
+        await self.session.commit()
+        return response.rowcount > 0
+
     async def get_last_request(self, user_id: int):
         """
         Retrieves the last request timestamp for a user by their ID.
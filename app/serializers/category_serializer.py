@@ -25,6 +25,7 @@ class CategoryResponse(BaseModel):
 
 class CategoryList(BaseModel):
     categories: List[CategoryResponse]
+    next_cursor: Optional[str] = None
 
     class Config:
         orm_mode = True
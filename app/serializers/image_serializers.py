@@ -1,4 +1,7 @@
-from pydantic import BaseModel
+import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, ConfigDict
 
 
 class ImageCreate(BaseModel):
@@ -8,3 +11,31 @@ class ImageCreate(BaseModel):
 class ImageResponse(BaseModel):
     id: int
     name: str
+
+
+class ImageJobResponse(BaseModel):
+    id: int
+    status: str
+    progress: int
+    error: Optional[str] = None
+    media_type: Optional[str] = None
+    size: Optional[int] = None
+    expires_at: datetime.datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ImageVariantResponse(BaseModel):
+    id: int
+    width: int
+    height: int
+    media_type: str
+    size: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ImageVariantList(BaseModel):
+    variants: List[ImageVariantResponse]
+
+    model_config = ConfigDict(from_attributes=True)
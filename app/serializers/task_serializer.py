@@ -31,6 +31,7 @@ class TaskResponse(BaseModel):
 
 class TaskList(BaseModel):
     tasks: list[TaskResponse]
+    next_cursor: Optional[str] = None
 
     class Config:
         orm_mode = True
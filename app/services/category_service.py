@@ -1,3 +1,5 @@
+from typing import Optional
+
 from app.repositories.category_repository import CategoryRepository
 from app.serializers.category_serializer import (
     CategoryCreate,
@@ -6,6 +8,7 @@ from app.serializers.category_serializer import (
     CategoryDelete,
     CategoryResponse,
 )
+from app.utils.pagination import decode_cursor, encode_cursor
 
 
 class CategoryService:
@@ -70,19 +73,30 @@ class CategoryService:
         """
         return await self.category_repo.get_category_by_id(category_id)
 
-    async def get_all_categories(self) -> CategoryList:
+    async def get_all_categories(
+        self, limit: int, cursor: Optional[str] = None
+    ) -> CategoryList:
         """
-        Get a list of all categories.
+        Get a page of categories.
+
+        Args:
+            limit (int): The maximum number of categories to return.
+            cursor (str, optional): The next_cursor of the previous page,
+                None for the first page.
 
         Returns:
-            CategoryList: The list of categories.
+            CategoryList: The categories of the page and the cursor of the
+                next one.
         """
-        categories = await self.category_repo.get_all_categories()
+        categories, next_after = await self.category_repo.get_all_categories(
+            limit, decode_cursor(cursor)
+        )
         return CategoryList(
             categories=[
                 CategoryResponse(id=cat.id, name=cat.name)
                 for cat in categories
-            ]
+            ],
+            next_cursor=encode_cursor(next_after),
         )
 
     async def update_category(
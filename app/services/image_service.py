@@ -0,0 +1,500 @@
+import asyncio
+import datetime
+import hashlib
+import json
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+    Optional,
+    Sequence,
+)
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError
+
+from app.core.executors import run_in_image_executor
+from app.models import Images
+from app.repositories.image_repository import ImageRepository
+from app.utils.blob_spool import BlobSpool
+from app.utils.image_processing import (
+    MEDIA_TYPES,
+    EncodeResult,
+    ImageSource,
+    encode_variants,
+    optimize,
+)
+from app.utils.uploads import IngestedUpload
+from config import (
+    IMAGE_CACHE_DIR,
+    IMAGE_CACHE_MAX_BYTES,
+    IMAGE_JOB_TTL_SECONDS,
+    IMAGE_PROCESS_WORKERS,
+)
+
+image_cache = BlobSpool(IMAGE_CACHE_DIR)
+
+_FORMATS_BY_MEDIA_TYPE = {value: key for key, value in MEDIA_TYPES.items()}
+
+
+def make_cache_key(source_hash: str, **params) -> str:
+    """
+    Builds the cache key of an optimized image.
+
+    Args:
+        source_hash (str): SHA-256 of the uploaded bytes.
+        **params: Every parameter that influences the encoded output.
+
+    Returns:
+        str: The hex SHA-256 cache key.
+    """
+    encoded_params = json.dumps(params, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(
+        f"{source_hash}:{encoded_params}".encode()
+    ).hexdigest()
+
+
+def _hash_file(path: str) -> str:
+    with open(path, "rb") as file:
+        return hashlib.file_digest(file, "sha256").hexdigest()
+
+
+def _read_blob(key: str) -> bytes:
+    with image_cache.open(key) as blob:
+        return bytes(blob)
+
+
+class ImageService:
+    """
+    Service class for image optimization.
+
+    Decoding and encoding are CPU-bound, so they are executed in the image
+        process pool and awaited, keeping the event loop free for other
+        requests. Results are cached on disk by upload hash and encoding
+        parameters, so repeated uploads skip Pillow entirely.
+
+    Attributes:
+        image_repo (ImageRepository | None): The repository indexing cached
+            images, or None to disable caching.
+    """
+
+    def __init__(self, image_repo: Optional[ImageRepository] = None):
+        """
+        Initialize the ImageService.
+
+        Args:
+            image_repo (ImageRepository, optional): The repository indexing
+                cached images. Caching is disabled when it is omitted.
+        """
+        self.image_repo = image_repo
+        # The session is shared by concurrent optimizations of a batch
+        self._db_lock = asyncio.Lock()
+
+    async def optimize_image(
+        self,
+        data: ImageSource,
+        quality: int,
+        max_bytes: Optional[int] = None,
+        min_psnr: Optional[float] = None,
+        formats: Sequence[str] = ("JPEG",),
+        max_width: Optional[int] = None,
+        max_height: Optional[int] = None,
+        fit: str = "contain",
+        source_hash: Optional[str] = None,
+    ) -> EncodeResult:
+        """
+        Optimizes an uploaded image, serving it from the cache when the same
+            upload was already optimized with the same parameters.
+
+        Without a target, the image is encoded at the given quality. With
+            max_bytes and/or min_psnr, the encoder quality is searched to
+            meet the target and the quality argument is ignored.
+
+        Args:
+            data (ImageSource): The raw uploaded image or the path of its
+                file. Files are memory-mapped by the image worker.
+            quality (int): Encoder quality for the fixed-quality mode.
+            max_bytes (int, optional): Maximum size of the output in bytes.
+            min_psnr (float, optional): Minimum PSNR of the output in dB.
+            formats (Sequence[str], optional): Candidate output formats,
+                the smallest suitable output wins.
+            max_width (int, optional): Maximum width of the output.
+            max_height (int, optional): Maximum height of the output.
+            fit (str, optional): How the image is fitted into the bounds,
+                "contain" or "cover".
+            source_hash (str, optional): SHA-256 of the upload if already
+                known, computed otherwise.
+
+        Returns:
+            EncodeResult: The optimized image.
+
+        Raises:
+            ValueError: If the target cannot be met.
+        """
+        params = {
+            "quality": quality,
+            "max_bytes": max_bytes,
+            "min_psnr": min_psnr,
+            "formats": tuple(formats),
+            "max_width": max_width,
+            "max_height": max_height,
+            "fit": fit,
+        }
+        if self.image_repo is None:
+            return await run_in_image_executor(optimize, data, **params)
+
+        if source_hash is None:
+            source_hash = await self._hash_source(data)
+        cache_key = self._cache_key(source_hash, **params)
+
+        async with self._db_lock:
+            cached = await self._get_cached(cache_key)
+        if cached is not None:
+            return cached
+
+        result = await run_in_image_executor(optimize, data, **params)
+        async with self._db_lock:
+            await self._store(cache_key, source_hash, result)
+        return result
+
+    async def generate_variants(
+        self,
+        data: ImageSource,
+        widths: Sequence[int],
+        formats: Sequence[str] = ("JPEG",),
+        quality: int = 50,
+        source_hash: Optional[str] = None,
+    ) -> list[Images]:
+        """
+        Generates and stores responsive variants of an image.
+
+        Missing variants are produced from a single decode of the source.
+            Each variant is cached under the same key as optimize_image()
+            with max_width=width and a single format, so later requests for
+            any of these sizes are cache hits.
+
+        Args:
+            data (ImageSource): The raw uploaded image or the path of its
+                file.
+            widths (Sequence[int]): The widths to generate.
+            formats (Sequence[str], optional): The formats of each width.
+            quality (int, optional): Encoder quality.
+            source_hash (str, optional): SHA-256 of the upload if already
+                known, computed otherwise.
+
+        Returns:
+            list[Images]: The stored variants, largest first.
+        """
+        if source_hash is None:
+            source_hash = await self._hash_source(data)
+
+        widths = sorted(set(widths), reverse=True)
+        keys = {
+            (width, image_format): self._cache_key(
+                source_hash,
+                quality=quality,
+                max_bytes=None,
+                min_psnr=None,
+                formats=(image_format,),
+                max_width=width,
+                max_height=None,
+                fit="contain",
+            )
+            for width in widths
+            for image_format in formats
+        }
+
+        variants = {}
+        async with self._db_lock:
+            for variant, cache_key in keys.items():
+                entry = await self.image_repo.get_by_cache_key(cache_key)
+                if entry is not None:
+                    variants[variant] = entry
+
+        missing_widths = sorted(
+            {width for width, _ in keys.keys() - variants.keys()}
+        )
+        if missing_widths:
+            results = await run_in_image_executor(
+                encode_variants, data, missing_widths, tuple(formats), quality
+            )
+            # Results are ordered by descending width, then by format
+            requested = [
+                (width, image_format)
+                for width in sorted(missing_widths, reverse=True)
+                for image_format in formats
+            ]
+            async with self._db_lock:
+                for variant, result in zip(requested, results):
+                    if variant not in variants:
+                        variants[variant] = await self._store(
+                            keys[variant], source_hash, result
+                        )
+
+        return [variants[variant] for variant in keys]
+
+    async def optimize_many(
+        self,
+        sources: Iterable[tuple[str, Callable[[], Awaitable[bytes]]]],
+        **params,
+    ) -> AsyncIterator[tuple[str, EncodeResult | Exception]]:
+        """
+        Optimizes many images concurrently, yielding each one as soon as it
+            is ready.
+
+        Sources are read lazily, so only about two images per image worker
+            are held in memory at a time.
+
+        Args:
+            sources (Iterable[tuple[str, Callable]]): Pairs of an image name
+                and a coroutine function returning the raw image.
+            **params: Keyword arguments passed to optimize_image().
+
+        Yields:
+            tuple[str, EncodeResult | Exception]: The image name and its
+                optimized image, or the error that prevented it.
+        """
+        semaphore = asyncio.Semaphore(max(IMAGE_PROCESS_WORKERS, 1) * 2)
+
+        async def run(name, read):
+            async with semaphore:
+                try:
+                    return name, await self.optimize_image(
+                        await read(), **params
+                    )
+                except Exception as e:
+                    return name, e
+
+        tasks = [
+            asyncio.create_task(run(name, read)) for name, read in sources
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    @staticmethod
+    async def _hash_source(data: ImageSource) -> str:
+        if isinstance(data, bytes):
+            return hashlib.sha256(data).hexdigest()
+        return await run_in_threadpool(_hash_file, data)
+
+    @staticmethod
+    def _cache_key(source_hash: str, **params) -> str:
+        key_params = {**params, "formats": sorted(params["formats"])}
+        if params["max_bytes"] is not None or params["min_psnr"] is not None:
+            # The fixed quality does not influence target-driven encoding
+            key_params["quality"] = None
+        return make_cache_key(source_hash, **key_params)
+
+    async def _get_cached(self, cache_key: str) -> Optional[EncodeResult]:
+        """
+        Reads a cached image.
+
+        Args:
+            cache_key (str): The cache key of the image.
+
+        Returns:
+            Optional[EncodeResult]: The cached image, or None on a cache miss.
+        """
+        entry = await self.image_repo.get_by_cache_key(cache_key)
+        if entry is None:
+            return None
+
+        try:
+            data = await run_in_threadpool(_read_blob, entry.blob_key)
+        except FileNotFoundError:
+            # The blob is gone (evicted concurrently), drop the stale row
+            await self.image_repo.delete(entry.id)
+            return None
+
+        await self.image_repo.touch(entry.id)
+        return EncodeResult(
+            data,
+            _FORMATS_BY_MEDIA_TYPE[entry.media_type],
+            width=entry.width,
+            height=entry.height,
+        )
+
+    async def _store(
+        self, cache_key: str, source_hash: str, result: EncodeResult
+    ) -> Images:
+        """
+        Stores an optimized image in the cache and evicts the least recently
+            used entries if the cache grew over its budget.
+
+        Args:
+            cache_key (str): The cache key of the image.
+            source_hash (str): SHA-256 of the uploaded bytes.
+            result (EncodeResult): The optimized image.
+
+        Returns:
+            Images: The cache entry of the image.
+        """
+        blob_key = await run_in_threadpool(image_cache.put, result.data)
+        entry = Images(
+            cache_key=cache_key,
+            source_hash=source_hash,
+            blob_key=blob_key,
+            media_type=result.media_type,
+            size=len(result.data),
+            width=result.width,
+            height=result.height,
+        )
+        try:
+            await self.image_repo.save(entry)
+        except IntegrityError:
+            # A concurrent request cached the same image first
+            await self.image_repo.session.rollback()
+            await run_in_threadpool(image_cache.release, blob_key)
+            return await self.image_repo.get_by_cache_key(cache_key)
+
+        evicted = await self.image_repo.evict_least_recently_used(
+            IMAGE_CACHE_MAX_BYTES
+        )
+        for key in evicted:
+            await run_in_threadpool(image_cache.release, key)
+        return entry
+
+    async def create_job(self, upload: IngestedUpload, **params) -> Images:
+        """
+        Registers an asynchronous optimization job. The upload is stored in
+            the image spool until a worker has processed it.
+
+        Args:
+            upload (IngestedUpload): The uploaded image, spilled uploads are
+                moved into the spool without being read.
+            **params: Keyword arguments for optimize_image().
+
+        Returns:
+            Images: The pending job entry.
+        """
+        if upload.path is None:
+            source_key = await run_in_threadpool(image_cache.put, upload.data)
+        else:
+            source_key = await run_in_threadpool(
+                image_cache.put_file, upload.path, upload.sha256
+            )
+            upload.path = None
+        job = Images(
+            kind="job",
+            status="pending",
+            progress=0,
+            source_hash=upload.sha256,
+            source_key=source_key,
+            params=params,
+            expires_at=datetime.datetime.utcnow()
+            + datetime.timedelta(seconds=IMAGE_JOB_TTL_SECONDS),
+        )
+        await self.image_repo.save(job)
+        return job
+
+    async def get_job(self, job_id: int) -> Optional[Images]:
+        """
+        Get an asynchronous optimization job by ID.
+
+        Args:
+            job_id (int): The ID of the job.
+
+        Returns:
+            Optional[Images]: The job entry, or None if it does not exist
+                or has expired.
+        """
+        job = await self.image_repo.get_image_by_id(job_id)
+        if (
+            job is None
+            or job.kind != "job"
+            or job.expires_at < datetime.datetime.utcnow()
+        ):
+            return None
+        return job
+
+    async def get_variant(self, image_id: int) -> Optional[Images]:
+        """
+        Get a stored image variant by ID.
+
+        Args:
+            image_id (int): The ID of the variant.
+
+        Returns:
+            Optional[Images]: The variant entry, or None if it does not
+                exist (or was evicted from the cache).
+        """
+        entry = await self.image_repo.get_image_by_id(image_id)
+        if entry is None or entry.kind != "cache":
+            return None
+        return entry
+
+    async def read_image(self, entry: Images) -> bytes:
+        """
+        Reads the stored image of a cache entry or of a finished job.
+
+        Args:
+            entry (Images): The cache entry or finished job.
+
+        Returns:
+            bytes: The stored image.
+        """
+        return await run_in_threadpool(_read_blob, entry.blob_key)
+
+    async def run_job(self, job_id: int) -> None:
+        """
+        Processes a pending job. Called by the Celery worker.
+
+        Args:
+            job_id (int): The ID of the job.
+        """
+        job = await self.image_repo.get_image_by_id(job_id)
+        if job is None or job.status != "pending":
+            return
+
+        # The rollback below expires the job, it cannot be read afterwards
+        source_key, source_hash, params = (
+            job.source_key,
+            job.source_hash,
+            job.params,
+        )
+        await self.image_repo.update_image(
+            job_id, status="processing", progress=10
+        )
+        try:
+            data = await run_in_threadpool(_read_blob, source_key)
+            await self.image_repo.update_image(job_id, progress=30)
+
+            result = await self.optimize_image(
+                data, **params, source_hash=source_hash
+            )
+            blob_key = await run_in_threadpool(image_cache.put, result.data)
+            await self.image_repo.update_image(
+                job_id,
+                status="done",
+                progress=100,
+                blob_key=blob_key,
+                media_type=result.media_type,
+                size=len(result.data),
+            )
+        except Exception as e:
+            await self.image_repo.session.rollback()
+            # The source is released below, not again when the job expires
+            await self.image_repo.update_image(
+                job_id, status="failed", error=str(e), source_key=None
+            )
+        finally:
+            await run_in_threadpool(image_cache.release, source_key)
+
+    async def purge_expired_jobs(self) -> int:
+        """
+        Deletes expired jobs together with their stored images.
+
+        Returns:
+            int: The number of released blobs.
+        """
+        blob_keys = await self.image_repo.delete_expired_jobs(
+            datetime.datetime.utcnow()
+        )
+        for key in blob_keys:
+            await run_in_threadpool(image_cache.release, key)
+        return len(blob_keys)
@@ -1,10 +1,14 @@
+from typing import Optional
+
 from app.models import Task
 from app.repositories.task_repository import TaskRepository
 from app.serializers.task_serializer import (
+    TaskList,
     TaskResponse,
     TaskUpdate,
     TaskDelete,
 )
+from app.utils.pagination import decode_cursor, encode_cursor
 
 
 class TaskService:
@@ -27,15 +31,24 @@ class TaskService:
         """
         self.task_repo = task_repo
 
-    async def get_all_tasks(self) -> list[TaskResponse]:
+    async def get_all_tasks(
+        self, limit: int, cursor: Optional[str] = None
+    ) -> TaskList:
         """
-        Get a list of all tasks.
+        Get a page of tasks.
+
+        Args:
+            limit (int): The maximum number of tasks to return.
+            cursor (str, optional): The next_cursor of the previous page,
+                None for the first page.
 
         Returns:
-            List[TaskResponse]: The list of tasks.
+            TaskList: The tasks of the page and the cursor of the next one.
         """
-        tasks = await self.task_repo.get_all_tasks()
-        return tasks
+        tasks, next_after = await self.task_repo.get_all_tasks(
+            limit, decode_cursor(cursor)
+        )
+        return TaskList(tasks=tasks, next_cursor=encode_cursor(next_after))
 
     async def create_task(
         self,
@@ -1,10 +1,18 @@
 from fastapi import HTTPException
 
-from app.auth.security import verify_password, create_jwt_token
+from app.auth.rehash import needs_rehash, schedule_rehash
+from app.auth.revocation import revocation_list
+from app.core.activity import activity_buffer
+from app.auth.security import (
+    hash_password,
+    verify_password,
+    create_jwt_token,
+)
 from app.models.user_model import User
+from app.repositories.base_repository import UniqueViolationError
 from app.repositories.user_repository import UserRepository
 from app.serializers.user_serializer import UserCreate, UserResponse
-from config import password_context
+from config import AUTH_STATELESS_TOKENS
 
 
 class UserService:
@@ -26,7 +34,9 @@ class UserService:
 
     async def register_user(self, user_data: UserCreate) -> UserResponse:
         """
-        Registers a new user with the provided data.
+        Registers a new user with the provided data, in a single INSERT.
+            Uniqueness of the username and the email is enforced by the
+            database, so concurrent sign-ups cannot both succeed.
 
         Args:
             user_data (UserCreate): The data for creating the new user.
@@ -39,28 +49,27 @@ class UserService:
             HTTPException: If a user with the same username or email already
                 exists.
         """
-        if await self.user_repo.exists_by_username(user_data.username):
-            raise HTTPException(
-                detail="User with this username already exists",
-                status_code=400,
-            )
-
-        if await self.user_repo.exists_by_email(user_data.email):
-            raise HTTPException(
-                detail="User with this email already exists",
-                status_code=400,
+        hashed_password = await hash_password(user_data.password)
+
+        try:
+            new_user = await self.user_repo.create_user(
+                username=user_data.username,
+                full_name=user_data.full_name,
+                email=user_data.email,
+                hashed_password=hashed_password,
             )
-
-        hashed_password = password_context.hash(user_data.password)
-
-        new_user = User(
-            username=user_data.username,
-            full_name=user_data.full_name,
-            email=user_data.email,
-            hashed_password=hashed_password,
-        )
-
-        await self.user_repo.save(new_user)
+        except UniqueViolationError as error:
+            # The database reports a single violated index. A taken username
+            # takes precedence over a taken email, as it always did, so an
+            # email conflict is only reported once the username is known
+            # to be free (one extra query, on the failure path only).
+            if "username" in error.columns or (
+                await self.user_repo.exists_by_username(user_data.username)
+            ):
+                detail = "User with this username already exists"
+            else:
+                detail = "User with this email already exists"
+            raise HTTPException(detail=detail, status_code=400)
 
         return UserResponse(
             id=new_user.id,
@@ -73,6 +82,9 @@ class UserService:
         """
         Authenticates a user during login and generates an access token.
 
+        A password hashed with another cost than BCRYPT_ROUNDS is rehashed
+            in the background.
+
         Args:
             username (str): The username of the user trying to log in.
             password (str): The password provided by the user.
@@ -81,7 +93,8 @@ class UserService:
             str: The JWT access token if login is successful.
 
         Raises:
-            HTTPException: If the username or password is incorrect.
+            HTTPException: If the username or password is incorrect, or the
+                user is disabled.
         """
         user = await self.user_repo.get_user_by_username(username)
         if not user or not await verify_password(
@@ -92,12 +105,82 @@ class UserService:
                 detail="Incorrect username or password",
             )
 
-        await self.user_repo.update_last_login(user)
-        await self.user_repo.update_last_request(user)
+        if revocation_list.is_user_disabled(user.username):
+            raise HTTPException(status_code=403, detail="User is disabled")
+
+        if needs_rehash(user.hashed_password):
+            schedule_rehash(user.id, user.hashed_password, password)
+
+        activity_buffer.record_login(user.id)
 
-        access_token = await create_jwt_token({"sub": user.username})
+        claims = {"sub": user.username}
+        if AUTH_STATELESS_TOKENS:
+            claims.update({"uid": user.id, "is_admin": bool(user.is_admin)})
+        access_token = await create_jwt_token(claims)
         return access_token
 
+    async def logout_user(self, claims: dict) -> None:
+        """
+        Revokes the token of the current request until it expires.
+
+        Args:
+            claims (dict): The verified claims of the token.
+
+        Raises:
+            HTTPException: If the token cannot be revoked on its own (issued
+                before tokens had a "jti" claim).
+        """
+        if "jti" not in claims:
+            raise HTTPException(
+                status_code=400,
+                detail="Token cannot be revoked, log in again",
+            )
+        await revocation_list.revoke_token(claims)
+
+    async def set_user_disabled(
+        self, current_user: User, username: str, disabled: bool
+    ) -> None:
+        """
+        Disables a user, revoking all of their tokens, or enables them again.
+
+        Args:
+            current_user (User): The user making the request, must be an
+                admin.
+            username (str): The username of the user to disable or enable.
+            disabled (bool): True to disable the user, False to enable them.
+
+        Raises:
+            HTTPException: If the current user is not an admin.
+        """
+        if not current_user.is_admin:
+            raise HTTPException(status_code=403, detail="Not enough rights")
+        if disabled:
+            await revocation_list.disable_user(username)
+        else:
+            await revocation_list.enable_user(username)
+
+    async def get_profile(self, user: User) -> UserResponse:
+        """
+        Builds the profile of a user, with the activity timestamps not
+            flushed to the database yet.
+
+        Args:
+            user (User): The user, as loaded from the database.
+
+        Returns:
+            UserResponse: The profile of the user.
+        """
+        last_login, last_request = activity_buffer.pending(user.id)
+        return UserResponse(
+            id=user.id,
+            username=user.username,
+            full_name=user.full_name,
+            email=user.email,
+            created_at=user.created_at,
+            last_login=last_login or user.last_login,
+            last_request=last_request or user.last_request,
+        )
+
     async def get_last_login(self, user_id: int):
         """
         Retrieves the timestamp of the last login for the specified user.
@@ -112,7 +195,8 @@ class UserService:
             HTTPException: If the user specified by user_id is not found.
         """
         last_login = await self.user_repo.get_last_login(user_id)
-        return last_login
+        pending, _ = activity_buffer.pending(user_id)
+        return pending or last_login
 
     async def get_last_request(self, user_id: int):
         """
@@ -128,4 +212,5 @@ class UserService:
             HTTPException: If the user specified by user_id is not found.
         """
         last_request = await self.user_repo.get_last_request(user_id)
-        return last_request
+        _, pending = activity_buffer.pending(user_id)
+        return pending or last_request
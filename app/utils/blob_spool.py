@@ -0,0 +1,182 @@
+import hashlib
+import mmap
+import os
+import re
+import shutil
+import tempfile
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+_KEY_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+class BlobSpool:
+    """
+    Content-addressed blob storage on a local (or shared) directory.
+
+    Blobs are keyed by the SHA-256 of their content, so a key can be handed
+        to another process (for example a Celery worker) instead of the bytes
+        themselves.
+
+    Every put() adds a reference to the blob and every release() drops one.
+        References are hard links to a single file, so identical content is
+        stored once and the data is freed by the filesystem when the last
+        reference is released, without any locking between processes.
+
+    Attributes:
+        root (Path): The directory the blobs are stored in.
+    """
+
+    def __init__(self, root: str | os.PathLike):
+        """
+        Initializes the spool and creates its directory if needed.
+
+        Args:
+            root (str | os.PathLike): The directory to store blobs in.
+        """
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key_for(data: bytes) -> str:
+        """
+        Computes the key a blob would be stored under.
+
+        Args:
+            data (bytes): The blob content.
+
+        Returns:
+            str: The hex SHA-256 digest of the content.
+        """
+        return hashlib.sha256(data).hexdigest()
+
+    def _shard(self, key: str) -> Path:
+        if not _KEY_PATTERN.match(key):
+            raise ValueError(f"Invalid blob key: {key!r}")
+        return self.root / key[:2]
+
+    def _references(self, key: str) -> list[Path]:
+        return sorted(self._shard(key).glob(f"{key}.*"))
+
+    def put(self, data: bytes) -> str:
+        """
+        Stores a blob (or adds a reference to an identical one) and returns
+            its key.
+
+        Args:
+            data (bytes): The blob content.
+
+        Returns:
+            str: The key of the stored blob.
+        """
+        key = self.key_for(data)
+        shard = self._shard(key)
+        shard.mkdir(exist_ok=True)
+        reference = shard / f"{key}.{uuid.uuid4().hex}"
+
+        for existing in self._references(key):
+            try:
+                os.link(existing, reference)
+                return key
+            except FileNotFoundError:
+                continue
+
+        fd, tmp_path = tempfile.mkstemp(dir=shard, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                tmp.write(data)
+            os.replace(tmp_path, reference)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return key
+
+    def put_file(self, path: str | os.PathLike, key: str) -> str:
+        """
+        Moves a file into the spool (or drops it in favour of an identical
+            stored blob), without reading it into memory.
+
+        Args:
+            path (str | os.PathLike): The file to move, it is consumed.
+            key (str): The SHA-256 of the file content.
+
+        Returns:
+            str: The key of the stored blob.
+        """
+        shard = self._shard(key)
+        shard.mkdir(exist_ok=True)
+        reference = shard / f"{key}.{uuid.uuid4().hex}"
+
+        for existing in self._references(key):
+            try:
+                os.link(existing, reference)
+                os.unlink(path)
+                return key
+            except FileNotFoundError:
+                continue
+
+        try:
+            os.replace(path, reference)
+        except OSError:
+            # Different filesystem, copy into the spool then drop the file
+            fd, tmp_path = tempfile.mkstemp(dir=shard, prefix=".tmp-")
+            os.close(fd)
+            shutil.copyfile(path, tmp_path)
+            os.replace(tmp_path, reference)
+            os.unlink(path)
+        return key
+
+    @contextmanager
+    def open(self, key: str) -> Iterator[mmap.mmap]:
+        """
+        Memory-maps a stored blob for reading.
+
+        Args:
+            key (str): The blob key.
+
+        Yields:
+            mmap.mmap: A read-only memory map of the blob.
+
+        Raises:
+            FileNotFoundError: If no blob is stored under the key.
+        """
+        for reference in self._references(key):
+            try:
+                file = open(reference, "rb")
+            except FileNotFoundError:
+                continue
+            with file, mmap.mmap(
+                file.fileno(), 0, access=mmap.ACCESS_READ
+            ) as mm:
+                yield mm
+            return
+        raise FileNotFoundError(f"Blob {key} not found")
+
+    def exists(self, key: str) -> bool:
+        """
+        Checks whether a blob is stored under the key.
+
+        Args:
+            key (str): The blob key.
+
+        Returns:
+            bool: True if the blob exists, False otherwise.
+        """
+        return bool(self._references(key))
+
+    def release(self, key: str) -> None:
+        """
+        Drops one reference to a blob. The content is removed together with
+            its last reference.
+
+        Args:
+            key (str): The blob key.
+        """
+        for reference in self._references(key):
+            try:
+                reference.unlink()
+                return
+            except FileNotFoundError:
+                continue
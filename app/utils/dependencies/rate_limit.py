@@ -0,0 +1,106 @@
+import math
+
+from fastapi import Depends, HTTPException, Request
+from fastapi.security import OAuth2PasswordRequestForm
+
+from app.core.metrics import AUTH_RATE_LIMITED
+from app.serializers.user_serializer import UserCreate
+from app.utils.rate_limit import MemoryTokenBucket, RedisTokenBucket
+from config import (
+    AUTH_RATE_LIMIT_BACKEND,
+    AUTH_RATE_LIMIT_IP_BURST,
+    AUTH_RATE_LIMIT_IP_RATE,
+    AUTH_RATE_LIMIT_REDIS_URL,
+    AUTH_RATE_LIMIT_USERNAME_BURST,
+    AUTH_RATE_LIMIT_USERNAME_RATE,
+    AUTH_TRUSTED_PROXY_HOPS,
+)
+
+
+def _make_limiter(name: str, rate: float, burst: int):
+    if AUTH_RATE_LIMIT_BACKEND == "off":
+        return None
+    if AUTH_RATE_LIMIT_BACKEND == "redis":
+        return RedisTokenBucket(
+            AUTH_RATE_LIMIT_REDIS_URL, f"auth:rate:{name}", rate, burst
+        )
+    return MemoryTokenBucket(rate, burst)
+
+
+ip_limiter = _make_limiter(
+    "ip", AUTH_RATE_LIMIT_IP_RATE, AUTH_RATE_LIMIT_IP_BURST
+)
+username_limiter = _make_limiter(
+    "username", AUTH_RATE_LIMIT_USERNAME_RATE, AUTH_RATE_LIMIT_USERNAME_BURST
+)
+
+
+def _client_ip(request: Request) -> str:
+    """
+    Returns the address of the client, as seen by the outermost trusted
+        proxy (see AUTH_TRUSTED_PROXY_HOPS).
+
+    Args:
+        request (Request): The incoming request.
+
+    Returns:
+        str: The client IP address.
+    """
+    if AUTH_TRUSTED_PROXY_HOPS > 0:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            addresses = [address.strip() for address in forwarded.split(",")]
+            # Fewer entries than proxies, the header was not set by them all
+            return addresses[-min(AUTH_TRUSTED_PROXY_HOPS, len(addresses))]
+    return request.client.host if request.client else "unknown"
+
+
+async def _check(limiter, bucket: str, key: str) -> None:
+    if limiter is None:
+        return
+    retry_after = await limiter.acquire(key)
+    if retry_after > 0:
+        AUTH_RATE_LIMITED.labels(bucket).inc()
+        raise HTTPException(
+            status_code=429,
+            detail="Too many attempts, try again later",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
+
+async def limit_registration(request: Request, item: UserCreate) -> None:
+    """
+    Dependency rate limiting registrations per client IP and per username,
+        before the password is hashed.
+
+    Args:
+        request (Request): The incoming request.
+        item (UserCreate): The registration body, shared with the endpoint.
+
+    Raises:
+        HTTPException: 429 with Retry-After if the client or the username is
+            over its rate.
+    """
+    await _check(ip_limiter, "ip", _client_ip(request))
+    await _check(username_limiter, "username", item.username.lower())
+
+
+async def limit_login(
+    request: Request,
+    form_data: OAuth2PasswordRequestForm = Depends(),
+) -> None:
+    """
+    Dependency rate limiting logins per client IP and per username, before
+        the password is verified.
+
+    Args:
+        request (Request): The incoming request.
+        form_data (OAuth2PasswordRequestForm): The login form, shared with
+            the endpoint.
+
+    Raises:
+        HTTPException: 429 with Retry-After if the client or the username is
+            over its rate.
+    """
+    await _check(ip_limiter, "ip", _client_ip(request))
+    await _check(username_limiter, "username", form_data.username.lower())
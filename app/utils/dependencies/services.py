@@ -2,9 +2,11 @@ from fastapi.params import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.repositories.category_repository import CategoryRepository
+from app.repositories.image_repository import ImageRepository
 from app.repositories.task_repository import TaskRepository
 from app.repositories.user_repository import UserRepository
 from app.services.category_service import CategoryService
+from app.services.image_service import ImageService
 from app.services.task_service import TaskService
 from app.services.user_service import UserService
 from app.utils.dependencies.get_session import get_session
@@ -71,3 +73,23 @@ def get_category_service(
         category_repo=repo,
     )
     return service
+
+
+def get_image_service(
+    session: AsyncSession = Depends(get_session),
+) -> ImageService:
+    """
+    Dependency function to obtain an ImageService instance with a given
+        AsyncSession.
+
+    Args:
+        session (AsyncSession, optional): An optional AsyncSession dependency
+            obtained from get_session. Defaults to Depends(get_session).
+
+    Returns:
+        ImageService: An instance of the ImageService with the provided
+            AsyncSession.
+    """
+    repo = ImageRepository(session)
+    service = ImageService(image_repo=repo)
+    return service
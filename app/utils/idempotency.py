@@ -0,0 +1,83 @@
+import hashlib
+import logging
+
+import redis
+
+logger = logging.getLogger(__name__)
+
+
+def email_idempotency_key(image_key: str, recipient_email: str) -> str:
+    """
+    Derives the default idempotency key of an image email.
+
+    Args:
+        image_key (str): The spool key (content hash) of the image.
+        recipient_email (str): The email address of the recipient.
+
+    Returns:
+        str: A hex SHA-256 digest of the image hash and the recipient.
+    """
+    recipient = recipient_email.strip().lower()
+    return hashlib.sha256(f"{image_key}:{recipient}".encode()).hexdigest()
+
+
+class IdempotencyStore:
+    """
+    Reserves idempotency keys in Redis so an operation runs only once per
+        key within a TTL.
+
+    A key is reserved atomically with SET NX EX, the first caller wins and
+        every other caller sees the key taken until it expires or is
+        released. If Redis is unreachable the store fails open: the
+        operation runs, a possible duplicate is preferred over a lost one.
+
+    Attributes:
+        prefix (str): The namespace of the keys in Redis.
+        ttl (int): Seconds a reservation is kept.
+    """
+
+    def __init__(self, url: str, prefix: str, ttl: int):
+        """
+        Args:
+            url (str): The Redis URL, the client connects lazily.
+            prefix (str): The namespace of the keys in Redis.
+            ttl (int): Seconds a reservation is kept.
+        """
+        self._client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def _name(self, key: str) -> str:
+        return f"{self.prefix}:{key}"
+
+    def reserve(self, key: str) -> bool:
+        """
+        Reserves a key.
+
+        Args:
+            key (str): The idempotency key.
+
+        Returns:
+            bool: True if the key was free (or Redis is unreachable),
+                False if it is already reserved.
+        """
+        try:
+            return bool(
+                self._client.set(self._name(key), 1, nx=True, ex=self.ttl)
+            )
+        except redis.RedisError:
+            logger.warning("Idempotency store unavailable, key %s", key)
+            return True
+
+    def release(self, key: str) -> None:
+        """
+        Releases a key so the operation can be run again, used when it
+            failed.
+
+        Args:
+            key (str): The idempotency key.
+        """
+        try:
+            self._client.delete(self._name(key))
+        except redis.RedisError:
+            logger.warning("Could not release idempotency key %s", key)
@@ -0,0 +1,426 @@
+import io
+import math
+import mmap
+import os
+import time
+from dataclasses import dataclass
+from typing import BinaryIO, Iterable, Optional, Union
+
+from PIL import Image, ImageChops, ImageStat, features
+
+MIN_QUALITY = 10
+MAX_QUALITY = 95
+
+# Raw image bytes, or the path of a file holding them
+ImageSource = Union[bytes, str, os.PathLike]
+
+MEDIA_TYPES = {
+    "JPEG": "image/jpeg",
+    "WEBP": "image/webp",
+    "AVIF": "image/avif",
+}
+
+
+class TargetNotMetError(ValueError):
+    """
+    Raised when no candidate encoding meets the size or quality target.
+    """
+
+
+@dataclass
+class EncodeResult:
+    """
+    The outcome of an image encoding run.
+
+    Attributes:
+        data (bytes): The encoded image.
+        format (str): The Pillow format name of the encoded image.
+        quality (int | None): The encoder quality used, None when unknown
+            (for example for cached results).
+        iterations (int): Number of encoder invocations.
+        elapsed (float): Time spent encoding, in seconds.
+        width (int | None): Width of the encoded image.
+        height (int | None): Height of the encoded image.
+    """
+
+    data: bytes
+    format: str
+    quality: Optional[int] = None
+    iterations: int = 0
+    elapsed: float = 0.0
+    width: Optional[int] = None
+    height: Optional[int] = None
+
+    @property
+    def media_type(self) -> str:
+        return MEDIA_TYPES[self.format]
+
+
+def available_formats() -> list[str]:
+    """
+    Lists the output formats supported by the installed Pillow build.
+
+    Returns:
+        list[str]: Pillow format names, JPEG first.
+    """
+    formats = ["JPEG"]
+    if features.check("webp"):
+        formats.append("WEBP")
+    if "AVIF" in Image.registered_extensions().values():
+        formats.append("AVIF")
+    return formats
+
+
+def _scaled_size(
+    size: tuple[int, int],
+    max_width: Optional[int],
+    max_height: Optional[int],
+    fit: str,
+) -> tuple[int, int]:
+    width, height = size
+    scales = []
+    if max_width:
+        scales.append(max_width / width)
+    if max_height:
+        scales.append(max_height / height)
+    if not scales:
+        return size
+    # Never upscale
+    scale = min(min(scales) if fit == "contain" else max(scales), 1.0)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def _decode(
+    source: ImageSource,
+    max_width: Optional[int] = None,
+    max_height: Optional[int] = None,
+    fit: str = "contain",
+) -> Image.Image:
+    """
+    Decodes an image, downscaling it to the requested bounds.
+
+    Files are memory-mapped rather than read, so the encoded input is never
+        copied into the Python heap.
+
+    For JPEG, draft() makes libjpeg scale by 1/2, 1/4 or 1/8 while
+        decoding, so the full-resolution bitmap is never allocated. The
+        remaining reduction is done with reduce() + LANCZOS resampling.
+
+    Args:
+        source (ImageSource): The raw image or the path of its file.
+        max_width (int, optional): Maximum width of the result.
+        max_height (int, optional): Maximum height of the result.
+        fit (str, optional): "contain" keeps the whole image inside the
+            bounds, "cover" fills the bounds and crops the overflow.
+
+    Returns:
+        Image.Image: The decoded RGB or L image.
+    """
+    if isinstance(source, bytes):
+        return _decode_file(io.BytesIO(source), max_width, max_height, fit)
+
+    with open(source, "rb") as file, mmap.mmap(
+        file.fileno(), 0, access=mmap.ACCESS_READ
+    ) as mapped:
+        return _decode_file(mapped, max_width, max_height, fit)
+
+
+def _decode_file(
+    file: BinaryIO,
+    max_width: Optional[int],
+    max_height: Optional[int],
+    fit: str,
+) -> Image.Image:
+    image = Image.open(file)
+
+    if max_width or max_height:
+        size = _scaled_size(image.size, max_width, max_height, fit)
+        if size != image.size:
+            image.draft(None, size)
+            image = image.resize(
+                size, Image.Resampling.LANCZOS, reducing_gap=3.0
+            )
+
+        if fit == "cover" and max_width and max_height:
+            width, height = min(size[0], max_width), min(size[1], max_height)
+            left, top = (size[0] - width) // 2, (size[1] - height) // 2
+            image = image.crop((left, top, left + width, top + height))
+
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
+    # Finish decoding while the source is still open
+    image.load()
+    return image
+
+
+def _encode(
+    image: Image.Image, image_format: str, quality: int, progressive: bool
+) -> bytes:
+    output = io.BytesIO()
+    if image_format == "JPEG":
+        image.save(
+            output,
+            format="JPEG",
+            quality=quality,
+            optimize=progressive,
+            progressive=progressive,
+        )
+    elif image_format == "WEBP":
+        image.save(output, format="WEBP", quality=quality, method=4)
+    else:
+        image.save(output, format=image_format, quality=quality)
+    return output.getvalue()
+
+
+def _psnr(reference: Image.Image, encoded: bytes) -> float:
+    """
+    Computes the peak signal-to-noise ratio of an encoded image against its
+        source, used as a cheap perceptual quality estimate.
+    """
+    with Image.open(io.BytesIO(encoded)) as candidate:
+        candidate = candidate.convert(reference.mode)
+        difference = ImageChops.difference(reference, candidate)
+    mse = sum(ImageStat.Stat(difference).sum2) / (
+        reference.width * reference.height * len(reference.getbands())
+    )
+    if mse == 0:
+        return math.inf
+    return 10 * math.log10(255**2 / mse)
+
+
+def encode_image(
+    data: ImageSource,
+    quality: int,
+    formats: Iterable[str] = ("JPEG",),
+    max_width: Optional[int] = None,
+    max_height: Optional[int] = None,
+    fit: str = "contain",
+) -> EncodeResult:
+    """
+    Decodes an uploaded image and re-encodes it at a fixed quality.
+
+    When several formats are given, each one is tried and the smallest
+        output wins.
+
+    This function is CPU-bound and is meant to be executed in the image
+        process pool, so it must stay a picklable module-level function.
+
+    Args:
+        data (ImageSource): The raw uploaded image or the path of its file.
+        quality (int): Encoder quality.
+        formats (Iterable[str], optional): Candidate output formats.
+            Defaults to baseline JPEG only.
+        max_width (int, optional): Maximum width of the output.
+        max_height (int, optional): Maximum height of the output.
+        fit (str, optional): How the image is fitted into the bounds,
+            "contain" or "cover".
+
+    Returns:
+        EncodeResult: The smallest encoded image.
+    """
+    started = time.perf_counter()
+    best, iterations = None, 0
+    with _decode(data, max_width, max_height, fit) as image:
+        for image_format in formats:
+            encoded = _encode(image, image_format, quality, progressive=False)
+            iterations += 1
+            if best is None or len(encoded) < len(best.data):
+                best = EncodeResult(encoded, image_format, quality)
+        best.width, best.height = image.size
+
+    best.iterations = iterations
+    best.elapsed = time.perf_counter() - started
+    return best
+
+
+def encode_image_to_target(
+    data: ImageSource,
+    max_bytes: Optional[int] = None,
+    min_psnr: Optional[float] = None,
+    formats: Iterable[str] = ("JPEG",),
+    max_width: Optional[int] = None,
+    max_height: Optional[int] = None,
+    fit: str = "contain",
+) -> EncodeResult:
+    """
+    Encodes an uploaded image to meet a byte budget and/or a perceptual
+        quality target, binary-searching the encoder quality per format.
+
+    - With min_psnr, the lowest quality reaching the PSNR target is chosen
+        for each format and the smallest output wins.
+    - With only max_bytes, the highest quality fitting into the budget is
+        chosen for each format and the output closest to the source (by
+        PSNR) wins.
+
+    JPEG candidates are encoded as progressive, optimized JPEG.
+
+    This function is CPU-bound and is meant to be executed in the image
+        process pool, so it must stay a picklable module-level function.
+
+    Args:
+        data (ImageSource): The raw uploaded image or the path of its file.
+        max_bytes (int, optional): Maximum size of the output in bytes.
+        min_psnr (float, optional): Minimum PSNR of the output in dB.
+        formats (Iterable[str], optional): Candidate output formats.
+        max_width (int, optional): Maximum width of the output.
+        max_height (int, optional): Maximum height of the output.
+        fit (str, optional): How the image is fitted into the bounds,
+            "contain" or "cover".
+
+    Returns:
+        EncodeResult: The selected encoded image.
+
+    Raises:
+        ValueError: If no target is given.
+        TargetNotMetError: If no candidate meets the target.
+    """
+    if max_bytes is None and min_psnr is None:
+        raise ValueError("Either max_bytes or min_psnr must be given")
+
+    started = time.perf_counter()
+    iterations = 0
+    candidates = []
+
+    with _decode(data, max_width, max_height, fit) as image:
+        for image_format in formats:
+            low, high = MIN_QUALITY, MAX_QUALITY
+            found = None
+            while low <= high:
+                quality = (low + high) // 2
+                encoded = _encode(image, image_format, quality, True)
+                iterations += 1
+
+                fits = max_bytes is None or len(encoded) <= max_bytes
+                if min_psnr is None:
+                    # Search for the highest quality within the budget
+                    if fits:
+                        found, low = (quality, encoded), quality + 1
+                    else:
+                        high = quality - 1
+                elif not fits:
+                    high = quality - 1
+                elif _psnr(image, encoded) >= min_psnr:
+                    # Search for the lowest quality meeting the target
+                    found, high = (quality, encoded), quality - 1
+                else:
+                    low = quality + 1
+
+            if found is not None:
+                quality, encoded = found
+                candidates.append(EncodeResult(encoded, image_format, quality))
+
+        if not candidates:
+            raise TargetNotMetError(
+                "The image cannot be encoded within the target"
+            )
+
+        if min_psnr is not None:
+            best = min(candidates, key=lambda result: len(result.data))
+        else:
+            best = max(
+                candidates, key=lambda result: _psnr(image, result.data)
+            )
+        best.width, best.height = image.size
+
+    best.iterations = iterations
+    best.elapsed = time.perf_counter() - started
+    return best
+
+
+def optimize(
+    data: ImageSource,
+    quality: int = 50,
+    max_bytes: Optional[int] = None,
+    min_psnr: Optional[float] = None,
+    formats: Iterable[str] = ("JPEG",),
+    max_width: Optional[int] = None,
+    max_height: Optional[int] = None,
+    fit: str = "contain",
+) -> EncodeResult:
+    """
+    Optimizes an image, at a fixed quality or for a target when max_bytes
+        and/or min_psnr are given.
+
+    This function is CPU-bound and is meant to be executed in the image
+        process pool, so it must stay a picklable module-level function.
+
+    Args:
+        data (ImageSource): The raw uploaded image or the path of its file.
+        quality (int, optional): Encoder quality for the fixed-quality mode.
+        max_bytes (int, optional): Maximum size of the output in bytes.
+        min_psnr (float, optional): Minimum PSNR of the output in dB.
+        formats (Iterable[str], optional): Candidate output formats.
+        max_width (int, optional): Maximum width of the output.
+        max_height (int, optional): Maximum height of the output.
+        fit (str, optional): How the image is fitted into the bounds,
+            "contain" or "cover".
+
+    Returns:
+        EncodeResult: The optimized image.
+    """
+    size = {"max_width": max_width, "max_height": max_height, "fit": fit}
+    if max_bytes is None and min_psnr is None:
+        return encode_image(data, quality, formats, **size)
+    return encode_image_to_target(data, max_bytes, min_psnr, formats, **size)
+
+
+def encode_variants(
+    data: ImageSource,
+    widths: Iterable[int],
+    formats: Iterable[str] = ("JPEG",),
+    quality: int = 50,
+) -> list[EncodeResult]:
+    """
+    Produces responsive variants of an image at several widths and formats
+        from a single decode.
+
+    The image is decoded once at the largest requested width (using JPEG
+        draft mode), then each smaller width is resampled from the previous,
+        larger variant rather than from the source. Widths are never
+        upscaled, so they match optimize(max_width=width).
+
+    This function is CPU-bound and is meant to be executed in the image
+        process pool, so it must stay a picklable module-level function.
+
+    Args:
+        data (ImageSource): The raw uploaded image or the path of its file.
+        widths (Iterable[int]): Requested widths.
+        formats (Iterable[str], optional): Output formats of each width.
+        quality (int, optional): Encoder quality.
+
+    Returns:
+        list[EncodeResult]: One result per width and format, largest first.
+    """
+    formats = tuple(formats)
+    widths = sorted(set(widths), reverse=True)
+    results = []
+
+    current = _decode(data, max_width=widths[0])
+    try:
+        for width in widths:
+            size = _scaled_size(current.size, width, None, "contain")
+            if size != current.size:
+                resized = current.resize(
+                    size, Image.Resampling.LANCZOS, reducing_gap=3.0
+                )
+                current.close()
+                current = resized
+
+            for image_format in formats:
+                started = time.perf_counter()
+                encoded = _encode(current, image_format, quality, False)
+                results.append(
+                    EncodeResult(
+                        encoded,
+                        image_format,
+                        quality,
+                        iterations=1,
+                        elapsed=time.perf_counter() - started,
+                        width=current.width,
+                        height=current.height,
+                    )
+                )
+    finally:
+        current.close()
+    return results
@@ -0,0 +1,50 @@
+import base64
+import binascii
+import json
+from typing import Optional
+
+from fastapi import HTTPException
+
+
+def encode_cursor(last_id: Optional[int]) -> Optional[str]:
+    """
+    Encodes the key of the last row of a page into an opaque cursor.
+
+    Args:
+        last_id (int, optional): The primary key of the last row returned,
+            None when there is no next page.
+
+    Returns:
+        Optional[str]: The URL-safe cursor of the next page, or None.
+    """
+    if last_id is None:
+        return None
+    payload = json.dumps({"id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[int]:
+    """
+    Decodes a cursor made by encode_cursor.
+
+    Args:
+        cursor (str, optional): The cursor sent by the client, None for the
+            first page.
+
+    Returns:
+        Optional[int]: The primary key to continue after, None for the
+            first page.
+
+    Raises:
+        HTTPException: If the cursor is malformed.
+    """
+    if cursor is None:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        last_id = json.loads(base64.urlsafe_b64decode(padded))["id"]
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(last_id, int):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return last_id
@@ -0,0 +1,138 @@
+import logging
+import time
+from collections import OrderedDict
+
+import redis.asyncio as redis
+
+logger = logging.getLogger(__name__)
+
+_monotonic = time.monotonic
+
+
+class MemoryTokenBucket:
+    """
+    Per-key token buckets kept in the memory of the process.
+
+    Every key starts with a full bucket of burst tokens, refilled at rate
+        tokens per second. The state of a key is two floats updated in
+        place, deciding costs one dict lookup, moving the key to the end
+        of the LRU order, and no allocation.
+
+    Above max_keys the least recently used key is forgotten. A key under
+        attack is used all the time and keeps its bucket, however many
+        other keys are rotated through the table.
+
+    Attributes:
+        rate (float): Tokens added per second.
+        burst (int): Size of the bucket, requests allowed at once.
+        max_keys (int): Maximum number of tracked keys.
+    """
+
+    def __init__(self, rate: float, burst: int, max_keys: int = 100_000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, list[float]] = OrderedDict()
+
+    def take(self, key: str) -> float:
+        """
+        Takes a token from the bucket of a key.
+
+        Args:
+            key (str): The rate limited key.
+
+        Returns:
+            float: 0 if the request is allowed, otherwise the seconds until
+                a token is available.
+        """
+        now = _monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self.max_keys:
+                self._buckets.popitem(last=False)
+            self._buckets[key] = [self.burst - 1, now]
+            return 0.0
+        self._buckets.move_to_end(key)
+
+        # Hot path of every login, kept free of calls
+        tokens = bucket[0] + (now - bucket[1]) * self.rate
+        if tokens > self.burst:
+            tokens = self.burst
+        bucket[1] = now
+        if tokens >= 1:
+            bucket[0] = tokens - 1
+            return 0.0
+        bucket[0] = tokens
+        return (1 - tokens) / self.rate
+
+    async def acquire(self, key: str) -> float:
+        """
+        Same as take, the interface shared with RedisTokenBucket.
+        """
+        return self.take(key)
+
+
+# Refills and takes a token atomically, with the clock of the Redis server
+# so that every API process sees the same time. Returns the milliseconds to
+# wait, 0 when a token was taken.
+_TAKE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local clock = redis.call("TIME")
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+local state = redis.call("HMGET", KEYS[1], "tokens", "ts")
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + (now - ts) * rate / 1000)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = math.ceil((1 - tokens) * 1000 / rate)
+end
+redis.call("HSET", KEYS[1], "tokens", tostring(tokens), "ts", now)
+redis.call("PEXPIRE", KEYS[1], math.ceil(burst * 1000 / rate))
+return wait
+"""
+
+
+class RedisTokenBucket:
+    """
+    Per-key token buckets shared by every API process through Redis.
+
+    Each decision is one round trip running a Lua script. If Redis is
+        unreachable requests are allowed, an outage of the limiter must not
+        lock every user out.
+
+    Attributes:
+        prefix (str): The namespace of the buckets in Redis.
+        rate (float): Tokens added per second.
+        burst (int): Size of the bucket, requests allowed at once.
+    """
+
+    def __init__(self, url: str, prefix: str, rate: float, burst: int):
+        self._client = redis.Redis.from_url(url)
+        self._take = self._client.register_script(_TAKE_SCRIPT)
+        self.prefix = prefix
+        self.rate = rate
+        self.burst = burst
+
+    async def acquire(self, key: str) -> float:
+        """
+        Takes a token from the bucket of a key.
+
+        Args:
+            key (str): The rate limited key.
+
+        Returns:
+            float: 0 if the request is allowed, otherwise the seconds until
+                a token is available.
+        """
+        try:
+            wait_ms = await self._take(
+                keys=[f"{self.prefix}:{key}"], args=[self.rate, self.burst]
+            )
+        except (redis.RedisError, OSError):
+            logger.warning("Rate limiter unavailable, request allowed")
+            return 0.0
+        return int(wait_ms) / 1000
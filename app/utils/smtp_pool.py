@@ -0,0 +1,350 @@
+import asyncio
+import os
+import smtplib
+import threading
+import time
+from contextlib import suppress
+from typing import Optional, Sequence
+
+import aiosmtplib
+
+
+class SMTPConnectionPool:
+    """
+    A pool of persistent, authenticated SMTP connections.
+
+    Opening a connection costs a TCP and TLS handshake plus AUTH, which
+        takes longer than sending a typical message. The pool keeps
+        connections open between sends and reuses them:
+
+        - a connection idle for longer than keepalive_interval is checked
+            with NOOP before it is reused,
+        - a connection idle for longer than max_idle is closed instead, as
+            servers drop idle sessions anyway,
+        - a reused connection that turns out to be dead is replaced and
+            the message is sent once more on a fresh connection.
+
+    The pool is meant to live in one process. Connections inherited through
+        fork() are dropped without being touched, so a pool created before
+        Celery forks its pool processes is safe to use in every child.
+
+    Attributes:
+        host (str): The SMTP server host.
+        port (int): The SMTP server port.
+        max_size (int): The maximum number of idle connections kept open.
+        max_idle (float): Seconds after which an idle connection is closed.
+        keepalive_interval (float): Seconds of idleness after which a
+            connection is checked with NOOP before reuse.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        user: Optional[str] = None,
+        password: Optional[str] = None,
+        use_ssl: bool = True,
+        max_size: int = 1,
+        max_idle: float = 60.0,
+        keepalive_interval: float = 15.0,
+        timeout: float = 30.0,
+    ):
+        self.host = host
+        self.port = port
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.keepalive_interval = keepalive_interval
+        self._user = user
+        self._password = password
+        self._use_ssl = use_ssl
+        self._timeout = timeout
+        self._idle: list[tuple[smtplib.SMTP, float]] = []
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def _connect(self) -> smtplib.SMTP:
+        factory = smtplib.SMTP_SSL if self._use_ssl else smtplib.SMTP
+        connection = factory(self.host, self.port, timeout=self._timeout)
+        try:
+            if self._user:
+                connection.login(self._user, self._password)
+        except BaseException:
+            self._close(connection)
+            raise
+        return connection
+
+    @staticmethod
+    def _close(connection: smtplib.SMTP) -> None:
+        try:
+            connection.quit()
+        except (smtplib.SMTPException, OSError):
+            with suppress(OSError):
+                connection.close()
+
+    @staticmethod
+    def _is_alive(connection: smtplib.SMTP) -> bool:
+        try:
+            return connection.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def _take_idle(self) -> Optional[tuple[smtplib.SMTP, float]]:
+        with self._lock:
+            if self._pid != os.getpid():
+                # Sockets shared with the parent process, leave them alone
+                self._idle = []
+                self._pid = os.getpid()
+            return self._idle.pop() if self._idle else None
+
+    def _acquire(self) -> tuple[smtplib.SMTP, bool]:
+        while (idle := self._take_idle()) is not None:
+            connection, last_used = idle
+            idle_for = time.monotonic() - last_used
+            if idle_for > self.max_idle:
+                self._close(connection)
+            elif idle_for > self.keepalive_interval and not self._is_alive(
+                connection
+            ):
+                with suppress(OSError):
+                    connection.close()
+            else:
+                return connection, True
+        return self._connect(), False
+
+    def _release(self, connection: smtplib.SMTP) -> None:
+        with self._lock:
+            if len(self._idle) < self.max_size:
+                self._idle.append((connection, time.monotonic()))
+                return
+        self._close(connection)
+
+    def sendmail(
+        self, from_addr: str, to_addrs: str | Sequence[str], msg: str
+    ) -> dict:
+        """
+        Sends a message over a pooled connection.
+
+        Args:
+            from_addr (str): The envelope sender.
+            to_addrs (str | Sequence[str]): The envelope recipient(s).
+            msg (str): The message, as returned by Message.as_string().
+
+        Returns:
+            dict: Recipients refused by the server, see smtplib.sendmail().
+
+        Raises:
+            smtplib.SMTPException: If the server rejects the message.
+            OSError: If the server cannot be reached.
+        """
+        while True:
+            connection, reused = self._acquire()
+            try:
+                refused = connection.sendmail(from_addr, to_addrs, msg)
+            except (smtplib.SMTPServerDisconnected, OSError):
+                with suppress(OSError):
+                    connection.close()
+                if reused:
+                    # The server dropped the idle session, try a fresh one
+                    continue
+                raise
+            except smtplib.SMTPException:
+                # A rejected message leaves the session usable
+                with suppress(smtplib.SMTPException, OSError):
+                    connection.rset()
+                    self._release(connection)
+                raise
+            self._release(connection)
+            return refused
+
+    def close(self) -> None:
+        """
+        Closes every idle connection.
+        """
+        with self._lock:
+            idle, self._idle = self._idle, []
+            inherited = self._pid != os.getpid()
+        if not inherited:
+            for connection, _ in idle:
+                self._close(connection)
+
+
+class AsyncSMTPConnectionPool:
+    """
+    Sends email from one asyncio event loop, keeping many SMTP sessions in
+        flight at once.
+
+    The loop runs in a background thread of the worker process and owns up
+        to `concurrency` persistent sessions. sendmail() can be called from
+        any number of threads (for example a Celery worker started with
+        "--pool threads"), each call only waits for its own message while
+        the loop multiplexes all of them over the sessions.
+
+    Idle sessions follow the same rules as in SMTPConnectionPool: NOOP after
+        keepalive_interval, closed after max_idle, and a message failing on
+        a reused session is resent once on a fresh one.
+
+    Attributes:
+        host (str): The SMTP server host.
+        port (int): The SMTP server port.
+        concurrency (int): The maximum number of sessions in flight.
+        max_idle (float): Seconds after which an idle session is closed.
+        keepalive_interval (float): Seconds of idleness after which a
+            session is checked with NOOP before reuse.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        user: Optional[str] = None,
+        password: Optional[str] = None,
+        use_ssl: bool = True,
+        concurrency: int = 50,
+        max_idle: float = 60.0,
+        keepalive_interval: float = 15.0,
+        timeout: float = 30.0,
+    ):
+        self.host = host
+        self.port = port
+        self.concurrency = concurrency
+        self.max_idle = max_idle
+        self.keepalive_interval = keepalive_interval
+        self._user = user
+        self._password = password
+        self._use_ssl = use_ssl
+        self._timeout = timeout
+        self._idle: list[tuple[aiosmtplib.SMTP, float]] = []
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._pid != os.getpid():
+                # The loop thread does not survive fork(), start over
+                self._idle, self._loop, self._thread = [], None, None
+                self._pid = os.getpid()
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._slots = asyncio.Semaphore(self.concurrency)
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever,
+                    name="smtp-dispatcher",
+                    daemon=True,
+                )
+                self._thread.start()
+            return self._loop
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        connection = aiosmtplib.SMTP(
+            hostname=self.host,
+            port=self.port,
+            username=self._user or None,
+            password=self._password,
+            use_tls=self._use_ssl,
+            timeout=self._timeout,
+        )
+        await connection.connect()
+        return connection
+
+    @staticmethod
+    async def _close(connection: aiosmtplib.SMTP) -> None:
+        try:
+            await connection.quit()
+        except (aiosmtplib.SMTPException, OSError):
+            connection.close()
+
+    @staticmethod
+    async def _is_alive(connection: aiosmtplib.SMTP) -> bool:
+        try:
+            return (await connection.noop()).code == 250
+        except (aiosmtplib.SMTPException, OSError):
+            return False
+
+    async def _acquire(self) -> tuple[aiosmtplib.SMTP, bool]:
+        while self._idle:
+            connection, last_used = self._idle.pop()
+            idle_for = time.monotonic() - last_used
+            if idle_for > self.max_idle:
+                await self._close(connection)
+            elif idle_for > self.keepalive_interval and not (
+                await self._is_alive(connection)
+            ):
+                connection.close()
+            else:
+                return connection, True
+        return await self._connect(), False
+
+    async def _sendmail(
+        self, from_addr: str, to_addrs: str | Sequence[str], msg: str
+    ) -> dict:
+        async with self._slots:
+            while True:
+                connection, reused = await self._acquire()
+                try:
+                    refused, _ = await connection.sendmail(
+                        from_addr, to_addrs, msg
+                    )
+                except (aiosmtplib.SMTPServerDisconnected, OSError):
+                    connection.close()
+                    if reused:
+                        # The server dropped the idle session, try a fresh one
+                        continue
+                    raise
+                except aiosmtplib.SMTPException:
+                    # A rejected message leaves the session usable
+                    try:
+                        await connection.rset()
+                    except (aiosmtplib.SMTPException, OSError):
+                        connection.close()
+                    else:
+                        self._idle.append((connection, time.monotonic()))
+                    raise
+                self._idle.append((connection, time.monotonic()))
+                return refused
+
+    def sendmail(
+        self, from_addr: str, to_addrs: str | Sequence[str], msg: str
+    ) -> dict:
+        """
+        Sends a message from the event loop and waits for the result.
+
+        Args:
+            from_addr (str): The envelope sender.
+            to_addrs (str | Sequence[str]): The envelope recipient(s).
+            msg (str): The message, as returned by Message.as_string().
+
+        Returns:
+            dict: Recipients refused by the server.
+
+        Raises:
+            aiosmtplib.SMTPException: If the server rejects the message.
+            OSError: If the server cannot be reached.
+        """
+        future = asyncio.run_coroutine_threadsafe(
+            self._sendmail(from_addr, to_addrs, msg), self._get_loop()
+        )
+        return future.result()
+
+    async def _close_all(self) -> None:
+        idle, self._idle = self._idle, []
+        await asyncio.gather(
+            *(self._close(connection) for connection, _ in idle),
+            return_exceptions=True,
+        )
+
+    def close(self) -> None:
+        """
+        Closes every idle session and stops the event loop.
+        """
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            if loop is None or self._pid != os.getpid():
+                return
+            self._loop = self._thread = None
+        asyncio.run_coroutine_threadsafe(self._close_all(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
@@ -0,0 +1,195 @@
+import hashlib
+import io
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import Optional
+
+from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+
+from config import UPLOAD_MAX_BYTES, UPLOAD_SPOOL_THRESHOLD, UPLOAD_TMP_DIR
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"Upload exceeds the limit of {max_bytes} bytes",
+    )
+
+
+@dataclass
+class IngestedUpload:
+    """
+    An uploaded file read with a size cap.
+
+    Small uploads are kept in memory, larger ones are spilled to a temporary
+        file which the image pipeline memory-maps instead of reading.
+
+    Attributes:
+        sha256 (str): Hex SHA-256 digest of the content.
+        size (int): Size of the content in bytes.
+        data (bytes | None): The content, for in-memory uploads.
+        path (str | None): The temporary file, for spilled uploads.
+    """
+
+    sha256: str
+    size: int
+    data: Optional[bytes] = None
+    path: Optional[str] = None
+
+    @property
+    def source(self) -> bytes | str:
+        """
+        The upload as accepted by the image pipeline, bytes or a path.
+        """
+        return self.data if self.path is None else self.path
+
+    def close(self) -> None:
+        """
+        Removes the temporary file of a spilled upload.
+        """
+        if self.path is not None:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+            self.path = None
+        self.data = None
+
+
+async def ingest_upload(
+    file: UploadFile,
+    max_bytes: int = UPLOAD_MAX_BYTES,
+    spool_threshold: int = UPLOAD_SPOOL_THRESHOLD,
+) -> IngestedUpload:
+    """
+    Reads an upload in chunks, hashing it on the way.
+
+    Args:
+        file (UploadFile): The uploaded file.
+        max_bytes (int, optional): Hard size limit of the upload.
+        spool_threshold (int, optional): Size above which the upload is
+            spilled to a temporary file.
+
+    Returns:
+        IngestedUpload: The ingested upload, close() it when done.
+
+    Raises:
+        HTTPException: 413 if the upload exceeds max_bytes.
+    """
+    if file.size is not None and file.size > max_bytes:
+        raise _too_large(max_bytes)
+
+    digest = hashlib.sha256()
+    # Chunks are appended to one buffer rather than joined at the end, which
+    # would briefly hold the content twice. getvalue() hands the buffer over
+    # without copying it.
+    buffer, size, spill = io.BytesIO(), 0, None
+    try:
+        while chunk := await file.read(CHUNK_SIZE):
+            size += len(chunk)
+            if size > max_bytes:
+                raise _too_large(max_bytes)
+            digest.update(chunk)
+
+            if spill is None and size > spool_threshold:
+                os.makedirs(UPLOAD_TMP_DIR, exist_ok=True)
+                spill = tempfile.NamedTemporaryFile(
+                    dir=UPLOAD_TMP_DIR, prefix="upload-", delete=False
+                )
+                with buffer.getbuffer() as buffered:
+                    await run_in_threadpool(spill.write, buffered)
+                buffer = None
+
+            if spill is None:
+                buffer.write(chunk)
+            else:
+                await run_in_threadpool(spill.write, chunk)
+    except BaseException:
+        if spill is not None:
+            spill.close()
+            os.unlink(spill.name)
+        raise
+
+    if spill is None:
+        return IngestedUpload(digest.hexdigest(), size, data=buffer.getvalue())
+
+    spill.close()
+    return IngestedUpload(digest.hexdigest(), size, path=spill.name)
+
+
+class UploadSizeLimitMiddleware:
+    """
+    ASGI middleware rejecting oversized request bodies with 413.
+
+    Requests announcing a larger Content-Length are rejected before the body
+        is read. Bodies without (or with a wrong) Content-Length are counted
+        while they are received, and the response is replaced with 413 as
+        soon as the limit is crossed.
+
+    Attributes:
+        limits (dict[str, int]): Body size limits by request path.
+    """
+
+    def __init__(self, app, limits: dict[str, int]):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        limit = None
+        if scope["type"] == "http":
+            limit = self.limits.get(scope["path"])
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        content_length = headers.get(b"content-length")
+        if content_length is not None and int(content_length) > limit:
+            await self._reject(send, limit)
+            return
+
+        received = 0
+        exceeded = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    exceeded = True
+                    # Stop feeding the parser, the body is discarded
+                    return {"type": "http.disconnect"}
+            return message
+
+        response_started = False
+
+        async def limited_send(message):
+            nonlocal response_started
+            if exceeded:
+                if not response_started:
+                    response_started = True
+                    await self._reject(send, limit)
+                return
+            response_started = True
+            await send(message)
+
+        await self.app(scope, limited_receive, limited_send)
+        if exceeded and not response_started:
+            await self._reject(send, limit)
+
+    @staticmethod
+    async def _reject(send, limit: int) -> None:
+        body = f'{{"detail":"Upload exceeds the limit of {limit} bytes"}}'
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 413,
+                "headers": [(b"content-type", b"application/json")],
+            }
+        )
+        await send({"type": "http.response.body", "body": body.encode()})
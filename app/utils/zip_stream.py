@@ -0,0 +1,84 @@
+import time
+import zipfile
+
+
+class _ChunkBuffer:
+    """
+    A write-only, non-seekable file object collecting the bytes written by
+        ZipFile until they are drained into the response.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._offset = 0
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._offset
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ZipStreamWriter:
+    """
+    Builds a ZIP archive incrementally so it can be streamed entry by entry.
+
+    Since the output is not seekable, ZipFile writes a data descriptor after
+        every entry, and the central directory is emitted by close().
+        Entries are stored uncompressed, optimized images do not deflate.
+    """
+
+    def __init__(self):
+        self._buffer = _ChunkBuffer()
+        self._zip = zipfile.ZipFile(
+            self._buffer, mode="w", compression=zipfile.ZIP_STORED
+        )
+        self._names = set()
+
+    def _unique_name(self, name: str) -> str:
+        stem, dot, suffix = name.rpartition(".")
+        if not dot:
+            stem, suffix = name, ""
+        candidate, counter = name, 1
+        while candidate in self._names:
+            candidate = f"{stem}_{counter}{dot}{suffix}"
+            counter += 1
+        self._names.add(candidate)
+        return candidate
+
+    def add(self, name: str, data: bytes) -> bytes:
+        """
+        Adds an entry to the archive.
+
+        Args:
+            name (str): The entry name, made unique if needed.
+            data (bytes): The entry content.
+
+        Returns:
+            bytes: The archive bytes produced by the entry.
+        """
+        info = zipfile.ZipInfo(
+            self._unique_name(name), date_time=time.localtime()[:6]
+        )
+        self._zip.writestr(info, data)
+        return self._buffer.drain()
+
+    def close(self) -> bytes:
+        """
+        Finishes the archive.
+
+        Returns:
+            bytes: The remaining archive bytes (the central directory).
+        """
+        self._zip.close()
+        return self._buffer.drain()
@@ -0,0 +1,99 @@
+"""
+Measures the per-request cost of authenticating a bearer token.
+
+    jwt.decode      full verification (base64, JSON, HMAC, claim checks),
+                    what every request paid before the token cache
+    decode_token    the same token served from the verified token cache
+    dependency      get_cached_current_profile with the token and the user
+                    both cached, the whole authentication of a request
+    stateless       the same with a stateless token (uid/is_admin claims),
+                    no user lookup at all
+
+Usage:
+    python -m benchmarks.auth_overhead --iterations 20000
+"""
+import argparse
+import asyncio
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+from jose import jwt
+
+from app.auth import security
+from app.auth.principal_cache import principal_cache
+from app.auth.security import (
+    create_jwt_token,
+    decode_token,
+    get_cached_current_profile,
+)
+from app.auth.token_cache import token_cache
+from config import ALGORITHM, SECRET_KEY
+
+
+def _report(name: str, elapsed: float, iterations: int) -> float:
+    per_call = elapsed / iterations * 1_000_000
+    print(f"{name:<14} {per_call:8.2f} us/request")
+    return per_call
+
+
+def _time(func, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return time.perf_counter() - started
+
+
+async def main(args: argparse.Namespace) -> None:
+    token = await create_jwt_token({"sub": "bench"})
+    iterations = args.iterations
+
+    full = _report(
+        "jwt.decode",
+        _time(
+            lambda: jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]),
+            iterations,
+        ),
+        iterations,
+    )
+
+    token_cache.clear()
+    decode_token(token)
+    cached = _report(
+        "decode_token",
+        _time(lambda: decode_token(token), iterations),
+        iterations,
+    )
+
+    user = SimpleNamespace(
+        **{column: None for column in principal_cache._columns}
+    )
+    user.id, user.username = 1, "bench"
+    principal_cache.put("bench", user)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await get_cached_current_profile(decode_token(token), session=None)
+    _report("dependency", time.perf_counter() - started, iterations)
+
+    stateless_token = await create_jwt_token(
+        {"sub": "bench", "uid": 1, "is_admin": False}
+    )
+    principal_cache.invalidate()
+    with mock.patch.object(security, "AUTH_STATELESS_TOKENS", True):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            await get_cached_current_profile(
+                decode_token(stateless_token), session=None
+            )
+    _report("stateless", time.perf_counter() - started, iterations)
+
+    print(f"token cache speed-up x{full / cached:.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--iterations", type=int, default=20000)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,81 @@
+"""
+Picks BCRYPT_ROUNDS for this host: the highest bcrypt cost whose median
+hash time stays within the target latency of a login.
+
+Every cost is timed with the bcrypt backend used by the API, the table
+shows the login throughput one API process can sustain with its
+PASSWORD_HASH_WORKERS hashing threads. Run it on the deployment host (or
+the same instance type), with the host otherwise idle.
+
+Usage:
+    python -m benchmarks.bcrypt_rounds --target-ms 250
+"""
+import argparse
+import statistics
+import time
+
+from passlib.hash import bcrypt
+
+from config import BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS
+
+# bcrypt accepts costs from 4 to 31, below 10 is not considered safe
+MIN_ROUNDS = 10
+MAX_ROUNDS = 16
+
+
+def _time_hash(rounds: int, samples: int) -> float:
+    hasher = bcrypt.using(rounds=rounds)
+    durations = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        hasher.hash("calibration password")
+        durations.append(time.perf_counter() - started)
+    return statistics.median(durations)
+
+
+def main(args: argparse.Namespace) -> None:
+    target = args.target_ms / 1000
+    workers = max(1, PASSWORD_HASH_WORKERS)
+    chosen = None
+
+    print(f"{'rounds':>6} {'median':>10} {'logins/s':>9}")
+    for rounds in range(MIN_ROUNDS, MAX_ROUNDS + 1):
+        duration = _time_hash(rounds, args.samples)
+        marker = " (current)" if rounds == BCRYPT_ROUNDS else ""
+        print(
+            f"{rounds:>6} {duration * 1000:>7.1f} ms "
+            f"{workers / duration:>9.1f}{marker}"
+        )
+        if duration <= target:
+            chosen = rounds
+        if duration > target * 2:
+            # Each step doubles the cost, the next ones are out of reach
+            break
+
+    if chosen is None:
+        print(
+            f"no cost >= {MIN_ROUNDS} hashes within {args.target_ms} ms, "
+            f"use BCRYPT_ROUNDS={MIN_ROUNDS} or a faster host"
+        )
+    else:
+        print(f"BCRYPT_ROUNDS={chosen}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--target-ms",
+        type=float,
+        default=250,
+        help="Hash time allowed per login, in milliseconds.",
+    )
+    parser.add_argument(
+        "--samples",
+        type=int,
+        default=5,
+        help="Hashes timed per cost, the median is kept.",
+    )
+    main(parser.parse_args())
@@ -0,0 +1,104 @@
+"""
+Measures the broker bytes per message and the .delay() latency of the
+email tasks enqueued by the image endpoints, for each task serializer.
+
+Broker bytes are the size of the message as the Redis transport stores it
+(the JSON envelope with the task headers and the encoded body), body bytes
+the size of the serialized arguments alone. Both are measured on kombu's
+in-memory transport, which is also the default broker, so the latency is
+the client-side cost of .delay() only; pass --broker to time publishing to
+a real broker (the benchmark messages are purged afterwards).
+
+Usage:
+    python -m benchmarks.celery_payload
+    python -m benchmarks.celery_payload --broker redis://localhost:6379/15
+"""
+import argparse
+import base64
+import statistics
+import time
+from unittest import mock
+
+from kombu.transport import memory
+from kombu.utils.json import dumps
+
+from tasks import celery, send_batch_summary_email, send_email_message
+
+SERIALIZERS = ("json", "msgpack")
+
+CASES = {
+    "send_email_message": (
+        send_email_message,
+        ("0" * 64, "recipient@example.com", "image/webp"),
+    ),
+    "send_batch_summary_email": (
+        send_batch_summary_email,
+        (
+            "recipient@example.com",
+            [{"name": f"image_{i}.jpg", "size": 123456} for i in range(50)],
+        ),
+    ),
+}
+
+
+def _percentile(samples: list[float], percent: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(len(ordered) * percent / 100))
+    return ordered[index]
+
+
+def _measure(task, args: tuple, serializer: str, count: int) -> dict:
+    sizes = []
+    original_put = memory.Channel._put
+
+    def recording_put(channel, queue, message, **kwargs):
+        body = base64.b64decode(message["body"])
+        sizes.append((len(dumps(message)), len(body)))
+        return original_put(channel, queue, message, **kwargs)
+
+    latencies = []
+    with mock.patch.object(memory.Channel, "_put", recording_put):
+        for _ in range(count):
+            started = time.perf_counter()
+            task.apply_async(args, serializer=serializer)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    broker_bytes, body_bytes = sizes[0] if sizes else ("n/a", "n/a")
+    return {
+        "broker_bytes": broker_bytes,
+        "body_bytes": body_bytes,
+        "p50_ms": statistics.median(latencies),
+        "p99_ms": _percentile(latencies, 99),
+    }
+
+
+def main(args: argparse.Namespace) -> None:
+    celery.conf.broker_url = args.broker
+
+    for name, (task, task_args) in CASES.items():
+        print(name)
+        for serializer in SERIALIZERS:
+            # Warm up the producer pool and the broker connection
+            task.apply_async(task_args, serializer=serializer)
+            result = _measure(task, task_args, serializer, args.messages)
+            print(
+                f"  {serializer:<8} bytes={result['broker_bytes']:<6} "
+                f"body={result['body_bytes']:<6} "
+                f"p50={result['p50_ms']:7.3f} ms "
+                f"p99={result['p99_ms']:7.3f} ms"
+            )
+
+    if not args.broker.startswith("memory://"):
+        with celery.connection_for_write() as connection:
+            for queue in ("email", "images", "celery"):
+                connection.default_channel.queue_purge(queue)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--broker", default="memory://")
+    main(parser.parse_args())
@@ -0,0 +1,85 @@
+"""
+Measures peak memory of encode_image() for a large JPEG with and without
+decode-time downscaling.
+
+Every case runs in a fresh interpreter so peak RSS is not shared between
+cases.
+
+Usage:
+    python -m benchmarks.decode_memory --megapixels 24 --max-width 1024
+"""
+import argparse
+import io
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+
+from PIL import Image
+
+from app.utils.image_processing import encode_image
+
+
+def _make_jpeg(megapixels: float) -> bytes:
+    width = int((megapixels * 1_000_000 * 4 / 3) ** 0.5)
+    height = width * 3 // 4
+    image = Image.linear_gradient("L").resize((width, height)).convert("RGB")
+    output = io.BytesIO()
+    image.save(output, format="JPEG", quality=90)
+    return output.getvalue()
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_case(path: str, max_width: int | None) -> dict:
+    with open(path, "rb") as file:
+        data = file.read()
+    baseline = _peak_rss_mb()
+    result = encode_image(data, 80, max_width=max_width)
+    return {
+        "max_width": max_width,
+        "output_bytes": len(result.data),
+        "elapsed_ms": round(result.elapsed * 1000, 1),
+        "peak_rss_delta_mb": round(_peak_rss_mb() - baseline, 1),
+    }
+
+
+def main(args: argparse.Namespace) -> None:
+    with tempfile.NamedTemporaryFile(suffix=".jpg") as source:
+        source.write(_make_jpeg(args.megapixels))
+        source.flush()
+
+        for max_width in (None, args.max_width):
+            output = subprocess.run(
+                [
+                    sys.executable,
+                    "-m",
+                    "benchmarks.decode_memory",
+                    "--case",
+                    source.name,
+                    "--max-width",
+                    str(max_width or 0),
+                ],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            print(output.strip())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--megapixels", type=float, default=24.0)
+    parser.add_argument("--max-width", type=int, default=1024)
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    arguments = parser.parse_args()
+
+    if arguments.case:
+        case = run_case(arguments.case, arguments.max_width or None)
+        print(json.dumps(case))
+    else:
+        main(arguments)
@@ -0,0 +1,105 @@
+"""
+Measures /tasks/all_tasks/ latency while images are being optimized.
+
+The task service and the Celery task are replaced with in-memory stand-ins
+and the image cache is disabled, so only the event loop behaviour of the API
+process is measured.
+
+Usage:
+    python -m benchmarks.event_loop_latency --requests 200 --uploads 8
+    IMAGE_PROCESS_WORKERS=0 python -m benchmarks.event_loop_latency
+"""
+import argparse
+import asyncio
+import io
+import statistics
+import time
+from unittest import mock
+
+import httpx
+from PIL import Image
+
+from app.main import app
+from app.serializers.task_serializer import TaskList
+from app.services.image_service import ImageService
+from app.utils.dependencies.services import (
+    get_image_service,
+    get_task_service,
+)
+
+
+class _StaticTaskService:
+    async def get_all_tasks(self, limit, cursor=None):
+        return TaskList(tasks=[])
+
+
+def _make_upload(megapixels: float) -> bytes:
+    side = int((megapixels * 1_000_000) ** 0.5)
+    image = Image.effect_noise((side, side), 64).convert("RGB")
+    output = io.BytesIO()
+    image.save(output, format="PNG")
+    return output.getvalue()
+
+
+def _percentile(samples: list[float], percent: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(len(ordered) * percent / 100))
+    return ordered[index]
+
+
+async def _probe(client: httpx.AsyncClient, count: int) -> list[float]:
+    latencies = []
+    for _ in range(count):
+        started = time.perf_counter()
+        response = await client.get("/tasks/all_tasks/")
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(0.005)
+    return latencies
+
+
+async def _upload(client: httpx.AsyncClient, payload: bytes) -> None:
+    response = await client.post(
+        "/images/optimize-image/",
+        files={"file": ("image.png", payload, "image/png")},
+        data={"email": "bench@example.com"},
+    )
+    response.raise_for_status()
+
+
+def _report(name: str, latencies: list[float]) -> None:
+    print(
+        f"{name:<12} p50={statistics.median(latencies):8.2f} ms "
+        f"p99={_percentile(latencies, 99):8.2f} ms "
+        f"max={max(latencies):8.2f} ms"
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    app.dependency_overrides[get_task_service] = _StaticTaskService
+    app.dependency_overrides[get_image_service] = lambda: ImageService()
+    payload = _make_upload(args.megapixels)
+    transport = httpx.ASGITransport(app=app)
+
+    with mock.patch("app.api.images.send_email_message"), mock.patch(
+        "app.api.images.email_spool"
+    ):
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench"
+        ) as client:
+            _report("idle", await _probe(client, args.requests))
+
+            uploads = asyncio.gather(
+                *(_upload(client, payload) for _ in range(args.uploads))
+            )
+            busy = await _probe(client, args.requests)
+            await uploads
+            _report("optimizing", busy)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--uploads", type=int, default=8)
+    parser.add_argument("--megapixels", type=float, default=12.0)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,372 @@
+"""
+Benchmarks the image pipeline across image sizes, styles, colour modes,
+output formats and quality settings.
+
+Synthetic sources are generated once per case: "photo" images (smooth
+gradients with sensor-like noise) are stored as JPEG, "graphic" images
+(flat shapes and hard edges) and every RGBA image are stored as PNG.
+
+Each case runs in a fresh interpreter, with IMAGE_PROCESS_WORKERS=0 so the
+encoding happens in that process and its peak RSS is measured, and is
+driven in two ways:
+
+    direct    optimize() on the source file, as the Celery worker does.
+    endpoint  POST /images/optimize-image/ through the ASGI app in-process,
+              with the image cache and the email task disabled.
+
+Results (throughput, p50/p99 latency, peak RSS, compression ratio) are
+written as JSON, and a previous result file can be passed to --compare to
+print the relative change of every case.
+
+Usage:
+    python -m benchmarks.image_pipeline
+    python -m benchmarks.image_pipeline --sizes 0.3,12 --formats JPEG,WEBP
+    python -m benchmarks.image_pipeline --compare old.json --output new.json
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import PIL
+from PIL import Image, ImageDraw, ImageFilter
+
+DEFAULT_SIZES = "0.3,1,4,12,24,50"
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def _dimensions(megapixels: float) -> tuple[int, int]:
+    width = int((megapixels * 1_000_000 * 4 / 3) ** 0.5)
+    return width, width * 3 // 4
+
+
+def _photo(size: tuple[int, int]) -> Image.Image:
+    horizontal = Image.linear_gradient("L").rotate(90).resize(size)
+    vertical = Image.linear_gradient("L").resize(size)
+    radial = Image.radial_gradient("L").resize(size)
+    image = Image.merge("RGB", (horizontal, vertical, radial))
+    noise = Image.effect_noise(size, 24).convert("RGB")
+    image = Image.blend(image, noise, 0.15)
+    return image.filter(ImageFilter.BoxBlur(1))
+
+
+def _graphic(size: tuple[int, int]) -> Image.Image:
+    rng = random.Random(size[0])
+    image = Image.new("RGB", size, (245, 245, 245))
+    draw = ImageDraw.Draw(image)
+    width, height = size
+    for _ in range(120):
+        x0, y0 = rng.randrange(width), rng.randrange(height)
+        x1 = min(width, x0 + rng.randrange(width // 8 + 1))
+        y1 = min(height, y0 + rng.randrange(height // 8 + 1))
+        colour = tuple(rng.randrange(256) for _ in range(3))
+        if rng.random() < 0.5:
+            draw.rectangle((x0, y0, x1, y1), fill=colour)
+        else:
+            draw.ellipse((x0, y0, x1, y1), fill=colour)
+    for y in range(0, height, max(1, height // 60)):
+        draw.line((0, y, width, y), fill=(30, 30, 30), width=1)
+    return image
+
+
+def make_source(megapixels: float, style: str, mode: str) -> bytes:
+    """
+    Generates a synthetic source image.
+
+    Args:
+        megapixels (float): The image size.
+        style (str): "photo" or "graphic".
+        mode (str): "RGB" or "RGBA".
+
+    Returns:
+        bytes: The encoded image, JPEG for RGB photos and PNG otherwise.
+    """
+    size = _dimensions(megapixels)
+    image = _photo(size) if style == "photo" else _graphic(size)
+    if mode == "RGBA":
+        image.putalpha(Image.radial_gradient("L").resize(size))
+
+    output = io.BytesIO()
+    if style == "photo" and mode == "RGB":
+        image.save(output, format="JPEG", quality=92)
+    else:
+        image.save(output, format="PNG", compress_level=1)
+    return output.getvalue()
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is inherited from the parent across fork + exec on Linux,
+    # VmHWM belongs to this process image only
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _percentile(samples: list[float], percent: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(len(ordered) * percent / 100))
+    return ordered[index]
+
+
+def _run_direct(path: str, case: dict, repeat: int) -> tuple[list, int]:
+    from app.utils.image_processing import optimize
+
+    latencies, output_bytes = [], 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = optimize(
+            path, quality=case["quality"], formats=(case["format"],)
+        )
+        latencies.append(time.perf_counter() - started)
+        output_bytes = len(result.data)
+    return latencies, output_bytes
+
+
+def _run_endpoint(path: str, case: dict, repeat: int) -> tuple[list, int]:
+    from unittest import mock
+
+    import httpx
+
+    from app.main import app
+    from app.services.image_service import ImageService
+    from app.utils.dependencies.services import get_image_service
+
+    with open(path, "rb") as file:
+        payload = file.read()
+
+    async def run() -> tuple[list, int]:
+        app.dependency_overrides[get_image_service] = lambda: ImageService()
+        transport = httpx.ASGITransport(app=app)
+        latencies, output_bytes = [], 0
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", timeout=None
+        ) as client:
+            for _ in range(repeat):
+                started = time.perf_counter()
+                response = await client.post(
+                    "/images/optimize-image/",
+                    params={
+                        "quality": case["quality"],
+                        "output_format": case["format"],
+                    },
+                    files={"file": ("source", payload)},
+                    data={"email": "bench@example.com"},
+                )
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+                output_bytes = len(response.content)
+        return latencies, output_bytes
+
+    with mock.patch("app.api.images.send_email_message"), mock.patch(
+        "app.api.images.email_spool"
+    ):
+        return asyncio.run(run())
+
+
+def run_case(path: str, case: dict, repeat: int) -> dict:
+    """
+    Runs one case in the current process.
+
+    Args:
+        path (str): The source image file.
+        case (dict): The case parameters.
+        repeat (int): The number of measured runs, after one warm-up run.
+
+    Returns:
+        dict: The case parameters with the measurements.
+    """
+    if case["driver"] == "direct":
+        runner = _run_direct
+        import app.utils.image_processing  # noqa: F401
+    else:
+        runner = _run_endpoint
+        import app.main  # noqa: F401
+
+    # Imports are excluded from the delta, the warm-up run is not
+    baseline = _peak_rss_mb()
+    runner(path, case, 1)
+    latencies, output_bytes = runner(path, case, repeat)
+
+    source_bytes = os.path.getsize(path)
+    width, height = _dimensions(case["megapixels"])
+    channels = len(case["mode"])
+    total = sum(latencies)
+    return {
+        **case,
+        "width": width,
+        "height": height,
+        "runs": repeat,
+        "throughput_images_per_s": round(repeat / total, 3),
+        "throughput_mp_per_s": round(repeat * case["megapixels"] / total, 3),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "peak_rss_delta_mb": round(_peak_rss_mb() - baseline, 1),
+        "source_bytes": source_bytes,
+        "output_bytes": output_bytes,
+        "compression_ratio": round(source_bytes / output_bytes, 3),
+        "raw_compression_ratio": round(
+            width * height * channels / output_bytes, 3
+        ),
+    }
+
+
+def _case_id(case: dict) -> str:
+    return (
+        f"{case['driver']}/{case['megapixels']}MP/{case['style']}/"
+        f"{case['mode']}/{case['format']}/q{case['quality']}"
+    )
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _compare(results: list[dict], baseline_path: str) -> None:
+    with open(baseline_path) as file:
+        baseline = {
+            _case_id(case): case for case in json.load(file)["results"]
+        }
+
+    print(f"\nChange against {baseline_path}:")
+    for case in results:
+        previous = baseline.get(_case_id(case))
+        if previous is None:
+            continue
+        changes = []
+        for metric in ("p50_ms", "peak_rss_delta_mb", "output_bytes"):
+            if previous[metric]:
+                change = case[metric] / previous[metric] - 1
+                changes.append(f"{metric}={change:+.1%}")
+        print(f"{_case_id(case):<45} {' '.join(changes)}")
+
+
+def main(args: argparse.Namespace) -> None:
+    sizes = [float(size) for size in args.sizes.split(",")]
+    formats = [name.strip().upper() for name in args.formats.split(",")]
+    qualities = [int(quality) for quality in args.qualities.split(",")]
+    drivers = args.drivers.split(",")
+    # Large lossless sources exceed the default upload limit
+    env = {
+        **os.environ,
+        "IMAGE_PROCESS_WORKERS": "0",
+        "UPLOAD_MAX_BYTES": str(1024 * 1024 * 1024),
+    }
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for megapixels in sizes:
+            for style in ("photo", "graphic"):
+                for mode in ("RGB", "RGBA"):
+                    path = os.path.join(
+                        directory, f"{megapixels}-{style}-{mode}"
+                    )
+                    with open(path, "wb") as file:
+                        file.write(make_source(megapixels, style, mode))
+
+                    for driver in drivers:
+                        for fmt in formats:
+                            for quality in qualities:
+                                case = {
+                                    "driver": driver,
+                                    "megapixels": megapixels,
+                                    "style": style,
+                                    "mode": mode,
+                                    "format": fmt,
+                                    "quality": quality,
+                                }
+                                output = subprocess.run(
+                                    [
+                                        sys.executable,
+                                        "-m",
+                                        "benchmarks.image_pipeline",
+                                        "--case",
+                                        path,
+                                        "--case-params",
+                                        json.dumps(case),
+                                        "--repeat",
+                                        str(args.repeat),
+                                    ],
+                                    check=True,
+                                    capture_output=True,
+                                    text=True,
+                                    env=env,
+                                ).stdout
+                                result = json.loads(output)
+                                results.append(result)
+                                print(
+                                    f"{_case_id(result):<45} "
+                                    f"p50={result['p50_ms']:9.1f} ms "
+                                    f"p99={result['p99_ms']:9.1f} ms "
+                                    f"rss={result['peak_rss_delta_mb']:7.1f}"
+                                    f" MB ratio="
+                                    f"{result['compression_ratio']:.2f}"
+                                )
+
+    commit = _git_commit()
+    output_path = args.output or os.path.join(
+        RESULTS_DIR, f"image_pipeline-{commit or 'unknown'}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with open(output_path, "w") as file:
+        json.dump(
+            {
+                "commit": commit,
+                "python": platform.python_version(),
+                "pillow": PIL.__version__,
+                "machine": platform.machine(),
+                "cpu_count": os.cpu_count(),
+                "results": results,
+            },
+            file,
+            indent=2,
+        )
+    print(f"\nResults written to {output_path}")
+
+    if args.compare:
+        _compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--sizes", default=DEFAULT_SIZES)
+    parser.add_argument("--formats", default="JPEG")
+    parser.add_argument("--qualities", default="50,80")
+    parser.add_argument("--drivers", default="direct,endpoint")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output")
+    parser.add_argument("--compare")
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    parser.add_argument("--case-params", help=argparse.SUPPRESS)
+    arguments = parser.parse_args()
+
+    if arguments.case:
+        params = json.loads(arguments.case_params)
+        print(json.dumps(run_case(arguments.case, params, arguments.repeat)))
+    else:
+        main(arguments)
@@ -0,0 +1,125 @@
+"""
+Measures /tasks/all_tasks/ latency during a burst of logins,
+with bcrypt running inline on the event loop (the previous behaviour) and
+in the password thread pool.
+
+The user repository and the task service are replaced with in-memory
+stand-ins, so only the event loop behaviour of the API process is
+measured. Every login verifies a real bcrypt hash, the login rate limiter
+is disabled.
+
+Usage:
+    python -m benchmarks.login_burst --logins 20 --requests 200
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+import httpx
+
+from app.core import executors
+from app.main import app
+from app.serializers.task_serializer import TaskList
+from app.services.user_service import UserService
+from app.utils.dependencies.rate_limit import limit_login
+from app.utils.dependencies.services import (
+    get_task_service,
+    get_user_service,
+)
+from config import pwd_context
+
+PASSWORD = "correct horse battery staple"
+
+
+class _StaticTaskService:
+    async def get_all_tasks(self, limit, cursor=None):
+        return TaskList(tasks=[])
+
+
+class _InMemoryUserRepository:
+    def __init__(self, hashed_password: str):
+        self.user = SimpleNamespace(
+            id=1, username="bench", hashed_password=hashed_password
+        )
+
+    async def get_user_by_username(self, username: str):
+        return self.user if username == self.user.username else None
+
+    async def update_last_login(self, user):
+        pass
+
+    async def update_last_request(self, user):
+        pass
+
+
+def _percentile(samples: list[float], percent: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(len(ordered) * percent / 100))
+    return ordered[index]
+
+
+async def _probe(client: httpx.AsyncClient, count: int) -> list[float]:
+    # The pause between requests is timed too, minus its nominal length, so
+    # a loop blocked while the probe sleeps is not missed
+    latencies = []
+    for _ in range(count):
+        started = time.perf_counter()
+        await asyncio.sleep(0.005)
+        response = await client.get("/tasks/all_tasks/")
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - started) * 1000 - 5)
+    return latencies
+
+
+async def _login(client: httpx.AsyncClient) -> None:
+    response = await client.post(
+        "/users/login/", data={"username": "bench", "password": PASSWORD}
+    )
+    response.raise_for_status()
+
+
+def _report(name: str, latencies: list[float]) -> None:
+    print(
+        f"{name:<16} p50={statistics.median(latencies):8.2f} ms "
+        f"p99={_percentile(latencies, 99):8.2f} ms "
+        f"max={max(latencies):8.2f} ms"
+    )
+
+
+async def _run(client: httpx.AsyncClient, logins: int) -> list[float]:
+    # Probe for as long as the burst lasts
+    burst = asyncio.gather(*(_login(client) for _ in range(logins)))
+    latencies = []
+    while not burst.done():
+        latencies += await _probe(client, 1)
+    await burst
+    return latencies
+
+
+async def main(args: argparse.Namespace) -> None:
+    repo = _InMemoryUserRepository(pwd_context.hash(PASSWORD))
+    app.dependency_overrides[get_task_service] = _StaticTaskService
+    app.dependency_overrides[get_user_service] = lambda: UserService(repo)
+    app.dependency_overrides[limit_login] = lambda: None
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        _report("idle", await _probe(client, args.requests))
+
+        with mock.patch.object(executors, "PASSWORD_HASH_WORKERS", 0):
+            _report("logins inline", await _run(client, args.logins))
+
+        _report("logins pooled", await _run(client, args.logins))
+    executors.shutdown_executors()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--logins", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
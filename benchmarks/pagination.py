@@ -0,0 +1,78 @@
+"""
+Compares the cost of fetching a page of tasks at increasing depths with
+keyset pagination (BaseRepository.get_page, WHERE id > :after) and with
+LIMIT/OFFSET.
+
+Runs against an in-memory SQLite database, the shape of the curves (flat
+for keyset, linear in the depth for OFFSET) is the same on Postgres.
+
+Usage:
+    python -m benchmarks.pagination --rows 500000 --limit 100
+"""
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models import Task, User
+from app.repositories.task_repository import TaskRepository
+
+
+async def _offset_page(session: AsyncSession, limit: int, offset: int):
+    query = (
+        Task.__table__.select().order_by(Task.id).limit(limit).offset(offset)
+    )
+    return (await session.execute(query)).all()
+
+
+async def _time(coroutine_factory, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        await coroutine_factory()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+async def main(args: argparse.Namespace) -> None:
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(
+            insert(User).values(
+                id=1, username="bench", email="bench@example.com"
+            )
+        )
+        await conn.execute(
+            insert(Task),
+            [{"title": f"task {i}", "user_id": 1} for i in range(args.rows)],
+        )
+
+    session_factory = sessionmaker(engine, class_=AsyncSession)
+    async with session_factory() as session:
+        repo = TaskRepository(session)
+        print(f"{'depth':>10} {'keyset':>10} {'offset':>10}")
+        depth = args.limit
+        while depth < args.rows:
+            keyset = await _time(
+                lambda: repo.get_page(args.limit, after=depth), args.repeat
+            )
+            offset = await _time(
+                lambda: _offset_page(session, args.limit, depth), args.repeat
+            )
+            print(f"{depth:>10} {keyset:>7.2f} ms {offset:>7.2f} ms")
+            depth *= 10
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--rows", type=int, default=500000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
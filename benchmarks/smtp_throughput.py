@@ -0,0 +1,180 @@
+"""
+Measures email throughput of the email worker with one SMTP connection per
+message (the previous behaviour), with the pooled connections of
+SMTPConnectionPool, and with the asyncio dispatcher
+(AsyncSMTPConnectionPool) fed by many task threads.
+
+The "pooled" cases run --workers senders in parallel, like a prefork worker
+with that --concurrency, the "asyncio" case runs --async-concurrency
+threads sharing one AsyncSMTPConnectionPool, like a worker started with
+"--pool threads".
+
+A local stand-in SMTP server accepts and discards the messages. It speaks
+plain SMTP, the cost of the TLS handshake and AUTH of a real server is
+simulated with --connect-ms (delay before the greeting) and --auth-ms
+(delay before accepting AUTH), and every command round trip is delayed by
+--rtt-ms.
+
+Usage:
+    python -m benchmarks.smtp_throughput --messages 200
+    python -m benchmarks.smtp_throughput --connect-ms 250 --auth-ms 150
+    python -m benchmarks.smtp_throughput --rtt-ms 40 --async-concurrency 64
+"""
+import argparse
+import smtplib
+import socketserver
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.mime.image import MIMEImage
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from app.utils.smtp_pool import AsyncSMTPConnectionPool, SMTPConnectionPool
+
+
+class _StandInSMTPHandler(socketserver.StreamRequestHandler):
+    def _reply(self, line: str) -> None:
+        time.sleep(self.server.rtt)
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self) -> None:
+        time.sleep(self.server.connect_delay)
+        self._reply("220 stand-in ESMTP")
+        while line := self.rfile.readline():
+            command = line.decode(errors="replace").strip().upper()
+            if command.startswith("EHLO"):
+                self.wfile.write(b"250-stand-in\r\n")
+                self._reply("250 AUTH PLAIN LOGIN")
+            elif command.startswith("AUTH"):
+                time.sleep(self.server.auth_delay)
+                self._reply("235 Authentication successful")
+            elif command.startswith("DATA"):
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                while self.rfile.readline() not in (b".\r\n", b""):
+                    pass
+                self.server.received += 1
+                self._reply("250 OK")
+            elif command.startswith("QUIT"):
+                self._reply("221 Bye")
+                return
+            else:
+                # HELO, MAIL, RCPT, RSET, NOOP
+                self._reply("250 OK")
+
+
+class StandInSMTPServer(socketserver.ThreadingTCPServer):
+    """
+    A minimal SMTP server accepting every message, with simulated latency.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 256
+
+    def __init__(self, connect_delay: float, auth_delay: float, rtt: float):
+        super().__init__(("127.0.0.1", 0), _StandInSMTPHandler)
+        self.connect_delay = connect_delay
+        self.auth_delay = auth_delay
+        self.rtt = rtt
+        self.received = 0
+
+
+def _make_message(attachment_size: int) -> MIMEMultipart:
+    msg = MIMEMultipart()
+    msg["From"] = "bench@example.com"
+    msg["To"] = "recipient@example.com"
+    msg["Subject"] = "Optimized Image"
+    msg.attach(MIMEText("Optimized image is attached."))
+    msg.attach(
+        MIMEImage(b"\xff" * attachment_size, _subtype="jpeg", name="a.jpg")
+    )
+    return msg
+
+
+def send_per_message(host: str, port: int, msg: MIMEMultipart) -> None:
+    with smtplib.SMTP(host, port) as server:
+        server.login("bench", "secret")
+        server.sendmail(msg["From"], msg["To"], msg.as_string())
+
+
+def _measure(name: str, send, count: int, threads: int = 1) -> float:
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        for future in [executor.submit(send) for _ in range(count)]:
+            future.result()
+    elapsed = time.perf_counter() - started
+    rate = count / elapsed
+    print(
+        f"{name:<16} {count} messages in {elapsed:7.2f} s "
+        f"= {rate:8.1f} msg/s"
+    )
+    return rate
+
+
+def main(args: argparse.Namespace) -> None:
+    server = StandInSMTPServer(
+        args.connect_ms / 1000, args.auth_ms / 1000, args.rtt_ms / 1000
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    msg = _make_message(args.attachment_kb * 1024)
+
+    payload = msg.as_string()
+    workers = args.workers
+
+    before = _measure(
+        f"per-message x{workers}",
+        lambda: send_per_message(host, port, msg),
+        args.messages,
+        workers,
+    )
+
+    # One single-connection pool per sender, as in separate processes
+    local = threading.local()
+
+    def send_pooled():
+        if not hasattr(local, "pool"):
+            local.pool = SMTPConnectionPool(
+                host, port, "bench", "secret", use_ssl=False
+            )
+        local.pool.sendmail(msg["From"], msg["To"], payload)
+
+    pooled = _measure(
+        f"pooled x{workers}", send_pooled, args.messages, workers
+    )
+
+    async_pool = AsyncSMTPConnectionPool(
+        host,
+        port,
+        "bench",
+        "secret",
+        use_ssl=False,
+        concurrency=args.async_concurrency,
+    )
+    dispatched = _measure(
+        f"asyncio x{args.async_concurrency}",
+        lambda: async_pool.sendmail(msg["From"], msg["To"], payload),
+        args.messages,
+        args.async_concurrency,
+    )
+    async_pool.close()
+    server.shutdown()
+
+    print(f"pooled speed-up  x{pooled / before:.1f}")
+    print(f"asyncio speed-up x{dispatched / before:.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--async-concurrency", type=int, default=50)
+    parser.add_argument("--attachment-kb", type=int, default=64)
+    parser.add_argument("--connect-ms", type=float, default=150.0)
+    parser.add_argument("--auth-ms", type=float, default=100.0)
+    parser.add_argument("--rtt-ms", type=float, default=5.0)
+    main(parser.parse_args())
@@ -0,0 +1,85 @@
+"""
+Celery configuration, loaded by tasks.py with config_from_object().
+
+Image and email tasks are routed to separate queues, each consumed by its
+own worker (see run.sh), so slow SMTP sends never hold up image work and
+the reverse. The worker started with CELERY_WORKER_QUEUE=<queue> gets the
+pool, concurrency and prefetch settings of that queue from config.py.
+"""
+import os
+
+from kombu import Queue
+
+from config import (
+    CELERY_BROKER_URL,
+    CELERY_RESULT_BACKEND,
+    CELERY_IMAGES_CONCURRENCY,
+    CELERY_IMAGES_PREFETCH_MULTIPLIER,
+    CELERY_IMAGES_ACKS_LATE,
+    CELERY_EMAIL_POOL,
+    CELERY_EMAIL_CONCURRENCY,
+    CELERY_EMAIL_PREFETCH_MULTIPLIER,
+    CELERY_EMAIL_ACKS_LATE,
+)
+
+IMAGES_QUEUE = "images"
+EMAIL_QUEUE = "email"
+
+broker_url = CELERY_BROKER_URL
+result_backend = CELERY_RESULT_BACKEND
+broker_connection_retry_on_startup = True
+
+# Compact binary payloads, JSON is still accepted so messages queued by a
+# previous release are drained.
+task_serializer = "msgpack"
+result_serializer = "msgpack"
+accept_content = ["msgpack", "json"]
+
+task_default_queue = "celery"
+task_queues = (
+    Queue("celery"),
+    Queue(IMAGES_QUEUE),
+    Queue(EMAIL_QUEUE),
+)
+task_routes = {
+    "tasks.process_image_job": {"queue": IMAGES_QUEUE},
+    "tasks.purge_expired_image_jobs": {"queue": IMAGES_QUEUE},
+    "tasks.send_email_message": {"queue": EMAIL_QUEUE},
+    "tasks.send_batch_summary_email": {"queue": EMAIL_QUEUE},
+}
+# Acknowledged after they finish, a job interrupted by a crashed worker is
+# redelivered. Email is acknowledged on receipt by default, a redelivered
+# send would reach the recipient twice.
+task_annotations = {
+    "tasks.process_image_job": {"acks_late": CELERY_IMAGES_ACKS_LATE},
+    "tasks.purge_expired_image_jobs": {"acks_late": CELERY_IMAGES_ACKS_LATE},
+    "tasks.send_email_message": {"acks_late": CELERY_EMAIL_ACKS_LATE},
+    "tasks.send_batch_summary_email": {"acks_late": CELERY_EMAIL_ACKS_LATE},
+}
+task_reject_on_worker_lost = True
+
+beat_schedule = {
+    "purge-expired-image-jobs": {
+        "task": "tasks.purge_expired_image_jobs",
+        "schedule": 600.0,
+    },
+}
+
+_WORKER_SETTINGS = {
+    IMAGES_QUEUE: {
+        "pool": "prefork",
+        "concurrency": CELERY_IMAGES_CONCURRENCY,
+        "prefetch_multiplier": CELERY_IMAGES_PREFETCH_MULTIPLIER,
+    },
+    EMAIL_QUEUE: {
+        "pool": CELERY_EMAIL_POOL,
+        "concurrency": CELERY_EMAIL_CONCURRENCY,
+        "prefetch_multiplier": CELERY_EMAIL_PREFETCH_MULTIPLIER,
+    },
+}
+
+_worker = _WORKER_SETTINGS.get(os.environ.get("CELERY_WORKER_QUEUE", ""))
+if _worker is not None:
+    worker_pool = _worker["pool"]
+    worker_concurrency = _worker["concurrency"]
+    worker_prefetch_multiplier = _worker["prefetch_multiplier"]
@@ -1,5 +1,6 @@
 from dotenv import load_dotenv
 import os
+import tempfile
 from passlib.context import CryptContext
 from fastapi.security import OAuth2PasswordBearer
 
@@ -24,10 +25,205 @@ SECRET_KEY = JWT_SECRET_KEY
 ALGORITHM = JWT_ALGORITHM
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Per-process cache of verified tokens, from token digest to claims.
+AUTH_TOKEN_CACHE_SIZE = int(os.environ.get("AUTH_TOKEN_CACHE_SIZE", 4096))
+
+# Per-process cache of authenticated users, keyed by token subject.
+AUTH_PRINCIPAL_CACHE_SIZE = int(
+    os.environ.get("AUTH_PRINCIPAL_CACHE_SIZE", 1024)
+)
+AUTH_PRINCIPAL_CACHE_TTL_SECONDS = float(
+    os.environ.get("AUTH_PRINCIPAL_CACHE_TTL_SECONDS", 60)
+)
+
+# Stateless tokens carry the user id and admin flag, protected routes then
+# trust the claims without loading the user. Logged out tokens and disabled
+# users are kept in Redis and mirrored in memory by every API process,
+# refreshed every AUTH_REVOCATION_REFRESH_SECONDS.
+AUTH_STATELESS_TOKENS = (
+    os.environ.get("AUTH_STATELESS_TOKENS", "false").lower() == "true"
+)
+AUTH_REVOCATION_REDIS_URL = os.environ.get(
+    "AUTH_REVOCATION_REDIS_URL",
+    os.environ.get("CELERY_BROKER_URL", "redis://localhost:6379/0"),
+)
+AUTH_REVOCATION_REFRESH_SECONDS = float(
+    os.environ.get("AUTH_REVOCATION_REFRESH_SECONDS", 5)
+)
+
+# Token buckets in front of login and registration, checked before any
+# bcrypt work: per client IP and per username, RATE tokens per second up to
+# BURST at once. The backend is "memory" (per API process), "redis" (shared)
+# or "off".
+AUTH_RATE_LIMIT_BACKEND = os.environ.get("AUTH_RATE_LIMIT_BACKEND", "memory")
+AUTH_RATE_LIMIT_REDIS_URL = os.environ.get(
+    "AUTH_RATE_LIMIT_REDIS_URL",
+    os.environ.get("CELERY_BROKER_URL", "redis://localhost:6379/0"),
+)
+AUTH_RATE_LIMIT_IP_RATE = float(os.environ.get("AUTH_RATE_LIMIT_IP_RATE", 1))
+AUTH_RATE_LIMIT_IP_BURST = int(os.environ.get("AUTH_RATE_LIMIT_IP_BURST", 20))
+AUTH_RATE_LIMIT_USERNAME_RATE = float(
+    os.environ.get("AUTH_RATE_LIMIT_USERNAME_RATE", 0.1)
+)
+AUTH_RATE_LIMIT_USERNAME_BURST = int(
+    os.environ.get("AUTH_RATE_LIMIT_USERNAME_BURST", 5)
+)
+# Number of reverse proxies in front of the API that append the address of
+# their client to X-Forwarded-For. The client IP is the entry added by the
+# outermost of them, entries before it may be forged by the client. 0 uses
+# the address of the TCP peer and ignores the header.
+AUTH_TRUSTED_PROXY_HOPS = int(os.environ.get("AUTH_TRUSTED_PROXY_HOPS", 0))
+
+# last_login/last_request are buffered in memory and written in one batched
+# UPDATE every ACTIVITY_FLUSH_INTERVAL_SECONDS, or as soon as
+# ACTIVITY_BUFFER_MAX_USERS users are pending.
+ACTIVITY_FLUSH_INTERVAL_SECONDS = float(
+    os.environ.get("ACTIVITY_FLUSH_INTERVAL_SECONDS", 5)
+)
+ACTIVITY_BUFFER_MAX_USERS = int(
+    os.environ.get("ACTIVITY_BUFFER_MAX_USERS", 10000)
+)
+
+# bcrypt cost factor (log2 of the key expansion rounds), each step doubles
+# the CPU time of every login and registration. Measure it on the host with
+# benchmarks/bcrypt_rounds.py. Hashes of another cost are rehashed at the
+# next successful login.
+BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", 12))
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
-password_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+password_context = pwd_context
 
 SMTP_USER = os.environ.get("SMTP_USER")
 SMTP_PASSWORD = os.environ.get("SMTP_PASSWORD")
+SMTP_HOST = os.environ.get("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.environ.get("SMTP_PORT", 465))
+SMTP_USE_SSL = os.environ.get("SMTP_USE_SSL", "true").lower() == "true"
+
+# Persistent SMTP connections kept by every Celery worker process.
+# Idle connections are checked with NOOP after SMTP_KEEPALIVE_SECONDS and
+# closed after SMTP_MAX_IDLE_SECONDS.
+SMTP_POOL_SIZE = int(os.environ.get("SMTP_POOL_SIZE", 1))
+SMTP_KEEPALIVE_SECONDS = float(os.environ.get("SMTP_KEEPALIVE_SECONDS", 15))
+SMTP_MAX_IDLE_SECONDS = float(os.environ.get("SMTP_MAX_IDLE_SECONDS", 60))
+SMTP_TIMEOUT_SECONDS = float(os.environ.get("SMTP_TIMEOUT_SECONDS", 30))
+
+# Image emails are deduplicated by an idempotency key reserved in Redis for
+# EMAIL_IDEMPOTENCY_TTL_SECONDS.
+EMAIL_IDEMPOTENCY_REDIS_URL = os.environ.get(
+    "EMAIL_IDEMPOTENCY_REDIS_URL",
+    os.environ.get("CELERY_BROKER_URL", "redis://localhost:6379/0"),
+)
+EMAIL_IDEMPOTENCY_TTL_SECONDS = int(
+    os.environ.get("EMAIL_IDEMPOTENCY_TTL_SECONDS", 24 * 3600)
+)
+
+# "pool" sends from the task's own thread over SMTP_POOL_SIZE connections,
+# "asyncio" sends from one event loop per worker process with up to
+# EMAIL_ASYNC_CONCURRENCY sessions in flight (run the email worker with
+# "--pool threads" and a matching --concurrency).
+EMAIL_DISPATCH_MODE = os.environ.get("EMAIL_DISPATCH_MODE", "pool")
+EMAIL_ASYNC_CONCURRENCY = int(os.environ.get("EMAIL_ASYNC_CONCURRENCY", 50))
+
+# Celery broker and the settings of the worker of each queue, see
+# celeryconfig.py. Image work is CPU-bound: one process per core, one task
+# prefetched at a time. Email is I/O-bound: many sends per worker.
+CELERY_BROKER_URL = os.environ.get(
+    "CELERY_BROKER_URL", "redis://localhost:6379/0"
+)
+CELERY_RESULT_BACKEND = os.environ.get("CELERY_RESULT_BACKEND")
+CELERY_IMAGES_CONCURRENCY = int(
+    os.environ.get("CELERY_IMAGES_CONCURRENCY", os.cpu_count() or 1)
+)
+CELERY_IMAGES_PREFETCH_MULTIPLIER = int(
+    os.environ.get("CELERY_IMAGES_PREFETCH_MULTIPLIER", 1)
+)
+CELERY_IMAGES_ACKS_LATE = (
+    os.environ.get("CELERY_IMAGES_ACKS_LATE", "true").lower() == "true"
+)
+CELERY_EMAIL_POOL = os.environ.get(
+    "CELERY_EMAIL_POOL",
+    "threads" if EMAIL_DISPATCH_MODE == "asyncio" else "prefork",
+)
+CELERY_EMAIL_CONCURRENCY = int(
+    os.environ.get(
+        "CELERY_EMAIL_CONCURRENCY",
+        EMAIL_ASYNC_CONCURRENCY if EMAIL_DISPATCH_MODE == "asyncio" else 4,
+    )
+)
+CELERY_EMAIL_PREFETCH_MULTIPLIER = int(
+    os.environ.get("CELERY_EMAIL_PREFETCH_MULTIPLIER", 4)
+)
+CELERY_EMAIL_ACKS_LATE = (
+    os.environ.get("CELERY_EMAIL_ACKS_LATE", "false").lower() == "true"
+)
+
+# Prometheus metrics of a Celery worker are served on CELERY_METRICS_PORT
+# (0 disables them), with the depth of its queues polled every
+# CELERY_QUEUE_DEPTH_INTERVAL seconds. Prefork workers need
+# PROMETHEUS_MULTIPROC_DIR to aggregate their pool processes.
+CELERY_METRICS_PORT = int(os.environ.get("CELERY_METRICS_PORT", 0))
+CELERY_QUEUE_DEPTH_INTERVAL = float(
+    os.environ.get("CELERY_QUEUE_DEPTH_INTERVAL", 15)
+)
+
+# Number of worker processes used for image decoding/encoding.
+# Set to 0 to run the image pipeline inline (debugging only).
+IMAGE_PROCESS_WORKERS = int(
+    os.environ.get("IMAGE_PROCESS_WORKERS", os.cpu_count() or 1)
+)
+
+# Number of threads hashing and verifying passwords (bcrypt) off the event
+# loop. Set to 0 to hash inline (debugging only).
+PASSWORD_HASH_WORKERS = int(
+    os.environ.get("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1))
+)
+
+# Directory shared by the API and the Celery workers, used to hand image
+# bytes to tasks by reference instead of through the broker.
+EMAIL_SPOOL_DIR = os.environ.get(
+    "EMAIL_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "email_spool")
+)
+
+# On-disk cache of optimized images, indexed by the "images" table.
+IMAGE_CACHE_DIR = os.environ.get(
+    "IMAGE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "image_cache")
+)
+IMAGE_CACHE_MAX_BYTES = int(
+    os.environ.get("IMAGE_CACHE_MAX_BYTES", 1024 * 1024 * 1024)
+)
+
+# How long results of asynchronous image jobs are kept, in seconds.
+IMAGE_JOB_TTL_SECONDS = int(os.environ.get("IMAGE_JOB_TTL_SECONDS", 3600))
+
+# Uploads larger than UPLOAD_MAX_BYTES are rejected with 413, uploads
+# larger than UPLOAD_SPOOL_THRESHOLD are spilled to UPLOAD_TMP_DIR.
+UPLOAD_MAX_BYTES = int(os.environ.get("UPLOAD_MAX_BYTES", 64 * 1024 * 1024))
+BATCH_UPLOAD_MAX_BYTES = int(
+    os.environ.get("BATCH_UPLOAD_MAX_BYTES", 2 * 1024 * 1024 * 1024)
+)
+UPLOAD_SPOOL_THRESHOLD = int(
+    os.environ.get("UPLOAD_SPOOL_THRESHOLD", 4 * 1024 * 1024)
+)
+UPLOAD_TMP_DIR = os.environ.get(
+    "UPLOAD_TMP_DIR", os.path.join(tempfile.gettempdir(), "uploads")
+)
+
+# Default widths of responsive image variants (srcset).
+IMAGE_VARIANT_WIDTHS = [
+    int(width)
+    for width in os.environ.get(
+        "IMAGE_VARIANT_WIDTHS", "320,640,960,1280,1920"
+    ).split(",")
+]
+
+# Page size of the list endpoints (?limit=), and the largest one accepted.
+PAGE_SIZE_DEFAULT = int(os.environ.get("PAGE_SIZE_DEFAULT", 100))
+PAGE_SIZE_MAX = int(os.environ.get("PAGE_SIZE_MAX", 1000))
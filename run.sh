@@ -1,7 +1,21 @@
 #!/bin/bash
 
-# Launch of Celery worker
-celery -A  tasks worker -l info --concurrency=2 &
+# Prometheus metric files are opened as soon as tasks.py is imported, their
+# directories must exist, emptied of a previous run, before the workers start
+rm -rf /tmp/prometheus/images /tmp/prometheus/email
+mkdir -p /tmp/prometheus/images /tmp/prometheus/email
+
+# Launch of Celery workers, one per queue (settings in celeryconfig.py),
+# each serving its Prometheus metrics on its own port:
+# image processing on a prefork pool sized to the CPUs
+CELERY_WORKER_QUEUE=images CELERY_METRICS_PORT=9101 \
+PROMETHEUS_MULTIPROC_DIR=/tmp/prometheus/images \
+celery -A tasks worker -l info -Q images -n images@%h &
+
+# email (and the default queue) on a pool sized for SMTP I/O
+CELERY_WORKER_QUEUE=email CELERY_METRICS_PORT=9102 \
+PROMETHEUS_MULTIPROC_DIR=/tmp/prometheus/email \
+celery -A tasks worker -l info -Q email,celery -n email@%h &
 
 # Launching Celery Flower (interface for monitoring Celery)
 celery -A tasks flower -l info &
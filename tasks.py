@@ -1,30 +1,144 @@
+import asyncio
+import os
 from email.mime.image import MIMEImage
 
 from celery import Celery
-import smtplib
+from celery.signals import (
+    worker_process_init,
+    worker_process_shutdown,
+    worker_ready,
+    worker_shutdown,
+)
+from celery.utils.log import get_task_logger
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from config import SMTP_USER, SMTP_PASSWORD
+from app.core.database import worker_session
+from app.core.executors import disable_image_executor
+from app.core.metrics import (
+    EMAIL_DUPLICATES,
+    mark_process_dead,
+    start_worker_metrics,
+)
+from app.repositories.image_repository import ImageRepository
+from app.services.image_service import ImageService
+from app.utils.blob_spool import BlobSpool
+from app.utils.idempotency import IdempotencyStore, email_idempotency_key
+from app.utils.smtp_pool import AsyncSMTPConnectionPool, SMTPConnectionPool
+from config import (
+    SMTP_USER,
+    SMTP_PASSWORD,
+    SMTP_HOST,
+    SMTP_PORT,
+    SMTP_USE_SSL,
+    SMTP_POOL_SIZE,
+    SMTP_KEEPALIVE_SECONDS,
+    SMTP_MAX_IDLE_SECONDS,
+    SMTP_TIMEOUT_SECONDS,
+    EMAIL_DISPATCH_MODE,
+    EMAIL_ASYNC_CONCURRENCY,
+    EMAIL_SPOOL_DIR,
+    EMAIL_IDEMPOTENCY_REDIS_URL,
+    EMAIL_IDEMPOTENCY_TTL_SECONDS,
+    CELERY_METRICS_PORT,
+    CELERY_QUEUE_DEPTH_INTERVAL,
+)
+
+celery = Celery("tasks")
+celery.config_from_object("celeryconfig")
 
-SMTP_HOST = "smtp.gmail.com"
-SMTP_PORT = 465
+logger = get_task_logger(__name__)
 
+email_spool = BlobSpool(EMAIL_SPOOL_DIR)
 
-celery = Celery(
-    "tasks",
-    broker="redis://localhost:6379/0",
-    broker_connection_retry_on_startup=True,
+sent_emails = IdempotencyStore(
+    EMAIL_IDEMPOTENCY_REDIS_URL, "email:sent", EMAIL_IDEMPOTENCY_TTL_SECONDS
 )
 
+# One pool per worker process, connections are opened on first use
+if EMAIL_DISPATCH_MODE == "asyncio":
+    smtp_pool = AsyncSMTPConnectionPool(
+        SMTP_HOST,
+        SMTP_PORT,
+        SMTP_USER,
+        SMTP_PASSWORD,
+        use_ssl=SMTP_USE_SSL,
+        concurrency=EMAIL_ASYNC_CONCURRENCY,
+        max_idle=SMTP_MAX_IDLE_SECONDS,
+        keepalive_interval=SMTP_KEEPALIVE_SECONDS,
+        timeout=SMTP_TIMEOUT_SECONDS,
+    )
+else:
+    smtp_pool = SMTPConnectionPool(
+        SMTP_HOST,
+        SMTP_PORT,
+        SMTP_USER,
+        SMTP_PASSWORD,
+        use_ssl=SMTP_USE_SSL,
+        max_size=SMTP_POOL_SIZE,
+        max_idle=SMTP_MAX_IDLE_SECONDS,
+        keepalive_interval=SMTP_KEEPALIVE_SECONDS,
+        timeout=SMTP_TIMEOUT_SECONDS,
+    )
+
+
+@worker_ready.connect
+def start_metrics(sender, **kwargs):
+    # Served by the main worker process, which aggregates the pool processes
+    if CELERY_METRICS_PORT:
+        start_worker_metrics(
+            CELERY_METRICS_PORT,
+            sender.app.conf.broker_url,
+            sender.app.amqp.queues.consume_from,
+            CELERY_QUEUE_DEPTH_INTERVAL,
+        )
+
+
+@worker_process_init.connect
+def init_worker_process(**kwargs):
+    # Pool processes are daemonic and cannot start the image process pool,
+    # each of them runs image work inline instead
+    disable_image_executor()
+
+
+@worker_process_shutdown.connect
+def shutdown_worker_process(**kwargs):
+    smtp_pool.close()
+    mark_process_dead(os.getpid())
+
+
+@worker_shutdown.connect
+def shutdown_worker(**kwargs):
+    # The solo and threads pools run tasks in the main worker process, which
+    # never gets worker_process_shutdown. close() is a no-op when the pool
+    # was already closed, or never used in this process.
+    smtp_pool.close()
+
+
+def _send_message(msg):
+    """
+    Sends a prepared email message over a pooled SMTP connection.
+
+    Args:
+        msg (MIMEMultipart): The message to send, with "To" set.
+    """
+    smtp_pool.sendmail(SMTP_USER, msg["To"], msg.as_string())
 
-@celery.task
-def send_email_message(image_bytes, recipient_email):
+
+@celery.task(ignore_result=True)
+def send_email_message(
+    image_key, recipient_email, media_type="image/jpeg", idempotency_key=None
+):
     """
     Celery task to send an email with an optimized image attachment.
 
     Args:
-        image_bytes (bytes): The optimized image content as bytes.
+        image_key (str): The key of the optimized image in the email spool.
         recipient_email (str): The email address of the recipient.
+        media_type (str, optional): The media type of the optimized image.
+            Defaults to "image/jpeg".
+        idempotency_key (str, optional): Emails with the same key are sent
+            only once within EMAIL_IDEMPOTENCY_TTL_SECONDS. Defaults to a
+            key derived from the image hash and the recipient.
 
     Returns:
         None
@@ -34,24 +148,43 @@ def send_email_message(image_bytes, recipient_email):
 
     Comments:
         - This task is designed to be used asynchronously with Celery.
-            It takes the optimized image content in bytes and the
-            recipient's email address as arguments.
+            It takes the spool key of the optimized image and the
+            recipient's email address as arguments, so the image bytes
+            never travel through the broker.
+
+        - The idempotency key is reserved in Redis (SET NX EX) before
+            anything else, a duplicate (retry, redelivery, re-submitted
+            upload) only releases its spool reference and returns. The key
+            is released again if the send fails.
+
+        - The image is memory-mapped from the spool and its reference is
+            released once the email has been sent successfully.
 
         - The function creates a MIMEMultipart object for an email, attaches a
             text message, and adds the optimized image as an attachment.
 
-        - It uses SMTP_SSL to establish a secure connection to the SMTP server
-            and sends the email.
+        - It sends the email over a persistent SMTP connection of the
+            worker process, which is opened (SMTP_SSL + login) only once.
 
-        - The function is decorated with @celery.task to make it a Celery task.
+        - The function is decorated with @celery.task to make it a Celery task,
+            its result is not stored since nothing waits for it.
 
         - If any exception occurs during the email sending process,
-            it is caught, and an error message is printed to the console.
-            You may consider logging the error for better tracking.
+            it is logged and re-raised, so the task is counted as failed
+            in the worker metrics.
 
     Usage:
-        send_email_message.delay(optimized_image_bytes, "recipient@example.com")
+        image_key = email_spool.put(optimized_image_bytes)
+        send_email_message.delay(image_key, "recipient@example.com")
     """
+    if idempotency_key is None:
+        idempotency_key = email_idempotency_key(image_key, recipient_email)
+    if not sent_emails.reserve(idempotency_key):
+        EMAIL_DUPLICATES.inc()
+        logger.info("Dropping duplicate email to %s", recipient_email)
+        email_spool.release(image_key)
+        return
+
     try:
         # Create a MIMEMultipart object for an email
         msg = MIMEMultipart()
@@ -67,13 +200,113 @@ def send_email_message(image_bytes, recipient_email):
         msg.attach(text)
 
         # Add an optimized image as an attachment
-        img = MIMEImage(image_bytes, name="optimized_image.jpg")
+        with email_spool.open(image_key) as image_bytes:
+            subtype = media_type.split("/")[-1]
+            img = MIMEImage(
+                image_bytes,
+                _subtype=subtype,
+                name=f"optimized_image.{subtype.replace('jpeg', 'jpg')}",
+            )
         msg.attach(img)
 
         # Establish a connection and send an email
-        with smtplib.SMTP_SSL(SMTP_HOST, SMTP_PORT) as server:
-            server.login(SMTP_USER, SMTP_PASSWORD)
-            server.sendmail(SMTP_USER, msg["To"], msg.as_string())
+        _send_message(msg)
+
+        email_spool.release(image_key)
+
+    except Exception:
+        sent_emails.release(idempotency_key)
+        logger.exception("Failed to send email to %s", recipient_email)
+        raise
+
+
+@celery.task(ignore_result=True)
+def send_batch_summary_email(recipient_email, summary):
+    """
+    Celery task to send one summary email for a batch image optimization.
+
+    Args:
+        recipient_email (str): The email address of the recipient.
+        summary (list[dict]): One item per image with "name" and either
+            "size" (bytes of the optimized image) or "error".
+
+    Returns:
+        None
+
+    Usage:
+        send_batch_summary_email.delay(
+            "recipient@example.com",
+            [
+                {"name": "a.jpg", "size": 1024},
+                {"name": "b.png", "error": "cannot identify image file"},
+            ],
+        )
+    """
+    try:
+        msg = MIMEMultipart()
+        msg["From"] = SMTP_USER
+        msg["To"] = recipient_email
+        msg["Subject"] = "Optimized Images"
+
+        optimized = [item for item in summary if "error" not in item]
+        lines = [
+            f"{len(optimized)} of {len(summary)} images were optimized.",
+            "",
+        ]
+        for item in summary:
+            if "error" in item:
+                lines.append(f"{item['name']}: failed ({item['error']})")
+            else:
+                lines.append(f"{item['name']}: {item['size']} bytes")
+        msg.attach(MIMEText("\n".join(lines)))
+
+        _send_message(msg)
+
+    except Exception:
+        logger.exception("Failed to send email to %s", recipient_email)
+        raise
+
+
+async def _run_image_job(job_id):
+    async with worker_session() as session:
+        service = ImageService(image_repo=ImageRepository(session))
+        await service.run_job(job_id)
+
+
+async def _purge_expired_image_jobs():
+    async with worker_session() as session:
+        service = ImageService(image_repo=ImageRepository(session))
+        return await service.purge_expired_jobs()
+
+
+@celery.task(ignore_result=True)
+def process_image_job(job_id):
+    """
+    Celery task to process an asynchronous image optimization job.
+
+    Args:
+        job_id (int): The ID of the job in the "images" table.
+
+    Returns:
+        None
+
+    Comments:
+        - The job status and progress are written to the "images" table
+            while the image is processed, the result is stored in the
+            image spool until the job expires.
 
-    except Exception as e:
-        print(f"Failed to send email: {str(e)}")
+    Usage:
+        process_image_job.delay(job.id)
+    """
+    asyncio.run(_run_image_job(job_id))
+
+
+@celery.task(ignore_result=True)
+def purge_expired_image_jobs():
+    """
+    Periodic Celery task deleting expired image jobs and their results.
+
+    Returns:
+        int: The number of released blobs.
+    """
+    return asyncio.run(_purge_expired_image_jobs())
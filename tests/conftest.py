@@ -0,0 +1,113 @@
+import os
+import tempfile
+
+# config.py reads the environment at import time, set it before any app
+# module is imported
+_TMP_DIR = tempfile.mkdtemp(prefix="app-tests-")
+os.environ.setdefault("DB_USER", "test")
+os.environ.setdefault("DB_PASS", "test")
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("DB_PORT", "5432")
+os.environ.setdefault("DB_NAME", "test")
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret")
+os.environ.setdefault("JWT_ALGORITHM", "HS256")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+# Tests log in many times from the same address, the limiters are tested
+# on their own
+os.environ.setdefault("AUTH_RATE_LIMIT_BACKEND", "off")
+# Image work runs inline instead of in a process pool
+os.environ.setdefault("IMAGE_PROCESS_WORKERS", "0")
+for _name in ("EMAIL_SPOOL_DIR", "IMAGE_CACHE_DIR", "UPLOAD_TMP_DIR"):
+    os.environ.setdefault(_name, os.path.join(_TMP_DIR, _name.lower()))
+
+import pytest  # noqa: E402
+import pytest_asyncio  # noqa: E402
+from sqlalchemy.ext.asyncio import (  # noqa: E402
+    AsyncSession,
+    create_async_engine,
+)
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def empty_principal_cache():
+    """
+    Users cached by a test must not leak into the next one, their IDs are
+        reused by every fresh database.
+    """
+    from app.auth.principal_cache import principal_cache
+
+    principal_cache.invalidate()
+    yield
+    principal_cache.invalidate()
+
+
+@pytest_asyncio.fixture
+async def session_factory():
+    """
+    An in-memory SQLite database with every table created, shared by all
+        sessions of a test.
+    """
+    from sqlalchemy.pool import StaticPool
+
+    from app.core.database import Base
+
+    engine = create_async_engine(
+        "sqlite+aiosqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def session(session_factory):
+    async with session_factory() as session:
+        yield session
+
+
+@pytest_asyncio.fixture
+async def client(session_factory, monkeypatch):
+    """
+    An HTTP client for the app, backed by the test database. Startup
+        handlers (table creation, background loops) are not run.
+    """
+    import httpx
+
+    from app.api import images
+    from app.main import app
+    from app.utils.dependencies.get_session import get_session
+
+    async def get_test_session():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_session] = get_test_session
+    monkeypatch.setattr(images, "async_session", session_factory)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://test"
+    ) as client:
+        yield client
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def jpeg_bytes():
+    """
+    Builds a JPEG of the given size.
+    """
+    import io
+
+    from PIL import Image
+
+    def make(width: int, height: int, quality: int = 90) -> bytes:
+        image = Image.linear_gradient("L").resize((width, height))
+        output = io.BytesIO()
+        image.convert("RGB").save(output, format="JPEG", quality=quality)
+        return output.getvalue()
+
+    return make
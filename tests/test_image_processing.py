@@ -0,0 +1,165 @@
+import io
+import subprocess
+import sys
+import textwrap
+
+import pytest
+from PIL import Image
+
+from app.utils.image_processing import (
+    TargetNotMetError,
+    _encode,
+    _psnr,
+    _scaled_size,
+    encode_image,
+    encode_image_to_target,
+)
+
+
+def _size(data: bytes) -> tuple[int, int]:
+    return Image.open(io.BytesIO(data)).size
+
+
+@pytest.mark.parametrize(
+    "max_width, max_height, fit, expected",
+    [
+        (800, None, "contain", (800, 533)),
+        (800, None, "cover", (800, 533)),
+        (None, 500, "cover", (750, 500)),
+        (800, 800, "contain", (800, 533)),
+        (800, 800, "cover", (1200, 800)),
+        (None, None, "cover", (3000, 2000)),
+        (6000, None, "cover", (3000, 2000)),
+    ],
+)
+def test_scaled_size(max_width, max_height, fit, expected):
+    assert _scaled_size((3000, 2000), max_width, max_height, fit) == expected
+
+
+def test_cover_with_a_single_bound_downscales(jpeg_bytes):
+    result = encode_image(
+        jpeg_bytes(3000, 2000), 80, max_width=800, fit="cover"
+    )
+
+    assert _size(result.data) == (800, 533)
+
+
+def test_cover_with_both_bounds_crops(jpeg_bytes):
+    result = encode_image(
+        jpeg_bytes(3000, 2000), 80, max_width=800, max_height=800, fit="cover"
+    )
+
+    assert _size(result.data) == (800, 800)
+
+
+# Runs in a fresh interpreter so the high-water mark of the process only
+# reflects the decode. Pillow allocates bitmaps outside the Python heap, so
+# peak RSS (VmHWM) is measured rather than tracemalloc.
+_PEAK_SCRIPT = textwrap.dedent(
+    """
+    import sys
+
+    from app.utils.image_processing import encode_image
+
+    def peak_kb():
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+
+    max_width = int(sys.argv[2]) if sys.argv[2] != "none" else None
+    baseline = peak_kb()
+    encode_image(sys.argv[1], 80, max_width=max_width)
+    print(peak_kb() - baseline)
+    """
+)
+
+
+def _peak_delta_mb(path: str, max_width) -> float:
+    output = subprocess.run(
+        [sys.executable, "-c", _PEAK_SCRIPT, path, str(max_width).lower()],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return int(output.stdout.strip().splitlines()[-1]) / 1024
+
+
+@pytest.mark.skipif(
+    not sys.platform.startswith("linux"), reason="reads /proc/self/status"
+)
+def test_draft_decode_peak_memory(tmp_path, jpeg_bytes):
+    # 24 MP, a full RGB decode alone needs 72 MB
+    path = tmp_path / "large.jpg"
+    path.write_bytes(jpeg_bytes(6000, 4000))
+
+    downscaled = _peak_delta_mb(str(path), 1024)
+    full = _peak_delta_mb(str(path), None)
+
+    assert full > 60
+    # draft() decodes at 1/4 scale (1500x1000, 4.5 MB) before resizing
+    assert downscaled < 30
+
+
+@pytest.fixture(scope="module")
+def textured():
+    """
+    A 256x256 image with detail, so that encoded size and PSNR vary with
+        the quality.
+    """
+    size = (256, 256)
+    image = Image.merge(
+        "RGB",
+        [
+            Image.effect_mandelbrot(size, (-2, -1.5, 1, 1.5), 100),
+            Image.linear_gradient("L").resize(size),
+            Image.radial_gradient("L").resize(size),
+        ],
+    )
+    output = io.BytesIO()
+    image.save(output, format="PNG")
+    return image, output.getvalue()
+
+
+def test_target_size_is_met_at_the_highest_quality(textured):
+    image, data = textured
+
+    result = encode_image_to_target(data, max_bytes=5000)
+
+    assert len(result.data) <= 5000
+    assert len(_encode(image, "JPEG", result.quality + 1, True)) > 5000
+
+
+def test_target_psnr_forces_a_higher_quality(textured):
+    image, data = textured
+    cheapest = encode_image_to_target(data, max_bytes=10**6, min_psnr=28)
+
+    result = encode_image_to_target(data, min_psnr=33)
+
+    assert result.quality > cheapest.quality
+    assert _psnr(image, result.data) >= 33
+    lower = _encode(image, "JPEG", result.quality - 1, True)
+    assert _psnr(image, lower) < 33
+
+
+def test_target_within_both_bounds(textured):
+    image, data = textured
+
+    result = encode_image_to_target(data, max_bytes=6000, min_psnr=31)
+
+    assert len(result.data) <= 6000
+    assert _psnr(image, result.data) >= 31
+
+
+def test_unreachable_target(textured):
+    _, data = textured
+
+    with pytest.raises(TargetNotMetError):
+        encode_image_to_target(data, max_bytes=3000, min_psnr=33)
+
+
+def test_target_is_required(textured):
+    _, data = textured
+
+    with pytest.raises(ValueError):
+        encode_image_to_target(data)
@@ -0,0 +1,249 @@
+import datetime
+import io
+import tempfile
+import zipfile
+
+import pytest
+from fastapi import UploadFile
+
+from app.api import images
+
+
+@pytest.fixture
+def summary_email(mocker):
+    return mocker.patch.object(images.send_batch_summary_email, "delay")
+
+
+def _upload(name: str, data: bytes) -> UploadFile:
+    file = tempfile.TemporaryFile()
+    file.write(data)
+    file.seek(0)
+    return UploadFile(file=file, filename=name)
+
+
+async def _optimize_batch(files: list[UploadFile]):
+    return await images.optimize_batch(
+        files=files,
+        archive=None,
+        quality=50,
+        email="user@example.com",
+        output_format="JPEG",
+        max_bytes=None,
+        min_psnr=None,
+        max_width=None,
+        max_height=None,
+        fit="contain",
+    )
+
+
+@pytest.fixture
+def detached(monkeypatch):
+    """
+    Records the file objects detached from the uploads of a batch.
+    """
+    files = []
+    detach = images._detach
+
+    def recording_detach(file):
+        files.append(detach(file))
+        return files[-1]
+
+    monkeypatch.setattr(images, "_detach", recording_detach)
+    return files
+
+
+@pytest.mark.asyncio
+async def test_optimize_batch(client, jpeg_bytes, summary_email):
+    response = await client.post(
+        "/images/optimize-batch/",
+        data={"email": "user@example.com"},
+        files=[
+            ("files", ("a.jpg", jpeg_bytes(64, 48), "image/jpeg")),
+            ("files", ("b.jpg", b"not an image", "image/jpeg")),
+        ],
+    )
+
+    assert response.status_code == 200
+    names = zipfile.ZipFile(io.BytesIO(response.content)).namelist()
+    assert names == ["a.jpg"]
+
+    summary_email.assert_called_once()
+    email, summary = summary_email.call_args.args
+    assert email == "user@example.com"
+    by_name = {item["name"]: item for item in summary}
+    assert by_name["a.jpg"]["size"] > 0
+    assert by_name["b.jpg"]["error"] == "not a supported image"
+
+
+@pytest.mark.asyncio
+async def test_optimize_batch_client_disconnect(
+    session_factory, monkeypatch, jpeg_bytes, summary_email, detached
+):
+    monkeypatch.setattr(images, "async_session", session_factory)
+    files = [_upload(f"{i}.jpg", jpeg_bytes(64, 48)) for i in range(3)]
+
+    response = await _optimize_batch(files)
+    stream = response.body_iterator
+    await stream.__anext__()
+    # What Starlette does when the client goes away mid-stream
+    await stream.aclose()
+
+    assert all(file.closed for file in detached)
+    summary_email.assert_called_once()
+    _, summary = summary_email.call_args.args
+    assert sorted(item["name"] for item in summary) == [
+        "0.jpg",
+        "1.jpg",
+        "2.jpg",
+    ]
+    assert "not processed, download interrupted" in [
+        item.get("error") for item in summary
+    ]
+
+
+@pytest.mark.asyncio
+async def test_optimize_batch_closes_uploads_if_never_streamed(
+    jpeg_bytes, summary_email, detached
+):
+    files = [_upload(f"{i}.jpg", jpeg_bytes(64, 48)) for i in range(2)]
+
+    response = await _optimize_batch(files)
+    await response.background()
+
+    assert len(detached) == 2
+    assert all(file.closed for file in detached)
+    summary_email.assert_not_called()
+
+
+def test_batch_error_hides_internal_details():
+    error = ValueError("<_io.BytesIO object at 0x7f0000000000>")
+
+    assert images._batch_error(error) == "the image could not be optimized"
+
+
+@pytest.mark.asyncio
+async def test_image_job(client, session, jpeg_bytes, mocker):
+    from app.repositories.image_repository import ImageRepository
+    from app.services.image_service import ImageService, image_cache
+
+    process_job = mocker.patch.object(images.process_image_job, "delay")
+    source = jpeg_bytes(64, 48)
+
+    response = await client.post(
+        "/images/jobs", files={"file": ("a.jpg", source, "image/jpeg")}
+    )
+
+    assert response.status_code == 202
+    job_id = response.json()["id"]
+    assert response.json()["status"] == "pending"
+    process_job.assert_called_once_with(job_id)
+
+    service = ImageService(image_repo=ImageRepository(session))
+    job = await service.get_job(job_id)
+    assert job.source_hash == image_cache.key_for(source)
+    assert image_cache.exists(job.source_key)
+    await service.run_job(job_id)
+
+    response = await client.get(f"/images/jobs/{job_id}")
+    assert response.json()["status"] == "done"
+    response = await client.get(f"/images/jobs/{job_id}/result")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/jpeg"
+
+    # The result is evicted from the cache before the job expires
+    job = await service.get_job(job_id)
+    while image_cache.exists(job.blob_key):
+        image_cache.release(job.blob_key)
+    response = await client.get(f"/images/jobs/{job_id}/result")
+    assert response.status_code == 410
+
+
+@pytest.mark.asyncio
+async def test_failed_image_job_releases_its_source(client, session, mocker):
+    from app.repositories.image_repository import ImageRepository
+    from app.services.image_service import ImageService, image_cache
+
+    mocker.patch.object(images.process_image_job, "delay")
+    response = await client.post(
+        "/images/jobs",
+        files={"file": ("a.jpg", b"corrupt image", "image/jpeg")},
+    )
+    job_id = response.json()["id"]
+    service = ImageService(image_repo=ImageRepository(session))
+    source_key = (await service.get_job(job_id)).source_key
+
+    await service.run_job(job_id)
+
+    response = await client.get(f"/images/jobs/{job_id}")
+    assert response.json()["status"] == "failed"
+    assert response.json()["error"]
+    assert not image_cache.exists(source_key)
+
+    # Expired, the source is not released a second time
+    await service.image_repo.update_image(
+        job_id, expires_at=datetime.datetime(2000, 1, 1)
+    )
+    assert await service.purge_expired_jobs() == 0
+
+
+@pytest.mark.asyncio
+async def test_purge_releases_sources_of_failed_jobs(session):
+    from app.models import Images
+    from app.repositories.image_repository import ImageRepository
+    from app.services.image_service import ImageService, image_cache
+
+    # Failed without releasing its source
+    source_key = image_cache.put(b"leaked source")
+    session.add(
+        Images(
+            kind="job",
+            status="failed",
+            source_key=source_key,
+            expires_at=datetime.datetime(2000, 1, 1),
+        )
+    )
+    await session.commit()
+    service = ImageService(image_repo=ImageRepository(session))
+
+    assert await service.purge_expired_jobs() == 1
+    assert not image_cache.exists(source_key)
+
+
+@pytest.mark.asyncio
+async def test_image_job_not_found(client):
+    response = await client.get("/images/jobs/1/result")
+
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_image_variants(client, jpeg_bytes):
+    response = await client.post(
+        "/images/variants/",
+        params={"widths": "32,16"},
+        files={"file": ("a.jpg", jpeg_bytes(64, 48), "image/jpeg")},
+    )
+
+    assert response.status_code == 200
+    variants = response.json()["variants"]
+    assert sorted((v["width"], v["height"]) for v in variants) == [
+        (16, 12),
+        (32, 24),
+    ]
+
+    for variant in variants:
+        response = await client.get(f"/images/variants/{variant['id']}")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == variant["media_type"]
+        assert len(response.content) == variant["size"]
+
+
+@pytest.mark.asyncio
+async def test_image_variants_invalid_widths(client, jpeg_bytes):
+    response = await client.post(
+        "/images/variants/",
+        params={"widths": "32,0"},
+        files={"file": ("a.jpg", jpeg_bytes(64, 48), "image/jpeg")},
+    )
+
+    assert response.status_code == 400
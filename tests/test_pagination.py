@@ -0,0 +1,123 @@
+import base64
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import insert
+
+from app.models import Category, Task
+from app.repositories.task_repository import TaskRepository
+from app.utils.pagination import decode_cursor, encode_cursor
+
+
+@pytest.mark.parametrize("last_id", [1, 99, 2**40])
+def test_cursor_round_trip(last_id):
+    cursor = encode_cursor(last_id)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == last_id
+
+
+def test_no_cursor():
+    assert encode_cursor(None) is None
+    assert decode_cursor(None) is None
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not a cursor",
+        base64.urlsafe_b64encode(b"[1]").decode(),
+        base64.urlsafe_b64encode(b'{"after": 1}').decode(),
+        base64.urlsafe_b64encode(b'{"id": "1"}').decode(),
+    ],
+)
+def test_invalid_cursor(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+
+    assert error.value.status_code == 400
+
+
+async def _add_tasks(session, count: int) -> None:
+    await session.execute(
+        insert(Task), [{"title": f"task {i}"} for i in range(count)]
+    )
+    await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_get_page(session):
+    await _add_tasks(session, 5)
+    repo = TaskRepository(session)
+
+    first, after = await repo.get_page(2)
+    second, after = await repo.get_page(2, after=after)
+    last, after = await repo.get_page(2, after=after)
+
+    assert [task.id for task in first + second + last] == [1, 2, 3, 4, 5]
+    assert after is None
+
+
+@pytest.mark.asyncio
+async def test_exact_last_page_has_no_cursor(session):
+    await _add_tasks(session, 4)
+    repo = TaskRepository(session)
+
+    _, after = await repo.get_page(2)
+    page, after = await repo.get_page(2, after=after)
+
+    assert len(page) == 2
+    assert after is None
+
+
+@pytest.mark.asyncio
+async def test_walk_all_tasks(client, session):
+    await _add_tasks(session, 7)
+
+    titles, params = [], {"limit": 3}
+    while True:
+        response = await client.get("/tasks/all_tasks/", params=params)
+        assert response.status_code == 200
+        body = response.json()
+        titles += [task["title"] for task in body["tasks"]]
+        if body["next_cursor"] is None:
+            break
+        params["after"] = body["next_cursor"]
+
+    assert titles == [f"task {i}" for i in range(7)]
+
+
+@pytest.mark.asyncio
+async def test_walk_all_categories(client, session):
+    await session.execute(
+        insert(Category), [{"name": f"category {i}"} for i in range(3)]
+    )
+    await session.commit()
+
+    response = await client.get(
+        "/categories/all_categories/", params={"limit": 2}
+    )
+    body = response.json()
+    assert len(body["categories"]) == 2
+    response = await client.get(
+        "/categories/all_categories/",
+        params={"limit": 2, "after": body["next_cursor"]},
+    )
+
+    assert [c["name"] for c in response.json()["categories"]] == ["category 2"]
+    assert response.json()["next_cursor"] is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "params, status_code",
+    [
+        ({"limit": 0}, 422),
+        ({"limit": 1001}, 422),
+        ({"after": "garbage"}, 400),
+    ],
+)
+async def test_invalid_page_parameters(client, params, status_code):
+    response = await client.get("/tasks/all_tasks/", params=params)
+
+    assert response.status_code == status_code
@@ -0,0 +1,142 @@
+import datetime
+
+import pytest
+from sqlalchemy import delete, update
+
+from app.auth import principal_cache as principal_cache_module
+from app.auth.principal_cache import PrincipalCache, principal_cache
+from app.auth.security import create_jwt_token
+from app.models import User
+
+
+@pytest.fixture
+def user_factory(session):
+    async def make(username: str) -> User:
+        user = User(
+            username=username,
+            full_name=username.title(),
+            email=f"{username}@example.com",
+            hashed_password="x",
+            is_admin=False,
+        )
+        session.add(user)
+        await session.commit()
+        return user
+
+    return make
+
+
+def test_entries_expire(monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr(principal_cache_module.time, "monotonic", lambda: now)
+    cache = PrincipalCache(maxsize=10, ttl=30)
+    cache.put("alice", User(id=1, username="alice"))
+
+    now += 29
+    assert cache.get("alice").id == 1
+    now += 2
+    assert cache.get("alice") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PrincipalCache(maxsize=2, ttl=30)
+    cache.put("alice", User(id=1, username="alice"))
+    cache.put("bob", User(id=2, username="bob"))
+    cache.get("alice")
+    cache.put("carol", User(id=3, username="carol"))
+
+    assert cache.get("bob") is None
+    assert cache.get("alice") is not None
+    assert cache.get("carol") is not None
+
+
+def test_hits_are_transient_copies():
+    cache = PrincipalCache(maxsize=2, ttl=30)
+    cache.put("alice", User(id=1, username="alice"))
+
+    first, second = cache.get("alice"), cache.get("alice")
+
+    assert first is not second
+    assert first.username == second.username == "alice"
+
+
+@pytest.mark.asyncio
+async def test_flushed_update_invalidates(session, user_factory):
+    user = await user_factory("alice")
+    principal_cache.put("alice", user)
+
+    user.username = "alicia"
+    await session.commit()
+
+    assert principal_cache.get("alice") is None
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_invalidates(session, user_factory):
+    principal_cache.put("alice", await user_factory("alice"))
+
+    await session.execute(
+        update(User)
+        .values(last_request=datetime.datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+
+    assert principal_cache.get("alice") is None
+
+
+@pytest.mark.asyncio
+async def test_bulk_delete_invalidates(session, user_factory):
+    principal_cache.put("alice", await user_factory("alice"))
+
+    await session.execute(
+        delete(User).execution_options(synchronize_session=False)
+    )
+
+    assert principal_cache.get("alice") is None
+
+
+@pytest.mark.asyncio
+async def test_statement_can_skip_invalidation(session, user_factory):
+    principal_cache.put("alice", await user_factory("alice"))
+
+    await session.execute(
+        update(User)
+        .values(last_request=datetime.datetime.utcnow())
+        .execution_options(
+            synchronize_session=False, invalidate_principals=False
+        )
+    )
+
+    assert principal_cache.get("alice") is not None
+
+
+@pytest.mark.asyncio
+async def test_authenticated_request_is_served_from_cache(
+    client, user_factory, mocker
+):
+    await user_factory("alice")
+    mocker.patch("app.api.user.UserService.set_user_disabled")
+    token = await create_jwt_token({"sub": "alice"})
+    headers = {"Authorization": f"Bearer {token}"}
+
+    for _ in range(3):
+        response = await client.post("/users/bob/disable/", headers=headers)
+        assert response.status_code == 204
+
+    assert principal_cache.get("alice").username == "alice"
+    assert principal_cache.hits >= 2
+
+
+def test_activity_timestamps_are_not_cached():
+    cache = PrincipalCache(maxsize=2, ttl=30)
+    now = datetime.datetime.utcnow()
+    cache.put(
+        "alice",
+        User(id=1, username="alice", last_login=now, last_request=now),
+    )
+
+    user = cache.get("alice")
+
+    assert user.username == "alice"
+    assert user.last_login is None and user.last_request is None
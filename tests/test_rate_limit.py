@@ -0,0 +1,165 @@
+import pytest
+from starlette.requests import Request
+
+from app.utils import rate_limit
+from app.utils.dependencies import rate_limit as rate_limit_dependencies
+from app.utils.rate_limit import MemoryTokenBucket
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rate_limit, "_monotonic", lambda: now[0])
+    return now
+
+
+def test_burst_then_rejected(clock):
+    limiter = MemoryTokenBucket(rate=1, burst=3)
+
+    assert [limiter.take("a") for _ in range(3)] == [0, 0, 0]
+    assert limiter.take("a") == pytest.approx(1)
+    # Other keys have their own bucket
+    assert limiter.take("b") == 0
+
+
+def test_refill(clock):
+    limiter = MemoryTokenBucket(rate=0.5, burst=2)
+    limiter.take("a")
+    limiter.take("a")
+
+    clock[0] += 1
+    assert limiter.take("a") == pytest.approx(1)
+    clock[0] += 1
+    assert limiter.take("a") == 0
+    assert limiter.take("a") == pytest.approx(2)
+
+
+def test_refill_is_capped_at_burst(clock):
+    limiter = MemoryTokenBucket(rate=1, burst=2)
+    limiter.take("a")
+
+    clock[0] += 3600
+    assert [limiter.take("a") for _ in range(2)] == [0, 0]
+    assert limiter.take("a") > 0
+
+
+def test_least_recently_used_key_is_evicted(clock):
+    limiter = MemoryTokenBucket(rate=1, burst=2, max_keys=2)
+    limiter.take("a")
+    limiter.take("b")
+    limiter.take("a")
+    limiter.take("c")
+
+    assert list(limiter._buckets) == ["a", "c"]
+
+
+def test_rotating_keys_do_not_reset_an_attacked_key(clock):
+    limiter = MemoryTokenBucket(rate=0.001, burst=2, max_keys=100)
+    limiter.take("victim")
+    limiter.take("victim")
+
+    for i in range(1000):
+        # The attacker keeps trying the victim between rotated keys
+        limiter.take(f"rotated {i}")
+        assert limiter.take("victim") > 0
+
+
+def _request(peer: str, forwarded: str = None) -> Request:
+    headers = []
+    if forwarded is not None:
+        headers.append((b"x-forwarded-for", forwarded.encode()))
+    return Request(
+        {"type": "http", "headers": headers, "client": (peer, 50000)}
+    )
+
+
+@pytest.mark.parametrize(
+    "hops, forwarded, expected",
+    [
+        (0, "203.0.113.7", "10.0.0.2"),
+        (1, None, "10.0.0.2"),
+        (1, "203.0.113.7", "203.0.113.7"),
+        # The first entry is forged by the client
+        (1, "198.51.100.1, 203.0.113.7", "203.0.113.7"),
+        (2, "198.51.100.1, 203.0.113.7, 10.0.0.1", "203.0.113.7"),
+        (2, "203.0.113.7", "203.0.113.7"),
+    ],
+)
+def test_client_ip(monkeypatch, hops, forwarded, expected):
+    monkeypatch.setattr(
+        rate_limit_dependencies, "AUTH_TRUSTED_PROXY_HOPS", hops
+    )
+
+    request = _request("10.0.0.2", forwarded)
+
+    assert rate_limit_dependencies._client_ip(request) == expected
+
+
+@pytest.fixture
+def register(mocker):
+    return mocker.patch(
+        "app.services.user_service.UserService.register_user",
+        side_effect=lambda item: {
+            "id": 1,
+            "username": item.username,
+            "full_name": item.full_name,
+            "email": item.email,
+        },
+    )
+
+
+def _registration(username: str) -> dict:
+    return {
+        "username": username,
+        "full_name": "Alice",
+        "email": f"{username}@example.com",
+        "password": "secret",
+    }
+
+
+@pytest.mark.asyncio
+async def test_registration_is_rate_limited_per_ip(
+    client, monkeypatch, register
+):
+    monkeypatch.setattr(
+        rate_limit_dependencies,
+        "ip_limiter",
+        MemoryTokenBucket(rate=0.01, burst=2),
+    )
+
+    statuses = [
+        (
+            await client.post(
+                "/users/create_user/", json=_registration(f"user{i}")
+            )
+        ).status_code
+        for i in range(3)
+    ]
+
+    assert statuses == [200, 200, 429]
+    assert register.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_registration_is_rate_limited_per_username(
+    client, monkeypatch, register
+):
+    monkeypatch.setattr(
+        rate_limit_dependencies,
+        "username_limiter",
+        MemoryTokenBucket(rate=0.01, burst=2),
+    )
+    monkeypatch.setattr(rate_limit_dependencies, "AUTH_TRUSTED_PROXY_HOPS", 1)
+
+    statuses = []
+    for i, username in enumerate(["alice", "Alice", "ALICE"]):
+        response = await client.post(
+            "/users/create_user/",
+            json=_registration(username),
+            # A different client IP every time
+            headers={"X-Forwarded-For": f"203.0.113.{i}"},
+        )
+        statuses.append(response.status_code)
+
+    assert statuses == [200, 200, 429]
+    assert register.call_count == 2
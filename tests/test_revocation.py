@@ -0,0 +1,160 @@
+import time
+
+import pytest
+
+from app.auth import revocation
+from app.auth.revocation import RevocationList
+from app.auth.security import hash_password
+from app.models import User
+
+
+class FakeRedis:
+    """
+    The sorted set commands used by RevocationList, in memory.
+    """
+
+    def __init__(self):
+        self.sets = {}
+
+    async def zadd(self, key, mapping):
+        self.sets.setdefault(key, {}).update(mapping)
+
+    async def zrem(self, key, member):
+        self.sets.get(key, {}).pop(member, None)
+
+    async def zremrangebyscore(self, key, low, high):
+        members = self.sets.get(key, {})
+        for member, score in list(members.items()):
+            if float(low) <= score <= float(high):
+                del members[member]
+
+    async def zrangebyscore(self, key, low, high):
+        return [
+            member.encode()
+            for member, score in self.sets.get(key, {}).items()
+            if float(low) <= score <= float(high)
+        ]
+
+
+@pytest.fixture
+def redis_client():
+    return FakeRedis()
+
+
+def _revocation_list(redis_client) -> RevocationList:
+    revocations = RevocationList("redis://localhost", "auth:revoked", 5)
+    revocations._client = redis_client
+    return revocations
+
+
+@pytest.fixture
+def revocation_list(redis_client, monkeypatch):
+    revocations = _revocation_list(redis_client)
+    monkeypatch.setattr(revocation, "revocation_list", revocations)
+    for module in ("app.auth.security", "app.services.user_service"):
+        monkeypatch.setattr(f"{module}.revocation_list", revocations)
+    return revocations
+
+
+@pytest.mark.asyncio
+async def test_revocations_reach_other_processes(redis_client):
+    here, there = _revocation_list(redis_client), _revocation_list(
+        redis_client
+    )
+    claims = {"sub": "alice", "jti": "1", "exp": time.time() + 60}
+
+    await here.revoke_token(claims)
+
+    assert here.is_revoked(claims)
+    assert not there.is_revoked(claims)
+    await there.refresh()
+    assert there.is_revoked(claims)
+    assert not there.is_revoked({**claims, "jti": "2"})
+
+
+@pytest.mark.asyncio
+async def test_expired_tokens_are_forgotten(redis_client):
+    revocations = _revocation_list(redis_client)
+    claims = {"sub": "alice", "jti": "1", "exp": time.time() - 1}
+
+    await revocations.revoke_token(claims)
+    await revocations.refresh()
+
+    assert not revocations.is_revoked(claims)
+    assert redis_client.sets["auth:revoked"] == {}
+
+
+@pytest.mark.asyncio
+async def test_disabled_user_until_enabled(redis_client):
+    revocations = _revocation_list(redis_client)
+    claims = {"sub": "alice", "jti": "1", "exp": time.time() + 60}
+
+    await revocations.disable_user("alice")
+    await revocations.refresh()
+    assert revocations.is_user_disabled("alice")
+    assert revocations.is_revoked(claims)
+
+    await revocations.enable_user("alice")
+    assert not revocations.is_revoked(claims)
+    await revocations.refresh()
+    assert not revocations.is_user_disabled("alice")
+
+
+async def _add_user(session, username: str, is_admin: bool = False):
+    session.add(
+        User(
+            username=username,
+            full_name=username.title(),
+            email=f"{username}@example.com",
+            hashed_password=await hash_password("secret"),
+            is_admin=is_admin,
+        )
+    )
+    await session.commit()
+
+
+async def _login(client, username: str):
+    return await client.post(
+        "/users/login/", data={"username": username, "password": "secret"}
+    )
+
+
+async def _headers(client, username: str) -> dict:
+    response = await _login(client, username)
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.mark.asyncio
+async def test_logout_revokes_the_token(client, session, revocation_list):
+    await _add_user(session, "alice")
+    headers = await _headers(client, "alice")
+    other_headers = await _headers(client, "alice")
+
+    response = await client.post("/users/logout/", headers=headers)
+    assert response.status_code == 204
+
+    response = await client.post("/users/logout/", headers=headers)
+    assert response.status_code == 401
+    response = await client.post("/users/logout/", headers=other_headers)
+    assert response.status_code == 204
+
+
+@pytest.mark.asyncio
+async def test_disabled_user_is_locked_out(client, session, revocation_list):
+    await _add_user(session, "admin", is_admin=True)
+    await _add_user(session, "bob")
+    admin_headers = await _headers(client, "admin")
+    bob_headers = await _headers(client, "bob")
+
+    response = await client.post("/users/admin/disable/", headers=bob_headers)
+    assert response.status_code == 403
+
+    response = await client.post("/users/bob/disable/", headers=admin_headers)
+    assert response.status_code == 204
+    response = await client.post("/users/logout/", headers=bob_headers)
+    assert response.status_code == 401
+    assert (await _login(client, "bob")).status_code == 403
+
+    response = await client.post("/users/bob/enable/", headers=admin_headers)
+    assert response.status_code == 204
+    assert (await _login(client, "bob")).status_code == 200
@@ -0,0 +1,21 @@
+from celery.signals import worker_process_shutdown, worker_shutdown
+
+import tasks
+
+
+def test_smtp_pool_is_closed_on_worker_shutdown(mocker):
+    # The only shutdown signal of the solo and threads pools
+    close = mocker.patch.object(tasks.smtp_pool, "close")
+
+    worker_shutdown.send(sender=None)
+
+    close.assert_called_once_with()
+
+
+def test_smtp_pool_is_closed_on_worker_process_shutdown(mocker):
+    close = mocker.patch.object(tasks.smtp_pool, "close")
+    mocker.patch.object(tasks, "mark_process_dead")
+
+    worker_process_shutdown.send(sender=None, pid=1, exitcode=0)
+
+    close.assert_called_once_with()
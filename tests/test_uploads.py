@@ -0,0 +1,62 @@
+import io
+import os
+import tracemalloc
+
+import pytest
+from fastapi import HTTPException, UploadFile
+
+from app.utils.uploads import CHUNK_SIZE, ingest_upload
+
+SIZE = 16 * 1024 * 1024
+
+
+@pytest.fixture
+def content():
+    return os.urandom(SIZE)
+
+
+@pytest.mark.asyncio
+async def test_in_memory_upload_is_not_copied(content):
+    upload_file = UploadFile(file=io.BytesIO(content))
+
+    tracemalloc.start()
+    try:
+        upload = await ingest_upload(
+            upload_file, max_bytes=SIZE, spool_threshold=SIZE
+        )
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert upload.path is None
+    assert upload.data == content
+    # The buffer (over-allocated by 1/8 while growing) and the chunk being
+    # appended, joining the chunks would need twice the content
+    assert peak < SIZE * 1.125 + 2 * CHUNK_SIZE
+
+
+@pytest.mark.asyncio
+async def test_large_upload_is_spilled(content):
+    upload = await ingest_upload(
+        UploadFile(file=io.BytesIO(content)),
+        max_bytes=SIZE,
+        spool_threshold=SIZE // 2,
+    )
+    try:
+        assert upload.data is None
+        with open(upload.path, "rb") as file:
+            assert file.read() == content
+    finally:
+        upload.close()
+
+    assert upload.path is None
+
+
+@pytest.mark.asyncio
+async def test_upload_over_the_limit(content):
+    with pytest.raises(HTTPException) as error:
+        await ingest_upload(
+            UploadFile(file=io.BytesIO(content)), max_bytes=SIZE - 1
+        )
+
+    assert error.value.status_code == 413
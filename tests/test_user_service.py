@@ -0,0 +1,100 @@
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+
+from app.repositories.base_repository import UniqueViolationError
+from app.repositories.user_repository import UserRepository
+from app.serializers.user_serializer import UserCreate
+from app.services.user_service import UserService
+
+
+def _user(username: str, email: str) -> UserCreate:
+    return UserCreate(
+        username=username,
+        full_name=username.title(),
+        email=email,
+        password="secret",
+    )
+
+
+@pytest_asyncio.fixture
+async def service(session):
+    service = UserService(user_repo=UserRepository(session))
+    await service.register_user(_user("alice", "alice@example.com"))
+    return service
+
+
+async def _conflict(service: UserService, username: str, email: str) -> str:
+    with pytest.raises(HTTPException) as error:
+        await service.register_user(_user(username, email))
+    assert error.value.status_code == 400
+    return error.value.detail
+
+
+@pytest.mark.asyncio
+async def test_register_user(service):
+    user = await service.register_user(_user("bob", "bob@example.com"))
+
+    assert user.id is not None
+    assert user.username == "bob"
+
+
+@pytest.mark.asyncio
+async def test_username_taken(service):
+    detail = await _conflict(service, "alice", "other@example.com")
+
+    assert detail == "User with this username already exists"
+
+
+@pytest.mark.asyncio
+async def test_email_taken(service):
+    detail = await _conflict(service, "other", "alice@example.com")
+
+    assert detail == "User with this email already exists"
+
+
+@pytest.mark.asyncio
+async def test_username_takes_precedence(service, mocker):
+    # Whichever index the database reports first
+    create_user = mocker.patch.object(
+        service.user_repo,
+        "create_user",
+        side_effect=UniqueViolationError(("email",)),
+    )
+
+    detail = await _conflict(service, "alice", "alice@example.com")
+
+    assert detail == "User with this username already exists"
+    create_user.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_unique_violation_columns(session):
+    repo = UserRepository(session)
+    await repo.create_user(username="alice", email="alice@example.com")
+
+    with pytest.raises(UniqueViolationError) as error:
+        await repo.create_user(username="bob", email="alice@example.com")
+
+    assert error.value.columns == ("email",)
+
+
+@pytest.mark.asyncio
+async def test_profile_shows_pending_activity(client, service):
+    from app.core.activity import activity_buffer
+
+    activity_buffer._pending.clear()
+    response = await client.post(
+        "/users/login/", data={"username": "alice", "password": "secret"}
+    )
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    response = await client.get("/users/users/me/", headers=headers)
+
+    # Not flushed to the database yet
+    assert await service.user_repo.get_last_request(1) is None
+    profile = response.json()
+    assert profile["username"] == "alice"
+    assert profile["last_login"] is not None
+    assert profile["last_request"] >= profile["last_login"]
+    activity_buffer._pending.clear()